@@ -0,0 +1,163 @@
+"""
+Cross-tier trace correlation.
+
+Web, app, db and cache lines share `trace_id` values. At load time each
+tier log is parsed into columns, reduced to one span per trace (worst
+level, max latency, HTTP status) and hash-joined on trace_id. The result is
+rendered as a compact table for the aggregator and summarizer, e.g.
+
+    trace req-101-w1x2y3: web 502 5234ms <- app OK 45ms <- db OK 18ms
+
+so the LLM receives the correlation instead of having to work it out from
+concatenated free text.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .parser import ParsedLog, parse_log
+
+
+TIER_ORDER = ["web", "app", "db", "cache"]
+
+# Lower is worse; levels not listed count as healthy
+LEVEL_SEVERITY = {
+    "FATAL": 0, "CRITICAL": 0, "SEVERE": 0,
+    "ERROR": 1, "ERR": 1,
+    "WARN": 2, "WARNING": 2,
+}
+HEALTHY_SEVERITY = 3
+
+DEFAULT_MAX_TRACES = 20
+
+
+@dataclass
+class TierSpan:
+    """One trace's footprint in one tier"""
+    tier: str
+    level: str
+    severity: int
+    line_count: int
+    first_timestamp_ns: int
+    max_latency_ms: Optional[float] = None
+    http_status: int = 0
+
+    @property
+    def outcome(self) -> str:
+        if self.http_status:
+            return str(self.http_status)
+        return "OK" if self.severity >= HEALTHY_SEVERITY else self.level
+
+    def render(self) -> str:
+        parts = [self.tier, self.outcome]
+        if self.max_latency_ms is not None:
+            parts.append(f"{self.max_latency_ms:.0f}ms")
+        return " ".join(parts)
+
+
+def tier_spans(parsed: ParsedLog) -> Dict[str, TierSpan]:
+    """Reduce a parsed tier log to one span per trace_id (vectorized group-by)"""
+    has_trace = parsed.trace != 0
+    if not has_trace.any():
+        return {}
+
+    rows = np.flatnonzero(has_trace)
+    rows = rows[np.argsort(parsed.trace[rows], kind="stable")]
+    codes = parsed.trace[rows]
+    group_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[group_starts, len(rows)])
+
+    level_severity = np.array(
+        [LEVEL_SEVERITY.get(level, HEALTHY_SEVERITY) for level in parsed.levels.values], dtype=np.int32
+    )
+    severity = level_severity[parsed.level[rows]]
+    worst = np.minimum.reduceat(severity, group_starts)
+    # The first row of each group carrying the worst severity names the level
+    worst_level_codes = [
+        parsed.level[rows[start:start + count]][severity[start:start + count].argmin()]
+        for start, count in zip(group_starts, counts)
+    ]
+    latency = parsed.latency_ms[rows]
+    with np.errstate(invalid="ignore"):
+        max_latency = np.fmax.reduceat(latency, group_starts)
+    status = np.maximum.reduceat(parsed.http_status[rows], group_starts)
+    first_ts = np.minimum.reduceat(parsed.timestamp_ns[rows], group_starts)
+
+    spans: Dict[str, TierSpan] = {}
+    for index, start in enumerate(group_starts):
+        trace_id = parsed.traces.values[codes[start]]
+        spans[trace_id] = TierSpan(
+            tier=parsed.tier,
+            level=parsed.levels.values[worst_level_codes[index]],
+            severity=int(worst[index]),
+            line_count=int(counts[index]),
+            first_timestamp_ns=int(first_ts[index]),
+            max_latency_ms=None if np.isnan(max_latency[index]) else float(max_latency[index]),
+            http_status=int(status[index]),
+        )
+    return spans
+
+
+def build_trace_index(parsed_logs: Dict[str, ParsedLog]) -> Dict[str, Dict[str, TierSpan]]:
+    """Hash-join per-tier spans on trace_id: trace -> {tier: span}"""
+    index: Dict[str, Dict[str, TierSpan]] = {}
+    for tier, parsed in parsed_logs.items():
+        for trace_id, span in tier_spans(parsed).items():
+            index.setdefault(trace_id, {})[tier] = span
+    return index
+
+
+def _ordered_spans(spans: Dict[str, TierSpan]) -> List[TierSpan]:
+    tiers = [tier for tier in TIER_ORDER if tier in spans] + sorted(set(spans) - set(TIER_ORDER))
+    return [spans[tier] for tier in tiers]
+
+
+def format_trace_correlation(
+    index: Dict[str, Dict[str, TierSpan]],
+    max_traces: int = DEFAULT_MAX_TRACES,
+) -> str:
+    """
+    Compact correlation table: recurring cross-tier patterns with counts,
+    then individual traces (failing traces first).
+    Only traces seen in at least two tiers are shown.
+    """
+    cross_tier = {trace_id: spans for trace_id, spans in index.items() if len(spans) > 1}
+    if not cross_tier:
+        return ""
+
+    def sort_key(item):
+        trace_id, spans = item
+        return (
+            min(span.severity for span in spans.values()),
+            min(span.first_timestamp_ns for span in spans.values()),
+            trace_id,
+        )
+
+    ranked = sorted(cross_tier.items(), key=sort_key)
+    failing = sum(1 for _, spans in ranked if min(s.severity for s in spans.values()) < HEALTHY_SEVERITY)
+
+    patterns = Counter(
+        " <- ".join(f"{span.tier} {span.outcome}" for span in _ordered_spans(spans))
+        for _, spans in ranked
+    )
+
+    lines = [
+        f"{len(cross_tier)} traces span multiple tiers ({failing} with errors or warnings).",
+        "Patterns:",
+    ]
+    lines.extend(f"  {count}x {pattern}" for pattern, count in patterns.most_common(10))
+    lines.append("Traces:")
+    for trace_id, spans in ranked[:max_traces]:
+        chain = " <- ".join(span.render() for span in _ordered_spans(spans))
+        lines.append(f"  trace {trace_id}: {chain}")
+    if len(ranked) > max_traces:
+        lines.append(f"  ... {len(ranked) - max_traces} more traces")
+    return "\n".join(lines)
+
+
+def correlate_tier_logs(logs: Dict[str, str], max_traces: int = DEFAULT_MAX_TRACES) -> str:
+    """Parse each tier's log and render the cross-tier trace correlation table"""
+    parsed_logs = {tier: parse_log(text, tier) for tier, text in logs.items() if text and text.strip()}
+    return format_trace_correlation(build_trace_index(parsed_logs), max_traces)
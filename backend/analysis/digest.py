@@ -0,0 +1,108 @@
+"""
+Load-time digests of tier logs.
+
+Everything an analysis derives from the raw tier logs is computed here once,
+when the logs are loaded (off the event loop), from a single parse per tier:
+
+- per tier: the token-budgeted prompt and retrieval samples, the
+  deterministic triage verdict and the exact statistics table;
+- across tiers: the trace correlation table and the combined statistics
+  the aggregator and summarizer read.
+
+The graph state carries the digests to the tier tools, so they never
+re-read or re-parse the whole log, and a cached scenario bundle keeps its
+digest, so repeat analyses do not parse at all. A tool invoked without a
+digest (e.g. on its own) digests its input in a worker thread.
+
+Latency sketches are added to a tier's table only when they cover lines the
+exact table does not (an upload's reservoir sample, a tail's recent window);
+otherwise they would repeat the exact percentiles.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+
+from .correlation import TIER_ORDER, build_trace_index, format_trace_correlation
+from .parser import ParsedLog, parse_log
+from .sampling import PROMPT_TOKEN_BUDGET, RETRIEVAL_TOKEN_BUDGET, sample_logs
+from .sketch import LatencySketches
+from .stats import format_tier_statistics
+from .triage import classify_log_health, format_healthy_result
+
+
+@dataclass
+class TierDigest:
+    """Everything a tier tool reads from one tier's log"""
+    tier: str
+    log_chars: int
+    prompt_sample: str
+    retrieval_sample: str
+    statistics: str  # Exact table, plus sketch rows when they cover more lines
+    healthy_result: str = ""  # Templated result when triage found the tier clearly healthy
+
+
+@dataclass
+class LogDigest:
+    """Digests of every tier plus the cross-tier tables"""
+    tiers: Dict[str, TierDigest] = field(default_factory=dict)
+    trace_correlation: str = ""
+    log_statistics: str = ""
+
+
+def sketch_statistics(latency_sketches: Optional[LatencySketches], tier: str, exact_latencies: int) -> str:
+    """A tier's sketch table, only if the sketches saw more latencies than the exact table"""
+    if latency_sketches is None:
+        return ""
+    count = latency_sketches.merged(tier=tier).count
+    if count <= exact_latencies:
+        return ""
+    return (
+        f"Latency (ms) over all {count} ingested {tier} lines with a latency, by service/AZ "
+        f"(sketch, within {latency_sketches.relative_accuracy:.0%}):\n{latency_sketches.format_table(tier=tier)}"
+    )
+
+
+def digest_tier(
+    text: str,
+    tier: str,
+    latency_sketches: Optional[LatencySketches] = None,
+    parsed: Optional[ParsedLog] = None,
+) -> TierDigest:
+    """Sample, triage and tabulate one tier's log (`parsed` is reused when given)"""
+    if parsed is None:
+        parsed = parse_log(text, tier)
+    exact_latencies = int(np.count_nonzero(~np.isnan(parsed.latency_ms)))
+    tables = [format_tier_statistics(parsed), sketch_statistics(latency_sketches, tier, exact_latencies)]
+    triage = classify_log_health(text)
+    return TierDigest(
+        tier=tier,
+        log_chars=len(text),
+        prompt_sample=sample_logs(text, PROMPT_TOKEN_BUDGET),
+        retrieval_sample=sample_logs(text, RETRIEVAL_TOKEN_BUDGET),
+        statistics="\n".join(table for table in tables if table),
+        healthy_result=format_healthy_result(tier, triage) if triage.healthy else "",
+    )
+
+
+def digest_logs(logs: Dict[str, str], latency_sketches: Optional[LatencySketches] = None) -> LogDigest:
+    """Digest every non-empty tier log and correlate the tiers, parsing each log once"""
+    parsed_logs = {tier: parse_log(text, tier) for tier, text in logs.items() if text and text.strip()}
+    digests = {
+        tier: digest_tier(logs[tier], tier, latency_sketches, parsed)
+        for tier, parsed in parsed_logs.items()
+    }
+
+    # Tiers seen only by the sketches (nothing kept) still report their latencies
+    sketched = {key[0] for key in latency_sketches.sketches} if latency_sketches is not None else set()
+    tiers = set(digests) | sketched
+    ordered = [tier for tier in TIER_ORDER if tier in tiers] + sorted(tiers - set(TIER_ORDER))
+    tables = [
+        digests[tier].statistics if tier in digests else sketch_statistics(latency_sketches, tier, 0)
+        for tier in ordered
+    ]
+    return LogDigest(
+        tiers=digests,
+        trace_correlation=format_trace_correlation(build_trace_index(parsed_logs)),
+        log_statistics="\n\n".join(table for table in tables if table),
+    )
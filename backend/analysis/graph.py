@@ -13,8 +13,16 @@ Architecture:
 
 - Layer 3: Aggregator - Collects results from all tools
 - Layer 4: Summarizer - Creates final summary
+
+Tier tools run either sequentially (router -> tool -> router -> ...) or in
+parallel, where the router fans out to every tier that has logs and the
+tools join at the aggregator.
+
+Nodes that call an LLM or retriever are async and use `ainvoke`, so the graph
+must be run with `ainvoke`/`astream`; a slow OpenAI call then never blocks
+the event loop serving other analyses.
 """
-from typing import Annotated, List, Dict, Any
+from typing import Annotated, List, Dict, Any, AsyncIterator, Optional, Tuple
 import operator
 from typing_extensions import TypedDict
 from langchain_core.messages import BaseMessage, AIMessage
@@ -23,19 +31,32 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from .digest import TierDigest
+
+
+TIER_TOOL_NODES = ["web_tool", "app_tool", "db_tool", "cache_tool"]
+
+
+def _take_latest(current: str, update: str) -> str:
+    """Reducer for `next` so parallel tool nodes may all report a routing hint"""
+    return update
+
 
 class MultiLayerState(TypedDict):
     """State for multi-layer log analysis graph"""
     messages: Annotated[List[BaseMessage], operator.add]
-    web_log: str  # Web tier logs directly from web.log
-    app_log: str  # App tier logs directly from app.log
-    db_log: str   # DB tier logs directly from db.log
-    cache_log: str  # Cache tier (Redis) logs directly from cache.log
+    web_log: str  # Web tier logs from web.log (prompt sample of them)
+    app_log: str  # App tier logs from app.log (prompt sample of them)
+    db_log: str   # DB tier logs from db.log (prompt sample of them)
+    cache_log: str  # Cache tier (Redis) logs from cache.log (prompt sample of them)
+    trace_correlation: str  # Cross-tier trace_id correlation table, computed at load time
+    log_statistics: str  # Per service/AZ/instance latency and error-rate tables, computed at load time
+    tier_digests: Dict[str, TierDigest]  # Per-tier prompt/retrieval samples and triage, computed at load time
     web_result: str
     app_result: str
     db_result: str
     cache_result: str
-    next: str  # Incident manager decision: "web_tool", "app_tool", "db_tool", "cache_tool", "aggregate"
+    next: Annotated[str, _take_latest]  # Incident manager decision: "web_tool", "app_tool", "db_tool", "cache_tool", "aggregate" (comma-separated tools in parallel mode)
     tool_results: dict  # Store all tool results
     rca_summary_markdown: str
     rca_root_cause: str
@@ -44,55 +65,37 @@ class MultiLayerState(TypedDict):
     runbook_results: List[Dict[str, Any]]
 
 
-def create_incident_manager_node():
+def create_incident_manager_node(parallel: bool = False):
     """
     Layer 1: Incident manager node that decides which tools to use.
     Directly routes based on available log files - no keyword searching needed.
     No LLM needed - simple logic based on log file availability.
+
+    Args:
+        parallel: Route to every pending tier tool at once (comma-separated
+            in `next`) instead of one tool at a time
     """
     def incident_manager_node(state: MultiLayerState):
         """Route logs to the appropriate tool based on available log files"""
-        # Get separate log files
-        web_log = state.get("web_log", "").strip()
-        app_log = state.get("app_log", "").strip()
-        db_log = state.get("db_log", "").strip()
-        
-        cache_log = state.get("cache_log", "").strip()
-        
-        # Check what's already been done
-        web_done = bool(state.get("web_result"))
-        app_done = bool(state.get("app_result"))
-        db_done = bool(state.get("db_result"))
-        cache_done = bool(state.get("cache_result"))
-        
-        # Check which log files are available
-        has_web_log = bool(web_log)
-        has_app_log = bool(app_log)
-        has_db_log = bool(db_log)
-        has_cache_log = bool(cache_log)
+        # Tools whose log file is available and that have not run yet
+        # Priority: web -> app -> db -> cache
+        pending = []
+        for tool_name in TIER_TOOL_NODES:
+            tier = tool_name.split("_")[0]
+            has_log = bool(state.get(f"{tier}_log", "").strip())
+            done = bool(state.get(f"{tier}_result"))
+            if has_log and not done:
+                pending.append(tool_name)
         
         # If all available tools are done, go to aggregate
-        if (
-            (not has_web_log or web_done)
-            and (not has_app_log or app_done)
-            and (not has_db_log or db_done)
-            and (not has_cache_log or cache_done)
-        ):
+        if not pending:
             return {"next": "aggregate"}
         
+        if parallel:
+            return {"next": ",".join(pending)}
+        
         # Route to first available and undone tool
-        # Priority: web -> app -> db -> cache
-        if has_web_log and not web_done:
-            return {"next": "web_tool"}
-        elif has_app_log and not app_done:
-            return {"next": "app_tool"}
-        elif has_db_log and not db_done:
-            return {"next": "db_tool"}
-        elif has_cache_log and not cache_done:
-            return {"next": "cache_tool"}
-        else:
-            # All available tools done, go to aggregate
-            return {"next": "aggregate"}
+        return {"next": pending[0]}
     
     return incident_manager_node
 
@@ -102,7 +105,7 @@ def create_web_tool_node(web_rag_tool):
     Layer 2: Web tool node - executes web RAG analysis.
     Directly uses web.log content - no extraction needed.
     """
-    def web_tool_node(state: MultiLayerState):
+    async def web_tool_node(state: MultiLayerState):
         """Execute web tier analysis"""
         # Get web log directly from state
         web_logs = state.get("web_log", "")
@@ -114,8 +117,9 @@ def create_web_tool_node(web_rag_tool):
                 "next": "incident_manager"
             }
         
-        # Use web RAG tool directly with web.log content
-        result = web_rag_tool.invoke(web_logs[:5000] if len(web_logs) > 5000 else web_logs)
+        # The tool reads the samples digested at load time instead of the whole web.log
+        digest = state.get("tier_digests", {}).get("web")
+        result = await web_rag_tool.ainvoke({"query": web_logs, "digest": digest})
         
         return {
             "web_result": result,
@@ -131,7 +135,7 @@ def create_app_tool_node(app_rag_tool):
     Layer 2: App tool node - executes app RAG analysis.
     Directly uses app.log content - no extraction needed.
     """
-    def app_tool_node(state: MultiLayerState):
+    async def app_tool_node(state: MultiLayerState):
         """Execute app tier analysis"""
         # Get app log directly from state
         app_logs = state.get("app_log", "")
@@ -143,8 +147,9 @@ def create_app_tool_node(app_rag_tool):
                 "next": "incident_manager"
             }
         
-        # Use app RAG tool directly with app.log content
-        result = app_rag_tool.invoke(app_logs[:5000] if len(app_logs) > 5000 else app_logs)
+        # The tool reads the samples digested at load time instead of the whole app.log
+        digest = state.get("tier_digests", {}).get("app")
+        result = await app_rag_tool.ainvoke({"query": app_logs, "digest": digest})
         
         return {
             "app_result": result,
@@ -160,7 +165,7 @@ def create_db_tool_node(db_rag_tool):
     Layer 2: DB tool node - executes db RAG analysis.
     Directly uses db.log content - no extraction needed.
     """
-    def db_tool_node(state: MultiLayerState):
+    async def db_tool_node(state: MultiLayerState):
         """Execute db tier analysis"""
         # Get db log directly from state
         db_logs = state.get("db_log", "")
@@ -172,8 +177,9 @@ def create_db_tool_node(db_rag_tool):
                 "next": "incident_manager"
             }
         
-        # Use db RAG tool directly with db.log content
-        result = db_rag_tool.invoke(db_logs[:5000] if len(db_logs) > 5000 else db_logs)
+        # The tool reads the samples digested at load time instead of the whole db.log
+        digest = state.get("tier_digests", {}).get("db")
+        result = await db_rag_tool.ainvoke({"query": db_logs, "digest": digest})
         
         return {
             "db_result": result,
@@ -188,7 +194,7 @@ def create_cache_tool_node(cache_rag_tool):
     """
     Layer 2: Cache tool node - executes Redis cache RAG analysis.
     """
-    def cache_tool_node(state: MultiLayerState):
+    async def cache_tool_node(state: MultiLayerState):
         """Execute cache tier analysis"""
         cache_logs = state.get("cache_log", "")
         
@@ -199,8 +205,9 @@ def create_cache_tool_node(cache_rag_tool):
                 "next": "incident_manager"
             }
         
-        query_text = cache_logs[:5000] if len(cache_logs) > 5000 else cache_logs
-        result = cache_rag_tool.invoke({"query": query_text})
+        # The tool reads the samples digested at load time instead of the whole cache.log
+        digest = state.get("tier_digests", {}).get("cache")
+        result = await cache_rag_tool.ainvoke({"query": cache_logs, "digest": digest})
         
         return {
             "cache_result": result,
@@ -232,6 +239,10 @@ def create_aggregator_node():
             f"=== {tier.upper()} TIER ===\n{result}"
             for tier, result in results.items()
         ])
+        if state.get("trace_correlation"):
+            combined += f"\n\n=== CROSS-TIER TRACE CORRELATION ===\n{state['trace_correlation']}"
+        if state.get("log_statistics"):
+            combined += f"\n\n=== LATENCY AND ERROR STATISTICS ===\n{state['log_statistics']}"
         
         return {
             "tool_results": results,
@@ -255,9 +266,9 @@ Return ONLY valid JSON with the following keys:
 - summary_markdown: markdown string containing the full summary (include sections:
     1. Executive Summary: High-level overview
     2. Tier Analysis: Key findings from each tier (web, app, db, cache)
-    3. Cross-Tier Correlations: How issues relate across tiers
+    3. Cross-Tier Correlations: How issues relate across tiers (use the CROSS-TIER TRACE CORRELATION table when present)
     4. Root Cause Analysis: Unified root cause
-    5. Impact Assessment: Overall system impact
+    5. Impact Assessment: Overall system impact (quote figures from the LATENCY AND ERROR STATISTICS tables when present)
     6. Remediation Plan: Prioritized action items
     7. Prevention Recommendations: How to prevent similar incidents
   Start summary_markdown with \"# FINAL INCIDENT SUMMARY\".
@@ -273,7 +284,7 @@ Be concise but comprehensive. Focus on actionable insights."""),
 
     chain = prompt | llm | StrOutputParser()
 
-    def summarizer_node(state: MultiLayerState):
+    async def summarizer_node(state: MultiLayerState):
         """Create final summary"""
         aggregated = state.get("tool_results", {})
 
@@ -291,8 +302,13 @@ Be concise but comprehensive. Focus on actionable insights."""),
             f"=== {tier.upper()} TIER ===\n{result}"
             for tier, result in aggregated.items()
         )
+        # Correlation is precomputed from trace_ids, so the LLM reads it instead of deriving it
+        if state.get("trace_correlation"):
+            formatted += f"\n\n=== CROSS-TIER TRACE CORRELATION ===\n{state['trace_correlation']}"
+        if state.get("log_statistics"):
+            formatted += f"\n\n=== LATENCY AND ERROR STATISTICS ===\n{state['log_statistics']}"
 
-        raw_output = chain.invoke({"aggregated_results": formatted})
+        raw_output = await chain.ainvoke({"aggregated_results": formatted})
 
         # Robust JSON parsing with minimal fallback
         parsed: Dict[str, Any] = {}
@@ -398,6 +414,7 @@ def build_multi_layer_graph(
     aggregator_node,
     summarizer_node,
     runbook_node,
+    parallel: bool = False,
 ):
     """
     Build multi-layer LangGraph with all tools as separate nodes.
@@ -415,6 +432,9 @@ def build_multi_layer_graph(
         db_tool_node: DB tool node function
         aggregator_node: Aggregator node function
         summarizer_node: Summarizer node function
+        parallel: Fan out to all pending tier tools at once and join them at
+            the aggregator; the incident manager must be created with the
+            same setting
     
     Returns:
         Compiled LangGraph
@@ -435,9 +455,10 @@ def build_multi_layer_graph(
     graph.set_entry_point("incident_manager")
     
     # Router can route to tools or aggregate
+    # In parallel mode `next` lists several tools, which run in the same step
     graph.add_conditional_edges(
         "incident_manager",
-        lambda x: x.get("next", "aggregate"),
+        lambda x: x.get("next", "aggregate").split(","),
         {
             "web_tool": "web_tool",
             "app_tool": "app_tool",
@@ -447,11 +468,14 @@ def build_multi_layer_graph(
         },
     )
     
-    # Tools go back to router
-    graph.add_edge("web_tool", "incident_manager")
-    graph.add_edge("app_tool", "incident_manager")
-    graph.add_edge("db_tool", "incident_manager")
-    graph.add_edge("cache_tool", "incident_manager")
+    if parallel:
+        # Tools join at the aggregator, which runs once all of them finish
+        for tool_name in TIER_TOOL_NODES:
+            graph.add_edge(tool_name, "aggregate")
+    else:
+        # Tools go back to router
+        for tool_name in TIER_TOOL_NODES:
+            graph.add_edge(tool_name, "incident_manager")
     
     # Aggregator goes to summarizer
     graph.add_edge("aggregate", "summarizer")
@@ -460,3 +484,63 @@ def build_multi_layer_graph(
     
     return graph.compile()
 
+
+def create_multi_layer_graph(
+    rag_tools: Dict[str, Any],
+    llm: ChatOpenAI,
+    runbook_search_fn,
+    parallel: bool = False,
+):
+    """
+    Create every layer node and compile the multi-layer graph.
+
+    The topology does not depend on the logs being analyzed, so callers should
+    build this once and reuse it; each run is parameterized only by the
+    initial MultiLayerState.
+
+    Args:
+        rag_tools: Tier RAG tools keyed by tier ("web", "app", "db", "cache")
+        llm: Chat model used by the summarizer
+        runbook_search_fn: Async runbook search used by the runbook node
+        parallel: Run all tier tools concurrently instead of one at a time
+
+    Returns:
+        Compiled LangGraph
+    """
+    return build_multi_layer_graph(
+        create_incident_manager_node(parallel=parallel),
+        create_web_tool_node(rag_tools["web"]),
+        create_app_tool_node(rag_tools["app"]),
+        create_db_tool_node(rag_tools["db"]),
+        create_cache_tool_node(rag_tools["cache"]),
+        create_aggregator_node(),
+        create_summarizer_node(llm),
+        create_runbook_node(runbook_search_fn),
+        parallel=parallel,
+    )
+
+
+async def astream_with_final_state(
+    compiled_graph,
+    initial_state: MultiLayerState,
+    config: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Execute the graph once, streaming node updates and the final state.
+
+    Yields ("update", {node_name: node_output}) after every node, then a
+    single ("final", state) with the fully accumulated MultiLayerState, so
+    callers never need a second ainvoke (and a second round of LLM calls)
+    to recover the end result.
+    """
+    final_state: Dict[str, Any] = {}
+    async for mode, chunk in compiled_graph.astream(
+        initial_state,
+        config or {"recursion_limit": 20},
+        stream_mode=["updates", "values"],
+    ):
+        if mode == "values":
+            final_state = chunk
+        else:
+            yield "update", chunk
+    yield "final", final_state
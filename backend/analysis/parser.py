@@ -0,0 +1,197 @@
+"""
+Compiled structured parser for tier logs.
+
+Every tier log line shares one bracketed layout:
+
+    TS [LEVEL] [trace_id:..] [request_id:..] [ELB|RDS:..] [AZ:..] [EC2|DB|redis-node:..] [Service:..|Apache|Redis] message - NNNms
+
+`parse_log` walks the text once with a single precompiled pattern and builds
+a columnar `ParsedLog`: numpy arrays for timestamps (int64 ns), interned
+level/service/AZ/instance/trace codes, latency, HTTP status and message
+offsets into the original text. Lines whose timestamp matches the layout
+but is not a real time (2024-02-30T10:00:00Z) are skipped and counted
+instead of failing the whole tier. Downstream stages (filtering, stats,
+correlation, prompting) work on whole columns instead of per-line dicts.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Missing fields are stored as code 0 / NaN / 0 status
+MISSING = ""
+
+LINE_PATTERN = re.compile(
+    r"^(?P<ts>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?)Z?[ \t]+"
+    r"\[(?P<level>[A-Z]+)\][ \t]*"
+    r"(?:\[trace_id:(?P<trace_id>[^\]]*)\][ \t]*)?"
+    r"(?:\[request_id:(?P<request_id>[^\]]*)\][ \t]*)?"
+    r"(?:\[(?:ELB|RDS):(?P<group>[^\]]*)\][ \t]*)?"
+    r"(?:\[AZ:(?P<az>[^\]]*)\][ \t]*)?"
+    r"(?:\[(?:EC2|DB|redis-node):(?P<instance>[^\]]*)\][ \t]*)?"
+    r"(?:\[(?:Service:)?(?P<service>[^\]:]*)\][ \t]*)?"
+    r"(?P<message>[^\n]*)$",
+    re.MULTILINE,
+)
+LATENCY_PATTERN = re.compile(r"- (\d+(?:\.\d+)?)ms\b")
+HTTP_STATUS_PATTERN = re.compile(r" - ([1-5]\d{2}) [A-Z]")
+
+
+class StringInterner:
+    """Maps repeated strings to small integer codes; code 0 is always missing"""
+
+    def __init__(self):
+        self.values: List[str] = [MISSING]
+        self._codes: Dict[str, int] = {MISSING: 0}
+
+    def intern(self, value: Optional[str]) -> int:
+        if not value:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def code(self, value: str) -> int:
+        """Code of a known value, -1 if it never occurred"""
+        return self._codes.get(value, -1)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+@dataclass
+class ParsedLog:
+    """Column-oriented view of one tier log"""
+    tier: str
+    text: str
+    timestamp_ns: np.ndarray          # int64, ns since epoch (UTC)
+    level: np.ndarray                 # int32 codes into `levels`
+    trace: np.ndarray                 # int32 codes into `traces`
+    group: np.ndarray                 # int32 codes into `groups` (ELB / RDS security group)
+    az: np.ndarray                    # int32 codes into `azs`
+    instance: np.ndarray              # int32 codes into `instances` (EC2 / DB / redis node)
+    service: np.ndarray               # int32 codes into `services`
+    latency_ms: np.ndarray            # float64, NaN when the line has no latency
+    http_status: np.ndarray           # int16, 0 when the line has no HTTP status
+    message_start: np.ndarray         # int64 offsets into `text`
+    message_end: np.ndarray           # int64 offsets into `text`
+    levels: StringInterner = field(default_factory=StringInterner)
+    traces: StringInterner = field(default_factory=StringInterner)
+    groups: StringInterner = field(default_factory=StringInterner)
+    azs: StringInterner = field(default_factory=StringInterner)
+    instances: StringInterner = field(default_factory=StringInterner)
+    services: StringInterner = field(default_factory=StringInterner)
+    invalid_timestamps: int = 0       # layout-matching lines skipped for an impossible timestamp
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ns)
+
+    def message(self, row: int) -> str:
+        return self.text[self.message_start[row]:self.message_end[row]]
+
+    def level_mask(self, *levels: str) -> np.ndarray:
+        """Boolean row mask for lines at any of the given levels"""
+        codes = [self.levels.code(level) for level in levels]
+        return np.isin(self.level, [code for code in codes if code >= 0])
+
+    def time_mask(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> np.ndarray:
+        """Boolean row mask for lines in [start_ns, end_ns)"""
+        mask = np.ones(len(self), dtype=bool)
+        if start_ns is not None:
+            mask &= self.timestamp_ns >= start_ns
+        if end_ns is not None:
+            mask &= self.timestamp_ns < end_ns
+        return mask
+
+
+def parse_timestamps(values: List[str]) -> np.ndarray:
+    """
+    ISO-8601 strings to datetime64[ns] in one vectorized call; values that
+    are not real times (month 13, Feb 30, hour 25) become NaT instead of
+    raising for the whole array.
+    """
+    try:
+        return np.array(values, dtype="datetime64[ns]")
+    except ValueError:
+        pass
+    parsed = np.empty(len(values), dtype="datetime64[ns]")
+    for index, value in enumerate(values):
+        try:
+            parsed[index] = np.datetime64(value, "ns")
+        except ValueError:
+            parsed[index] = np.datetime64("NaT")
+    return parsed
+
+
+def parse_log(text: str, tier: str = "") -> ParsedLog:
+    """
+    Parse a tier log into columns in a single pass.
+
+    Lines that do not follow the layout (blank lines, section headers,
+    stack trace continuations) are skipped, as are lines with an impossible
+    timestamp (counted in `invalid_timestamps`).
+    """
+    levels, traces, groups = StringInterner(), StringInterner(), StringInterner()
+    azs, instances, services = StringInterner(), StringInterner(), StringInterner()
+
+    timestamps: List[str] = []
+    level_codes: List[int] = []
+    trace_codes: List[int] = []
+    group_codes: List[int] = []
+    az_codes: List[int] = []
+    instance_codes: List[int] = []
+    service_codes: List[int] = []
+    latencies: List[float] = []
+    statuses: List[int] = []
+    message_starts: List[int] = []
+    message_ends: List[int] = []
+
+    nan = float("nan")
+    for match in LINE_PATTERN.finditer(text):
+        timestamps.append(match.group("ts"))
+        level_codes.append(levels.intern(match.group("level")))
+        trace_codes.append(traces.intern(match.group("trace_id")))
+        group_codes.append(groups.intern(match.group("group")))
+        az_codes.append(azs.intern(match.group("az")))
+        instance_codes.append(instances.intern(match.group("instance")))
+        service_codes.append(services.intern(match.group("service")))
+
+        message = match.group("message")
+        latency = LATENCY_PATTERN.search(message)
+        latencies.append(float(latency.group(1)) if latency else nan)
+        status = HTTP_STATUS_PATTERN.search(message)
+        statuses.append(int(status.group(1)) if status else 0)
+        message_starts.append(match.start("message"))
+        message_ends.append(match.end("message"))
+
+    # numpy parses the ISO strings in one vectorized call
+    parsed_timestamps = parse_timestamps(timestamps)
+    valid = ~np.isnat(parsed_timestamps)
+
+    return ParsedLog(
+        tier=tier,
+        text=text,
+        timestamp_ns=parsed_timestamps[valid].astype(np.int64),
+        level=np.array(level_codes, dtype=np.int32)[valid],
+        trace=np.array(trace_codes, dtype=np.int32)[valid],
+        group=np.array(group_codes, dtype=np.int32)[valid],
+        az=np.array(az_codes, dtype=np.int32)[valid],
+        instance=np.array(instance_codes, dtype=np.int32)[valid],
+        service=np.array(service_codes, dtype=np.int32)[valid],
+        latency_ms=np.array(latencies, dtype=np.float64)[valid],
+        http_status=np.array(statuses, dtype=np.int16)[valid],
+        message_start=np.array(message_starts, dtype=np.int64)[valid],
+        message_end=np.array(message_ends, dtype=np.int64)[valid],
+        levels=levels,
+        traces=traces,
+        groups=groups,
+        azs=azs,
+        instances=instances,
+        services=services,
+        invalid_timestamps=int(len(valid) - valid.sum()),
+    )
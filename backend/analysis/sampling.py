@@ -0,0 +1,185 @@
+"""
+Severity-weighted log sampling under a token budget.
+
+Replaces fixed character slices before prompting and retrieval. The budget
+is counted in model tokens (tiktoken) and filled in priority order:
+
+1. every distinct ERROR/WARN signature (one representative line, annotated
+   with its template's occurrence count, time range and latency range),
+   most severe first;
+2. INFO lines spaced evenly over the log's time range as context.
+
+An error on line 50,000 is therefore kept ahead of any INFO line, and the
+result never exceeds the budget. Logs that already fit are returned as-is.
+"""
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .parser import parse_timestamps
+from .templates import LEVEL_PATTERN, SEVERITY_RANK, TIMESTAMP_PATTERN, TemplateMiner
+
+
+# Token budgets for what the tier tools send to the LLM and the retriever
+PROMPT_TOKEN_BUDGET = 1500
+RETRIEVAL_TOKEN_BUDGET = 500
+DEFAULT_TOKEN_MODEL = "gpt-4o-mini"
+
+# Used when tiktoken (or its encoding files) is unavailable; deliberately
+# pessimistic so the estimate never undercounts log text
+FALLBACK_CHARS_PER_TOKEN = 3
+# No tokenizer produces fewer tokens than characters / this, so longer
+# texts cannot fit and need not be counted exactly
+MAX_CHARS_PER_TOKEN = 10
+
+
+_token_counters: Dict[str, Callable[[str], int]] = {}
+_token_counters_lock = threading.Lock()
+
+
+def _fallback_token_count(text: str) -> int:
+    return math.ceil(len(text) / FALLBACK_CHARS_PER_TOKEN)
+
+
+def get_token_counter(model: str = DEFAULT_TOKEN_MODEL) -> Callable[[str], int]:
+    """Token counting function for a model, falling back to a character estimate"""
+    with _token_counters_lock:
+        if model not in _token_counters:
+            try:
+                import tiktoken
+                encoding = tiktoken.encoding_for_model(model)
+                _token_counters[model] = lambda text: len(encoding.encode(text, disallowed_special=()))
+            except Exception as e:
+                print(f"⚠️ tiktoken unavailable for {model} ({type(e).__name__}); estimating tokens from length")
+                _token_counters[model] = _fallback_token_count
+        return _token_counters[model]
+
+
+def count_tokens(text: str, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    return get_token_counter(model)(text)
+
+
+def _time_spaced(candidates: List[Tuple[int, Optional[str]]], count: int) -> List[int]:
+    """Pick up to `count` line indices spread evenly over the candidates' time range"""
+    if count <= 0 or not candidates:
+        return []
+    if count >= len(candidates):
+        return [index for index, _ in candidates]
+
+    timestamps = [ts for _, ts in candidates]
+    parsed = parse_timestamps([ts.rstrip("Z") for ts in timestamps]) if all(timestamps) else None
+    if parsed is not None and not np.isnat(parsed).any():
+        times = parsed.astype(np.int64)
+    else:
+        # Missing or impossible timestamps: space by position instead
+        times = np.arange(len(candidates), dtype=np.int64)
+    order = np.argsort(times, kind="stable")
+    sorted_times = times[order].tolist()
+    targets = np.linspace(sorted_times[0], sorted_times[-1], count)
+
+    chosen: List[int] = []
+    taken = set()
+    for target in targets:
+        position = min(bisect.bisect_left(sorted_times, target), len(sorted_times) - 1)
+        # Nearest not-yet-taken candidate at or after the target
+        while position in taken and position + 1 < len(sorted_times):
+            position += 1
+        if position not in taken:
+            taken.add(position)
+            chosen.append(candidates[order[position]][0])
+    return sorted(chosen)
+
+
+def sample_logs(log_text: str, token_budget: int = PROMPT_TOKEN_BUDGET, model: str = DEFAULT_TOKEN_MODEL) -> str:
+    """
+    Fill a token budget with deduplicated ERROR/WARN signatures first and
+    evenly time-spaced INFO context after. Never exceeds `token_budget`.
+    """
+    count = get_token_counter(model)
+    if len(log_text) <= token_budget * MAX_CHARS_PER_TOKEN and count(log_text) <= token_budget:
+        return log_text
+
+    lines = log_text.splitlines()
+    headers: List[str] = []
+    miner = TemplateMiner()
+    # template (keyed by its unique first_seen) -> index of its first line
+    signatures: Dict[int, int] = {}
+    signature_rank: Dict[int, int] = {}
+    context: List[Tuple[int, Optional[str]]] = []
+
+    for index, line in enumerate(lines):
+        if line.startswith("==="):
+            headers.append(line)
+            continue
+        if not line.strip():
+            continue
+        timestamp_match = TIMESTAMP_PATTERN.match(line)
+        timestamp = timestamp_match.group(1) if timestamp_match else None
+        level_match = LEVEL_PATTERN.search(line)
+        level = level_match.group(1) if level_match else None
+        if level not in SEVERITY_RANK:
+            context.append((index, timestamp))
+            continue
+        # Only errors and warnings need a signature
+        template = miner.add_line(line)
+        if template.first_seen not in signatures:
+            signatures[template.first_seen] = index
+            signature_rank[template.first_seen] = SEVERITY_RANK[level]
+    templates = {template.first_seen: template for template in miner.templates}
+
+    remaining = token_budget
+    output_header = headers[:1]
+    for header in output_header:
+        remaining -= count(header) + 1
+
+    # 1. Error/warning signatures, most severe first, then earliest
+    selected_errors: List[Tuple[int, str]] = []
+    for key in sorted(signatures, key=lambda k: (signature_rank[k], signatures[k])):
+        first_index = signatures[key]
+        text = lines[first_index]
+        template = templates[key]
+        if template.count > 1:
+            summary = template.summary()
+            text += f"  [x{template.count} similar" + (f", {summary}]" if summary else "]")
+        cost = count(text) + 1
+        if cost <= remaining:
+            selected_errors.append((first_index, text))
+            remaining -= cost
+
+    summary = (
+        f"[sampled from {len(context) + sum(templates[key].count for key in signatures)} lines: {len(selected_errors)} of "
+        f"{len(signatures)} error/warning signatures, INFO context evenly spaced]"
+    )
+    summary_cost = count(summary) + 1
+    if summary_cost <= remaining:
+        remaining -= summary_cost
+    else:
+        summary = ""
+
+    # 2. INFO context, evenly spaced in time; size the pick from an average
+    # line cost, then drop lines until it fits exactly
+    selected_context: List[Tuple[int, str]] = []
+    if context and remaining > 0:
+        probe = [lines[index] for index, _ in context[:: max(1, len(context) // 20)][:20]]
+        average_cost = max(1.0, sum(count(line) + 1 for line in probe) / len(probe))
+        picks = _time_spaced(context, int(remaining // average_cost))
+        costs = [(index, count(lines[index]) + 1) for index in picks]
+        total = sum(cost for _, cost in costs)
+        while costs and total > remaining:
+            # Thin out from the middle rather than cutting off the end of the window
+            _, cost = costs.pop(len(costs) // 2)
+            total -= cost
+        selected_context = [(index, lines[index]) for index, _ in costs]
+
+    selected = sorted(selected_errors + selected_context)
+    while True:
+        blocks = list(output_header) + ([summary] if summary else []) + [text for _, text in selected]
+        result = "\n".join(blocks)
+        # Per-line costs can differ slightly from the joined text; trim context, then errors
+        if count(result) <= token_budget or not selected:
+            return result
+        context_rows = [row for row in selected if row in selected_context]
+        selected.remove(context_rows[-1] if context_rows else selected[-1])
@@ -0,0 +1,217 @@
+"""
+Mergeable streaming quantile sketches for latency.
+
+`DDSketch` keeps latencies in logarithmic buckets: every value v lands in
+bucket ceil(log_gamma(v)) with gamma = (1 + a) / (1 - a), so any quantile is
+returned within relative accuracy `a` (1% by default) of the true value.
+Memory is the number of non-empty buckets, capped at `max_buckets` by
+collapsing the lowest buckets (which only degrades the lowest quantiles; the
+p95/p99 that matter for incidents stay exact-enough). Two sketches merge by
+adding bucket counts, so sketches built on different shards, workers or
+polls combine into the same answer as one sketch over all values.
+
+`LatencySketches` keeps one sketch per (tier, service, AZ), fed from parsed
+log chunks while logs stream through the loader or the tailer.
+"""
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .correlation import TIER_ORDER
+from .parser import ParsedLog, parse_log
+
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048
+# Latencies at or below this (ms) are counted in the zero bucket
+MIN_INDEXABLE_MS = 1e-3
+# Lines parsed per chunk when sketching a line stream
+SKETCH_CHUNK_LINES = 20000
+
+SketchKey = Tuple[str, str, str]  # (tier, service, az)
+
+
+class DDSketch:
+    """Relative-error quantile sketch with bounded memory; mergeable"""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, max_buckets: int = DEFAULT_MAX_BUCKETS):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bucket(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        if math.isnan(value):
+            return
+        if value <= MIN_INDEXABLE_MS:
+            self.zero_count += weight
+        else:
+            bucket = self._bucket(value)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + weight
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def add_many(self, values: np.ndarray) -> None:
+        """Add an array of values in one vectorized pass (NaN is ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        positive = values[values > MIN_INDEXABLE_MS]
+        self.zero_count += int(len(values) - len(positive))
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += int(len(values))
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        # Fold the lowest buckets into the lowest one that is kept
+        keys = sorted(self.buckets)
+        excess = keys[: len(keys) - self.max_buckets + 1]
+        target = excess[-1]
+        self.buckets[target] = sum(self.buckets.pop(key) for key in excess)
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        """Fold another sketch (same accuracy) into this one"""
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1) within the relative accuracy, None if empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return max(self.min, 0.0)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class LatencySketches:
+    """One DDSketch per (tier, service, AZ); mergeable as a whole"""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.sketches: Dict[SketchKey, DDSketch] = {}
+
+    def sketch(self, tier: str, service: str = "", az: str = "") -> DDSketch:
+        key = (tier, service, az)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = DDSketch(self.relative_accuracy)
+        return sketch
+
+    def add_parsed(self, parsed: ParsedLog) -> None:
+        """Add every latency of a parsed chunk, grouped by (service, AZ)"""
+        rows = np.flatnonzero(~np.isnan(parsed.latency_ms))
+        if not len(rows):
+            return
+        cells = parsed.service[rows].astype(np.int64) * len(parsed.azs) + parsed.az[rows]
+        order = np.argsort(cells, kind="stable")
+        rows, cells = rows[order], cells[order]
+        starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        for start, stop in zip(starts, np.r_[starts[1:], len(rows)]):
+            service_code, az_code = divmod(int(cells[start]), len(parsed.azs))
+            self.sketch(
+                parsed.tier, parsed.services.values[service_code], parsed.azs.values[az_code]
+            ).add_many(parsed.latency_ms[rows[start:stop]])
+
+    def add_text(self, tier: str, text: str) -> None:
+        if text:
+            self.add_parsed(parse_log(text, tier))
+
+    def feed(self, tier: str, lines: Iterable[str], chunk_lines: int = SKETCH_CHUNK_LINES) -> Iterator[str]:
+        """Pass lines through unchanged while sketching them chunk by chunk"""
+        chunk: List[str] = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                self.add_text(tier, "\n".join(chunk))
+                yield from chunk
+                chunk = []
+        self.add_text(tier, "\n".join(chunk))
+        yield from chunk
+
+    def merge(self, other: "LatencySketches") -> "LatencySketches":
+        for key, sketch in other.sketches.items():
+            self.sketch(*key).merge(sketch)
+        return self
+
+    def merged(self, tier: Optional[str] = None, service: Optional[str] = None, az: Optional[str] = None) -> DDSketch:
+        """One sketch over every (tier, service, AZ) matching the given filters"""
+        result = DDSketch(self.relative_accuracy)
+        for (key_tier, key_service, key_az), sketch in self.sketches.items():
+            if tier is not None and key_tier != tier:
+                continue
+            if service is not None and key_service != service:
+                continue
+            if az is not None and key_az != az:
+                continue
+            result.merge(sketch)
+        return result
+
+    def format_table(self, max_rows: int = 20, tier: Optional[str] = None) -> str:
+        """p50/p95/p99 per (tier, service, AZ), slowest p99 first within each tier"""
+        items = [item for item in self.sketches.items() if tier is None or item[0][0] == tier]
+        if not items:
+            return ""
+        tier_rank = {name: position for position, name in enumerate(TIER_ORDER)}
+        rows = sorted(
+            items,
+            key=lambda item: (tier_rank.get(item[0][0], len(TIER_ORDER)), item[0][0], -(item[1].quantile(0.99) or 0.0)),
+        )
+        lines = [f"  {'tier':<6} {'service':<24} {'az':<12} {'count':>9} {'p50':>7} {'p95':>7} {'p99':>7}"]
+        for (key_tier, service, az), sketch in rows[:max_rows]:
+            p50, p95, p99 = (sketch.quantile(q) for q in (0.50, 0.95, 0.99))
+            lines.append(
+                f"  {key_tier:<6} {service or '-':<24} {az or '-':<12} {sketch.count:>9} "
+                f"{p50:>7.0f} {p95:>7.0f} {p99:>7.0f}"
+            )
+        if len(rows) > max_rows:
+            lines.append(f"  ... {len(rows) - max_rows} more")
+        return "\n".join(lines)
+
+    def __len__(self) -> int:
+        return len(self.sketches)
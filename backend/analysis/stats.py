@@ -0,0 +1,217 @@
+"""
+Vectorized latency and error-rate statistics per service, AZ and instance.
+
+Each tier log is parsed into columns (backend.analysis.parser) and reduced
+with numpy group-bys: line counts, error rates and p50/p95/p99 latency per
+dimension value, plus the error rate in each of a few equal time windows and
+the p95 of the first vs last window. The result is a compact fixed-width
+table, e.g.
+
+    service          lines   err%    p50    p95    p99  err% by window   p95 first->last
+    order-service      120   35.0     45   5100   5234  0/0/40/90        48 -> 5200
+
+so the tier tools and the summarizer read exact numbers instead of doing
+arithmetic over raw lines.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .correlation import HEALTHY_SEVERITY, LEVEL_SEVERITY, TIER_ORDER
+from .parser import ParsedLog, parse_log
+
+
+# ERROR and worse (see LEVEL_SEVERITY), or any 5xx response
+ERROR_SEVERITY = 1
+QUANTILES = (0.50, 0.95, 0.99)
+DEFAULT_WINDOWS = 4
+DEFAULT_MAX_GROUPS = 8
+
+# (label, ParsedLog code column, ParsedLog interner)
+DIMENSIONS = [
+    ("service", "service", "services"),
+    ("az", "az", "azs"),
+    ("instance", "instance", "instances"),
+]
+
+
+@dataclass
+class GroupStats:
+    """Statistics for the lines sharing one dimension value"""
+    name: str
+    lines: int
+    errors: int
+    quantiles: List[Optional[float]]
+    window_error_rates: List[Optional[float]] = field(default_factory=list)
+    first_window_p95: Optional[float] = None
+    last_window_p95: Optional[float] = None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.lines if self.lines else 0.0
+
+
+def error_mask(parsed: ParsedLog) -> np.ndarray:
+    """Boolean row mask for error lines (ERROR or worse, or HTTP 5xx)"""
+    level_severity = np.array(
+        [LEVEL_SEVERITY.get(level, HEALTHY_SEVERITY) for level in parsed.levels.values], dtype=np.int32
+    )
+    return (level_severity[parsed.level] <= ERROR_SEVERITY) | (parsed.http_status >= 500)
+
+
+def window_index(parsed: ParsedLog, windows: int) -> np.ndarray:
+    """Equal-width time window (0..windows-1) of every row"""
+    if not len(parsed):
+        return np.zeros(0, dtype=np.int64)
+    first = parsed.timestamp_ns.min()
+    span = int(parsed.timestamp_ns.max() - first)
+    return (parsed.timestamp_ns - first) * windows // (span + 1)
+
+
+def grouped_quantiles(codes: np.ndarray, values: np.ndarray, groups: int, quantiles=QUANTILES) -> np.ndarray:
+    """
+    Quantiles of `values` per group code in one sort (linear interpolation,
+    as np.percentile). Returns a (groups, len(quantiles)) array, NaN for
+    groups without values; NaN values are ignored.
+    """
+    result = np.full((groups, len(quantiles)), np.nan)
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    if not len(values):
+        return result
+
+    order = np.lexsort((values, codes))
+    values = values[order]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    for column, q in enumerate(quantiles):
+        position = starts[present] + q * (counts[present] - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        fraction = position - low
+        result[present, column] = values[low] * (1 - fraction) + values[high] * fraction
+    return result
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def group_stats(
+    parsed: ParsedLog,
+    column: str,
+    interner: str,
+    windows: int = DEFAULT_WINDOWS,
+) -> List[GroupStats]:
+    """Per-value statistics of one dimension, worst first (lines missing the dimension are skipped)"""
+    codes = getattr(parsed, column).astype(np.int64)
+    names = getattr(parsed, interner).values
+    groups = len(names)
+    lines = np.bincount(codes, minlength=groups)
+    errors_by_row = error_mask(parsed)
+    errors = np.bincount(codes[errors_by_row], minlength=groups)
+    quantiles = grouped_quantiles(codes, parsed.latency_ms, groups)
+
+    # Same group-bys over (value, window) cells
+    cells = codes * windows + window_index(parsed, windows)
+    cell_lines = np.bincount(cells, minlength=groups * windows).reshape(groups, windows)
+    cell_errors = np.bincount(cells[errors_by_row], minlength=groups * windows).reshape(groups, windows)
+    cell_p95 = grouped_quantiles(cells, parsed.latency_ms, groups * windows, (0.95,)).reshape(groups, windows)
+
+    stats = []
+    for code in range(1, groups):
+        if not lines[code]:
+            continue
+        window_rates = [
+            float(cell_errors[code, w] / cell_lines[code, w]) if cell_lines[code, w] else None
+            for w in range(windows)
+        ]
+        # First and last windows that actually have latencies
+        window_p95 = [value for value in cell_p95[code] if not np.isnan(value)]
+        stats.append(GroupStats(
+            name=names[code],
+            lines=int(lines[code]),
+            errors=int(errors[code]),
+            quantiles=[_optional(value) for value in quantiles[code]],
+            window_error_rates=window_rates,
+            first_window_p95=float(window_p95[0]) if len(window_p95) > 1 else None,
+            last_window_p95=float(window_p95[-1]) if len(window_p95) > 1 else None,
+        ))
+    stats.sort(key=lambda s: (-s.error_rate, -(s.quantiles[1] or 0.0), s.name))
+    return stats
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.1f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_tier_statistics(
+    parsed: ParsedLog,
+    windows: int = DEFAULT_WINDOWS,
+    max_groups: int = DEFAULT_MAX_GROUPS,
+) -> str:
+    """Compact statistics table for one parsed tier log"""
+    if not len(parsed):
+        return ""
+
+    errors = int(error_mask(parsed).sum())
+    overall = grouped_quantiles(np.zeros(len(parsed), dtype=np.int64), parsed.latency_ms, 1)[0]
+    first_ns, last_ns = int(parsed.timestamp_ns.min()), int(parsed.timestamp_ns.max())
+    window_seconds = (last_ns - first_ns + 1) / windows / 1e9
+    first, last = np.datetime_as_string(np.array([first_ns, last_ns], dtype="datetime64[ns]"), unit="s")
+
+    lines = [
+        f"{parsed.tier or 'tier'}: {len(parsed)} lines {first} -> {last} "
+        f"({windows} windows of {_format_duration(window_seconds)}), "
+        f"errors {errors} ({100 * errors / len(parsed):.1f}%), "
+        f"latency p50 {_ms(_optional(overall[0]))}ms p95 {_ms(_optional(overall[1]))}ms "
+        f"p99 {_ms(_optional(overall[2]))}ms"
+        + (f", {parsed.invalid_timestamps} lines with invalid timestamps skipped" if parsed.invalid_timestamps else "")
+    ]
+    for label, column, interner in DIMENSIONS:
+        stats = group_stats(parsed, column, interner, windows)
+        if not stats:
+            continue
+        width = max(len(label), *(len(s.name) for s in stats[:max_groups]))
+        lines.append(
+            f"  {label:<{width}}  {'lines':>6} {'err%':>6} {'p50':>6} {'p95':>6} {'p99':>6}"
+            f"  err% by window   p95 first->last"
+        )
+        for s in stats[:max_groups]:
+            rates = "/".join("-" if rate is None else f"{100 * rate:.0f}" for rate in s.window_error_rates)
+            trend = (
+                f"{_ms(s.first_window_p95)} -> {_ms(s.last_window_p95)}"
+                if s.first_window_p95 is not None else "-"
+            )
+            lines.append(
+                f"  {s.name:<{width}}  {s.lines:>6} {100 * s.error_rate:>6.1f} "
+                f"{_ms(s.quantiles[0]):>6} {_ms(s.quantiles[1]):>6} {_ms(s.quantiles[2]):>6}"
+                f"  {rates:<16} {trend}"
+            )
+        if len(stats) > max_groups:
+            lines.append(f"  ... {len(stats) - max_groups} more {label} values")
+    return "\n".join(lines)
+
+
+def tier_statistics(text: str, tier: str = "", windows: int = DEFAULT_WINDOWS) -> str:
+    """Parse one tier's log and render its statistics table"""
+    if not text or not text.strip():
+        return ""
+    return format_tier_statistics(parse_log(text, tier), windows)
+
+
+def log_statistics(logs: Dict[str, str], windows: int = DEFAULT_WINDOWS) -> str:
+    """Statistics tables for every non-empty tier, in tier order"""
+    tiers = [tier for tier in TIER_ORDER if tier in logs] + sorted(set(logs) - set(TIER_ORDER))
+    tables = [tier_statistics(logs[tier], tier, windows) for tier in tiers]
+    return "\n\n".join(table for table in tables if table)
@@ -0,0 +1,188 @@
+"""
+Drain-style log template mining.
+
+Collapses log lines that differ only in variable fields (trace IDs, request
+IDs, instance IDs, latencies, other tokens Drain finds to vary) into
+templates with counts, first/last timestamps and latency ranges. Templates
+serve as the error signatures for the token-budget sampler (sampling.py),
+which annotates each representative line with its template's summary, and
+for the tail, upload and catalog signature tables.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+WILDCARD = "<*>"
+MAX_EXAMPLE_CHARS = 500
+MAX_EXACT_CACHE = 10000
+
+TIMESTAMP_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?)\s+")
+LEVEL_PATTERN = re.compile(r"\[(TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|ERR|FATAL|CRITICAL|SEVERE)\]")
+LATENCY_PATTERN = re.compile(r"\b(\d+(?:\.\d+)?)\s?ms\b")
+
+# Fields that identify a single request or host and never belong in a template
+MASKS = [
+    (re.compile(r"\[(trace_id|request_id):[^\]]*\]"), r"[\1:<*>]"),
+    (re.compile(r"\[EC2:[^\]]*\]"), "[EC2:<*>]"),
+    (re.compile(r"\bi-[0-9a-f]{8,17}\b"), WILDCARD),
+    (re.compile(r"\b\d+(?:\.\d+)?\s?ms\b"), "<*>ms"),
+]
+
+SEVERITY_RANK = {
+    "FATAL": 0, "CRITICAL": 0, "SEVERE": 0,
+    "ERROR": 1, "ERR": 1,
+    "WARN": 2, "WARNING": 2,
+}
+DEFAULT_RANK = 3
+
+
+def mask_line(line: str) -> str:
+    """Replace request- and host-specific fields with wildcards"""
+    for pattern, replacement in MASKS:
+        line = pattern.sub(replacement, line)
+    return line
+
+
+@dataclass
+class LogTemplate:
+    """A group of log lines sharing the same constant tokens"""
+    tokens: List[str]
+    level: str
+    count: int = 0
+    first_timestamp: Optional[str] = None
+    last_timestamp: Optional[str] = None
+    min_latency_ms: Optional[float] = None
+    max_latency_ms: Optional[float] = None
+    example: str = ""
+    first_seen: int = 0
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+    @property
+    def severity_rank(self) -> int:
+        return SEVERITY_RANK.get(self.level, DEFAULT_RANK)
+
+    def add(self, timestamp: Optional[str], latency: Optional[float], raw_line: str) -> None:
+        self.count += 1
+        if timestamp:
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+        if latency is not None:
+            self.min_latency_ms = latency if self.min_latency_ms is None else min(self.min_latency_ms, latency)
+            self.max_latency_ms = latency if self.max_latency_ms is None else max(self.max_latency_ms, latency)
+        if not self.example:
+            self.example = raw_line[:MAX_EXAMPLE_CHARS]
+
+    def summary(self) -> str:
+        """Time range and latency range, e.g. "14:30:01Z -> 14:31:10Z, latency 45-5100ms" """
+        parts = []
+        if self.first_timestamp:
+            if self.last_timestamp and self.last_timestamp != self.first_timestamp:
+                parts.append(f"{self.first_timestamp} -> {self.last_timestamp}")
+            else:
+                parts.append(self.first_timestamp)
+        if self.max_latency_ms is not None:
+            if self.min_latency_ms == self.max_latency_ms:
+                parts.append(f"latency {self.max_latency_ms:.0f}ms")
+            else:
+                parts.append(f"latency {self.min_latency_ms:.0f}-{self.max_latency_ms:.0f}ms")
+        return ", ".join(parts)
+
+
+class TemplateMiner:
+    """
+    Simplified Drain: lines are bucketed by severity, token count and first
+    message token, then matched to the most similar template in the bucket. A match
+    above `similarity_threshold` merges the line, turning differing tokens
+    into wildcards; otherwise the line starts a new template.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.5, max_templates: int = 1000):
+        self.similarity_threshold = similarity_threshold
+        self.max_templates = max_templates
+        self._buckets: Dict[tuple, List[LogTemplate]] = {}
+        # Masked line -> template; repeated lines skip the similarity search
+        self._exact: Dict[str, LogTemplate] = {}
+        self.templates: List[LogTemplate] = []
+        self.line_count = 0
+
+    @staticmethod
+    def _message_start(tokens: List[str]) -> int:
+        """Index of the first token after the leading [field] tags"""
+        for index, token in enumerate(tokens):
+            if not token.startswith("["):
+                return index
+        return len(tokens)
+
+    @classmethod
+    def _similarity(cls, template_tokens: List[str], tokens: List[str]) -> float:
+        # Only the message counts: the shared [field] prefix would make
+        # unrelated errors from the same host look alike
+        start = cls._message_start(tokens)
+        message = list(zip(template_tokens[start:], tokens[start:]))
+        if not message:
+            return 1.0
+        same = sum(1 for a, b in message if a == b or a == WILDCARD)
+        return same / len(message)
+
+    def add_line(self, line: str) -> Optional[LogTemplate]:
+        line = line.rstrip()
+        # Blank lines and "=== WEB TIER LOGS ===" style section headers
+        if not line.strip() or line.startswith("==="):
+            return None
+        self.line_count += 1
+
+        timestamp_match = TIMESTAMP_PATTERN.match(line)
+        timestamp = timestamp_match.group(1) if timestamp_match else None
+        body = line[timestamp_match.end():] if timestamp_match else line
+        level_match = LEVEL_PATTERN.search(body)
+        level = level_match.group(1) if level_match else "UNKNOWN"
+        latencies = LATENCY_PATTERN.findall(body)
+        latency = max(float(value) for value in latencies) if latencies else None
+
+        masked = mask_line(body)
+        known = self._exact.get(masked)
+        if known is not None:
+            known.add(timestamp, latency, line)
+            return known
+
+        tokens = masked.split()
+        start = self._message_start(tokens)
+        key = (level, len(tokens), start, tokens[start] if start < len(tokens) else "")
+        bucket = self._buckets.setdefault(key, [])
+
+        best, best_score = None, -1.0
+        for template in bucket:
+            score = self._similarity(template.tokens, tokens)
+            if score > best_score:
+                best, best_score = template, score
+
+        if best is not None and best_score >= self.similarity_threshold:
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+        else:
+            same_level = [t for t in self.templates if t.level == level]
+            if len(self.templates) >= self.max_templates and same_level:
+                # Template budget exhausted: fold into the closest template of the same severity
+                best = min(same_level, key=lambda t: abs(len(t.tokens) - len(tokens)))
+            else:
+                best = LogTemplate(tokens=tokens, level=level, first_seen=self.line_count)
+                bucket.append(best)
+                self.templates.append(best)
+        if len(self._exact) < MAX_EXACT_CACHE:
+            self._exact[masked] = best
+        best.add(timestamp, latency, line)
+        return best
+
+    def add_text(self, text: str) -> "TemplateMiner":
+        for line in text.splitlines():
+            self.add_line(line)
+        return self
+
+    def ranked_templates(self) -> List[LogTemplate]:
+        """Most severe first, then most frequent, then earliest seen"""
+        return sorted(self.templates, key=lambda t: (t.severity_rank, -t.count, t.first_seen))
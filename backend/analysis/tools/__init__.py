@@ -6,8 +6,20 @@ from .web_tool import create_web_rag_tool
 from .app_tool import create_app_rag_tool
 from .db_tool import create_db_rag_tool
 from .cache_tool import create_cache_rag_tool
+from .knowledge_base import KnowledgeBaseIndex, get_knowledge_base_index
+from .registry import ToolRegistry, get_tool_registry, set_tool_registry
 
-__all__ = ["create_web_rag_tool", "create_app_rag_tool", "create_db_rag_tool", "create_cache_rag_tool"]
+__all__ = [
+    "create_web_rag_tool",
+    "create_app_rag_tool",
+    "create_db_rag_tool",
+    "create_cache_rag_tool",
+    "KnowledgeBaseIndex",
+    "get_knowledge_base_index",
+    "ToolRegistry",
+    "get_tool_registry",
+    "set_tool_registry",
+]
 
 
 
@@ -1,72 +1,55 @@
 """
 Cache (Redis) tier RAG tool for analyzing cache server logs.
 """
-import os
-from typing import Annotated
-from langchain_core.tools import tool
+from typing import Annotated, Optional
+from langchain_core.tools import StructuredTool
+from langchain_core.runnables import RunnableLambda
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_openai.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Qdrant
 from langchain_openai import ChatOpenAI
-from langgraph.graph import START, StateGraph
+from langgraph.graph import END, START, StateGraph
 from typing_extensions import TypedDict, List
 from langchain_core.documents import Document
+from .knowledge_base import KnowledgeBaseIndex, get_knowledge_base_index
+from ..digest import TierDigest
+from ..triage import create_triage_node, route_after_triage
 
 
 class CacheLogAnalysisState(TypedDict):
     """State for cache log RAG analysis"""
     log_input: str
+    digest: Optional[TierDigest]  # Samples and triage verdict, set by the triage node
     context: List[Document]
     analysis_result: str
 
 
-def create_cache_rag_tool():
+def create_cache_rag_tool(kb_index: Optional[KnowledgeBaseIndex] = None):
     """
     Create a RAG tool for Redis cache log analysis.
+
+    Args:
+        kb_index: Shared knowledge base index (defaults to the process-wide index)
     """
-    current_file = os.path.abspath(__file__)
-    tools_dir = os.path.dirname(current_file)
-    analysis_dir = os.path.dirname(tools_dir)
-    backend_dir = os.path.dirname(analysis_dir)
-    cache_kb_path = os.path.join(backend_dir, "data", "knowledge_base", "cache")
-
-    cache_docs = []
-    if os.path.isdir(cache_kb_path):
-        loader = DirectoryLoader(cache_kb_path, glob="**/*.md", loader_cls=TextLoader, loader_kwargs={"encoding": "utf-8"})
-        cache_docs = loader.load()
-        cache_docs = [doc for doc in cache_docs if doc.page_content and doc.page_content.strip()]
-    else:
-        raise FileNotFoundError(f"Cache knowledge base directory not found. Checked: {cache_kb_path}")
-
-    if not cache_docs:
-        raise ValueError(f"No documents with content loaded from {cache_kb_path}.")
-
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", chunk_size=100)
-    vectorstore = Qdrant.from_documents(cache_docs, embeddings, location=":memory:", batch_size=10)
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    # Retrieve from the cache partition of the shared knowledge base index
+    kb_index = kb_index or get_knowledge_base_index()
+    retriever = kb_index.as_retriever("cache", k=5)
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", "You are a REDIS cache incident responder. Determine whether the logs represent healthy behaviour or problems (connection pool exhaustion, timeouts, memory pressure). Provide clear root cause and remediation guidance."),
-        ("human", "Analyze the Redis logs:\n\nLogs:\n{query}\n\nContext:\n{context}\n\nPlease identify:\n1. Status and severity.\n2. Primary indicators in the logs.\n3. Likely root cause.\n4. Immediate remediation steps.\n5. Recommendations to prevent recurrence.")
+        ("human", "Analyze the Redis logs:\n\nLogs:\n{query}\n\nStatistics (exact, computed over all lines):\n{statistics}\n\nContext:\n{context}\n\nPlease identify:\n1. Status and severity.\n2. Primary indicators in the logs.\n3. Likely root cause.\n4. Immediate remediation steps.\n5. Recommendations to prevent recurrence.")
     ])
 
     llm = ChatOpenAI(model="gpt-4o-mini")
     chain = prompt | llm | StrOutputParser()
 
-    def retrieve_log_context(state: CacheLogAnalysisState):
-        log_input = state["log_input"]
-        query_text = log_input[:2000] if len(log_input) > 2000 else log_input
-        retrieved_docs = retriever.invoke(query_text)
-        return {"context": retrieved_docs}
-
-    def analyze_log(state: CacheLogAnalysisState):
-        log_text = state["log_input"]
+    def build_chain_inputs(state: CacheLogAnalysisState):
         context_text = "\n\n".join([d.page_content for d in state["context"]]) if state["context"] else "No similar incidents."
-        query_text = log_text[:5000] if len(log_text) > 5000 else log_text
-        analysis_result = chain.invoke({"query": query_text, "context": context_text})
+        query_text = state["digest"].prompt_sample
+        # Exact latency / error-rate figures so the LLM does not estimate them from the sample
+        statistics = state["digest"].statistics or "No structured log lines."
+        return {"query": query_text, "statistics": statistics, "context": context_text}
 
+    def apply_known_patterns(log_text: str, analysis_result: str) -> str:
         log_text_lower = log_text.lower()
         if log_text_lower.strip():
             if "err max number of clients reached" in log_text_lower or "connection pool" in log_text_lower:
@@ -87,21 +70,52 @@ def create_cache_rag_tool():
                     "Immediate Remediation: Inspect slowlog output, optimize offending commands, consider scaling cache resources.\n"
                     "Prevention: Add monitoring for slowlog, tune command usage, and provision capacity ahead of peak load."
                 )
+        return analysis_result
 
-        return {"analysis_result": analysis_result}
+    def retrieve_log_context(state: CacheLogAnalysisState):
+        retrieved_docs = retriever.invoke(state["digest"].retrieval_sample)
+        return {"context": retrieved_docs}
+
+    async def aretrieve_log_context(state: CacheLogAnalysisState):
+        retrieved_docs = await retriever.ainvoke(state["digest"].retrieval_sample)
+        return {"context": retrieved_docs}
 
+    def analyze_log(state: CacheLogAnalysisState):
+        analysis_result = chain.invoke(build_chain_inputs(state))
+        return {"analysis_result": apply_known_patterns(state["log_input"], analysis_result)}
+
+    async def aanalyze_log(state: CacheLogAnalysisState):
+        analysis_result = await chain.ainvoke(build_chain_inputs(state))
+        return {"analysis_result": apply_known_patterns(state["log_input"], analysis_result)}
+
+    # Each step has a sync and an async implementation so the tool can be
+    # awaited without blocking the event loop
     graph = StateGraph(CacheLogAnalysisState)
-    graph.add_sequence([retrieve_log_context, analyze_log])
-    graph.add_edge(START, "retrieve_log_context")
+    graph.add_sequence([
+        ("retrieve_log_context", RunnableLambda(retrieve_log_context, afunc=aretrieve_log_context)),
+        ("analyze_log", RunnableLambda(analyze_log, afunc=aanalyze_log)),
+    ])
+    # Clearly healthy logs end at triage without retrieval or an LLM call
+    graph.add_node("triage_logs", create_triage_node("cache"))
+    graph.add_edge(START, "triage_logs")
+    graph.add_conditional_edges("triage_logs", route_after_triage, ["retrieve_log_context", END])
     compiled_analyzer = graph.compile()
 
-    @tool
     def analyze_cache_logs(
-        query: Annotated[str, "Redis cache log entries to analyze for incidents and remediation"]
+        query: Annotated[str, "Redis cache log entries to analyze for incidents and remediation"],
+        digest: Annotated[Optional[TierDigest], "Samples and triage of these logs computed at load time"] = None,
+    ):
+        """Use RAG to analyze Redis cache logs and produce remediation guidance."""
+        result = compiled_analyzer.invoke({"log_input": query, "digest": digest})
+        return result["analysis_result"]
+
+    async def aanalyze_cache_logs(
+        query: Annotated[str, "Redis cache log entries to analyze for incidents and remediation"],
+        digest: Annotated[Optional[TierDigest], "Samples and triage of these logs computed at load time"] = None,
     ):
         """Use RAG to analyze Redis cache logs and produce remediation guidance."""
-        result = compiled_analyzer.invoke({"log_input": query})
+        result = await compiled_analyzer.ainvoke({"log_input": query, "digest": digest})
         return result["analysis_result"]
 
-    return analyze_cache_logs
+    return StructuredTool.from_function(func=analyze_cache_logs, coroutine=aanalyze_cache_logs)
 
@@ -0,0 +1,136 @@
+"""
+Shared, tier-partitioned knowledge base index for the tier RAG tools.
+
+All of backend/data/knowledge_base/{web,app,db,cache} live in one Qdrant
+collection. Every document carries a `tier` payload field (indexed as a
+keyword), and each tier's retriever queries the collection filtered by tier,
+so the embeddings client, document objects and index are built only once.
+"""
+import os
+import threading
+import warnings
+from typing import List, Optional
+
+from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.vectorstores import Qdrant
+from langchain_core.documents import Document
+from langchain_openai.embeddings import OpenAIEmbeddings
+from qdrant_client import models
+
+from src.utils.embedding_cache import CachedEmbeddings
+
+
+_TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+_BACKEND_DIR = os.path.dirname(os.path.dirname(_TOOLS_DIR))
+KNOWLEDGE_BASE_DIR = os.path.join(_BACKEND_DIR, "data", "knowledge_base")
+
+KB_COLLECTION_NAME = "srenity_knowledge_base"
+KB_EMBEDDING_MODEL = "text-embedding-3-small"
+TIER_PAYLOAD_KEY = "metadata.tier"
+
+
+def discover_tiers(kb_dir: str = KNOWLEDGE_BASE_DIR) -> List[str]:
+    """Every sub-directory of the knowledge base is a tier"""
+    if not os.path.isdir(kb_dir):
+        raise FileNotFoundError(f"Knowledge base directory not found. Checked: {kb_dir}")
+    return sorted(
+        entry for entry in os.listdir(kb_dir)
+        if os.path.isdir(os.path.join(kb_dir, entry))
+    )
+
+
+def load_tier_documents(tier: str, kb_dir: str = KNOWLEDGE_BASE_DIR) -> List[Document]:
+    """Load a tier's markdown documents, tagged with their tier"""
+    tier_kb_path = os.path.join(kb_dir, tier)
+    if not os.path.isdir(tier_kb_path):
+        raise FileNotFoundError(f"{tier.capitalize()} knowledge base directory not found. Checked: {tier_kb_path}")
+
+    loader = DirectoryLoader(tier_kb_path, glob="**/*.md", loader_cls=TextLoader, loader_kwargs={"encoding": "utf-8"})
+    docs = [doc for doc in loader.load() if doc.page_content and doc.page_content.strip()]
+    if not docs:
+        raise ValueError(f"No documents with content loaded from {tier_kb_path}.")
+
+    for doc in docs:
+        doc.metadata["tier"] = tier
+    return docs
+
+
+class KnowledgeBaseIndex:
+    """One vector collection holding every tier, queried per tier by payload filter"""
+
+    def __init__(self, vectorstore: Qdrant, tiers: List[str], kb_dir: str = KNOWLEDGE_BASE_DIR):
+        self.vectorstore = vectorstore
+        self.kb_dir = kb_dir
+        self._tiers = set(tiers)
+        self._lock = threading.Lock()
+
+    @property
+    def tiers(self) -> List[str]:
+        return sorted(self._tiers)
+
+    def add_tier(self, tier: str) -> None:
+        """Add a new tier's documents to the existing collection (no rebuild)"""
+        with self._lock:
+            if tier in self._tiers:
+                return
+            self.vectorstore.add_documents(load_tier_documents(tier, self.kb_dir), batch_size=10)
+            self._tiers.add(tier)
+
+    def as_retriever(self, tier: str, k: int = 5):
+        """Retriever over a single tier's documents"""
+        if tier not in self._tiers:
+            self.add_tier(tier)
+        tier_filter = models.Filter(
+            must=[models.FieldCondition(key=TIER_PAYLOAD_KEY, match=models.MatchValue(value=tier))]
+        )
+        return self.vectorstore.as_retriever(search_kwargs={"k": k, "filter": tier_filter})
+
+
+def build_knowledge_base_index(
+    tiers: Optional[List[str]] = None,
+    kb_dir: str = KNOWLEDGE_BASE_DIR,
+) -> KnowledgeBaseIndex:
+    """Embed every tier's documents into one in-memory collection"""
+    tiers = tiers or discover_tiers(kb_dir)
+    docs: List[Document] = []
+    for tier in tiers:
+        docs.extend(load_tier_documents(tier, kb_dir))
+
+    # Knowledge base vectors come from the on-disk cache unless a document changed
+    embeddings = CachedEmbeddings(
+        OpenAIEmbeddings(model=KB_EMBEDDING_MODEL, chunk_size=100),
+        model_name=KB_EMBEDDING_MODEL,
+    )
+    vectorstore = Qdrant.from_documents(
+        docs,
+        embeddings,
+        location=":memory:",
+        collection_name=KB_COLLECTION_NAME,
+        batch_size=10,
+    )
+    # Keyword index on the tier field; local (in-memory) Qdrant scans instead
+    # and warns, but the same code gets a real index on a Qdrant server
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        vectorstore.client.create_payload_index(
+            collection_name=KB_COLLECTION_NAME,
+            field_name=TIER_PAYLOAD_KEY,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+    print(f"✅ Knowledge base index built: {len(docs)} documents across tiers {tiers}")
+    return KnowledgeBaseIndex(vectorstore, tiers, kb_dir)
+
+
+# Global index instance (singleton pattern)
+_kb_index: Optional[KnowledgeBaseIndex] = None
+_kb_index_lock = threading.Lock()
+
+
+def get_knowledge_base_index() -> KnowledgeBaseIndex:
+    """Get the shared knowledge base index, building it on first use"""
+    global _kb_index
+    if _kb_index is None:
+        with _kb_index_lock:
+            if _kb_index is None:
+                _kb_index = build_knowledge_base_index()
+    return _kb_index
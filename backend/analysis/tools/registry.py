@@ -0,0 +1,121 @@
+"""
+Process-wide registry of prebuilt tier RAG tools.
+
+Building the tier tools loads the shared knowledge base index (embedding it
+on first use), so the tools are built once per process (normally at FastAPI startup)
+and shared by every analysis afterwards. The tools themselves are stateless
+between invocations, so concurrent requests can safely use the same instances.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .web_tool import create_web_rag_tool
+from .app_tool import create_app_rag_tool
+from .db_tool import create_db_rag_tool
+from .cache_tool import create_cache_rag_tool
+
+
+TOOL_BUILDERS: Dict[str, Callable[[], Any]] = {
+    "web": create_web_rag_tool,
+    "app": create_app_rag_tool,
+    "db": create_db_rag_tool,
+    "cache": create_cache_rag_tool,
+}
+
+
+class ToolRegistry:
+    """Builds the tier RAG tools once and hands out the shared instances"""
+
+    def __init__(self, builders: Optional[Dict[str, Callable[[], Any]]] = None):
+        self._builders = dict(builders or TOOL_BUILDERS)
+        self._tools: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._building = False
+        self._error: Optional[str] = None
+        self._build_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._tools)
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Build all tier tools if they are not built yet.
+
+        Safe to call from several threads: the first caller builds the tools
+        (one tier per worker thread) while the others wait on the lock and
+        then reuse the result.
+        """
+        if self._tools:
+            return self._tools
+
+        with self._lock:
+            if self._tools:
+                return self._tools
+
+            self._building = True
+            self._error = None
+            start = time.perf_counter()
+            try:
+                with ThreadPoolExecutor(max_workers=len(self._builders)) as executor:
+                    futures = {
+                        tier: executor.submit(builder)
+                        for tier, builder in self._builders.items()
+                    }
+                    tools = {tier: future.result() for tier, future in futures.items()}
+            except Exception as exc:
+                self._error = f"{type(exc).__name__}: {exc}"
+                raise
+            finally:
+                self._building = False
+
+            self._build_seconds = time.perf_counter() - start
+            # Publish only once every tier is built so readers never see a partial registry
+            self._tools = tools
+            print(f"✅ Tier RAG tools built and cached in {self._build_seconds:.2f}s")
+
+        return self._tools
+
+    def get_tools(self) -> Dict[str, Any]:
+        """Return all tier tools keyed by tier name, building them on first use"""
+        return self._tools or self.build()
+
+    def get(self, tier: str):
+        """Return the RAG tool for a single tier"""
+        tools = self.get_tools()
+        if tier not in tools:
+            raise KeyError(f"Unknown tier '{tier}'. Available tiers: {sorted(tools)}")
+        return tools[tier]
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness details for health endpoints"""
+        return {
+            "ready": self.ready,
+            "building": self._building,
+            "tiers": sorted(self._tools) if self._tools else [],
+            "build_seconds": round(self._build_seconds, 3) if self._build_seconds is not None else None,
+            "error": self._error,
+        }
+
+
+# Global registry instance (singleton pattern)
+_tool_registry: Optional[ToolRegistry] = None
+_tool_registry_lock = threading.Lock()
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Get the process-wide tool registry"""
+    global _tool_registry
+    if _tool_registry is None:
+        with _tool_registry_lock:
+            if _tool_registry is None:
+                _tool_registry = ToolRegistry()
+    return _tool_registry
+
+
+def set_tool_registry(registry: ToolRegistry) -> None:
+    """Set the process-wide tool registry"""
+    global _tool_registry
+    _tool_registry = registry
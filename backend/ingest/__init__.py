@@ -0,0 +1,27 @@
+"""
+Log ingestion: reading tier log files for analysis.
+"""
+from .catalog import LogBundle, ScenarioCatalog
+from .reader import MappedLogReader, parse_log_timestamp, parse_time_bound, read_log_window
+from .rotation import discover_segments, iter_tier_lines, read_tier_window
+from .shards import discover_shards, iter_shard_lines, read_shards_window
+from .tail import LogTailer, TierTail
+from .upload import UploadIngest
+
+__all__ = [
+    "LogBundle",
+    "ScenarioCatalog",
+    "MappedLogReader",
+    "parse_log_timestamp",
+    "parse_time_bound",
+    "read_log_window",
+    "discover_segments",
+    "iter_tier_lines",
+    "read_tier_window",
+    "discover_shards",
+    "iter_shard_lines",
+    "read_shards_window",
+    "LogTailer",
+    "TierTail",
+    "UploadIngest",
+]
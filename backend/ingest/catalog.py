@@ -0,0 +1,266 @@
+"""
+Scenario catalog: indexed log bundles with a bounded, mtime-checked cache.
+
+Every directory under the logs root (`backend/data/logs/scenario1_web_issue`,
+...) is a scenario. `refresh` indexes them once (tiers present, file sizes,
+time ranges and the top warning/error signatures) so they can be listed
+without touching the logs again. `load` serves the parse-derived inputs of an analysis (per-tier samples,
+triage and statistics, trace correlation, latency sketches) from an LRU
+cache bounded by bytes. Bundles keep only those digests, never the whole
+tier logs, and are keyed by the parsed window bounds, so equivalent
+spellings of a window share one entry. A cached bundle is reused only
+while the scenario's files keep the same size and mtime, so edits on disk
+are picked up by every worker process without any coordination, and a hot
+scenario is not re-read or re-parsed between requests.
+
+Requests that do not name a scenario are mapped to one deterministically
+from a request key (alert or service ID), so every worker picks the same
+scenario for the same alert.
+"""
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.analysis.digest import LogDigest, digest_logs
+from backend.analysis.sketch import LatencySketches
+from backend.analysis.templates import LEVEL_PATTERN, SEVERITY_RANK, TemplateMiner
+
+from .reader import TimeBound, parse_log_timestamp, parse_time_bound
+from .rotation import discover_segments, iter_tier_lines
+from .shards import discover_shards, iter_shard_lines
+from .tail import TAIL_TIERS
+
+
+CATALOG_TIERS = TAIL_TIERS
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+INDEX_SIGNATURES = 5
+
+# (relative path, size, mtime_ns) of every file in a scenario directory
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+# loader(scenario_id, start, end, latency_sketches=...) -> {tier: log text}
+LogLoader = Callable[..., Dict[str, str]]
+
+
+def scenario_fingerprint(path: Path) -> Fingerprint:
+    """Cheap change detector for a scenario directory (stat calls only)"""
+    entries = []
+    for file in sorted(Path(path).rglob("*")):
+        if file.is_file():
+            stat = file.stat()
+            entries.append((file.relative_to(path).as_posix(), stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+@dataclass
+class TierInfo:
+    """Index entry for one tier of a scenario"""
+    tier: str
+    files: int
+    size_bytes: int
+    lines: int = 0
+    error_lines: int = 0
+    first_timestamp: Optional[str] = None
+    last_timestamp: Optional[str] = None
+    signatures: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ScenarioInfo:
+    """Index entry for one scenario directory"""
+    scenario_id: str
+    tiers: Dict[str, TierInfo]
+    fingerprint: Fingerprint = ()
+
+    def to_dict(self) -> Dict:
+        return {
+            "scenario_id": self.scenario_id,
+            "tiers": {tier: asdict(info) for tier, info in self.tiers.items()},
+            "size_bytes": sum(info.size_bytes for info in self.tiers.values()),
+        }
+
+
+@dataclass
+class LogBundle:
+    """Everything derived from parsing a scenario's (windowed) tier logs"""
+    scenario_id: str
+    fingerprint: Fingerprint
+    # Samples, triage and statistics per tier plus the trace correlation
+    digest: LogDigest
+    # Latencies of every line streamed by the loader, per (tier, service, AZ)
+    latency_sketches: Optional[LatencySketches] = None
+
+    @property
+    def samples(self) -> Dict[str, str]:
+        """Each tier's prompt sample, standing in for its whole log"""
+        return {tier: digest.prompt_sample for tier, digest in self.digest.tiers.items()}
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the bundle (text plus sketch buckets)"""
+        text = len(self.digest.trace_correlation) + len(self.digest.log_statistics)
+        for digest in self.digest.tiers.values():
+            text += len(digest.prompt_sample) + len(digest.retrieval_sample)
+            text += len(digest.statistics) + len(digest.healthy_result)
+        buckets = sum(len(sketch.buckets) for sketch in self.latency_sketches.sketches.values()) if self.latency_sketches else 0
+        return text + 64 * buckets
+
+
+def _tier_files(scenario_dir: Path, tier: str) -> Tuple[List[Path], Optional[str]]:
+    """A tier's files and, for per-host shard directories, their glob"""
+    if (scenario_dir / tier).is_dir():
+        pattern = str(scenario_dir / tier / "*.log*")
+        return discover_shards(pattern), pattern
+    return discover_segments(scenario_dir, tier), None
+
+
+def index_tier(scenario_dir: Path, tier: str) -> Optional[TierInfo]:
+    """Scan one tier once: line counts, time range and top error signatures"""
+    files, shard_glob = _tier_files(scenario_dir, tier)
+    if not files:
+        return None
+    info = TierInfo(tier=tier, files=len(files), size_bytes=sum(path.stat().st_size for path in files))
+    lines = iter_shard_lines(shard_glob) if shard_glob else iter_tier_lines(scenario_dir, tier)
+
+    miner = TemplateMiner()
+    first = last = None
+    for line in lines:
+        timestamp = parse_log_timestamp(line[:40])
+        if timestamp is None:
+            continue
+        info.lines += 1
+        first = first or timestamp
+        last = timestamp
+        level = LEVEL_PATTERN.search(line)
+        if level and level.group(1) in SEVERITY_RANK:
+            info.error_lines += 1
+            miner.add_line(line)
+
+    info.first_timestamp = first.isoformat() if first else None
+    info.last_timestamp = last.isoformat() if last else None
+    info.signatures = [
+        f"x{template.count} {template.text}"[:200]
+        for template in miner.ranked_templates()[:INDEX_SIGNATURES]
+    ]
+    return info
+
+
+class ScenarioCatalog:
+    """Index of scenario directories and a byte-bounded LRU cache of loaded bundles"""
+
+    def __init__(self, logs_dir: Path, loader: LogLoader, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.logs_dir = Path(logs_dir)
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self._index: Dict[str, ScenarioInfo] = {}
+        self._bundles: "OrderedDict[tuple, LogBundle]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+
+    def refresh(self) -> Dict[str, ScenarioInfo]:
+        """(Re)index scenario directories; unchanged scenarios are not rescanned"""
+        index = {}
+        scenario_dirs = sorted(path for path in self.logs_dir.iterdir() if path.is_dir()) if self.logs_dir.is_dir() else []
+        for scenario_dir in scenario_dirs:
+            fingerprint = scenario_fingerprint(scenario_dir)
+            known = self._index.get(scenario_dir.name)
+            if known is not None and known.fingerprint == fingerprint:
+                index[scenario_dir.name] = known
+                continue
+            tiers = {}
+            for tier in CATALOG_TIERS:
+                info = index_tier(scenario_dir, tier)
+                if info is not None:
+                    tiers[tier] = info
+            index[scenario_dir.name] = ScenarioInfo(scenario_dir.name, tiers, fingerprint)
+        with self._lock:
+            self._index = index
+        return index
+
+    def scenarios(self) -> List[ScenarioInfo]:
+        if not self._index:
+            self.refresh()
+        return [self._index[scenario_id] for scenario_id in sorted(self._index)]
+
+    def scenario_ids(self) -> List[str]:
+        return [info.scenario_id for info in self.scenarios()]
+
+    def get(self, scenario_id: str) -> ScenarioInfo:
+        if scenario_id not in self._index:
+            self.refresh()
+        if scenario_id not in self._index:
+            raise KeyError(f"Unknown scenario '{scenario_id}'. Available scenarios: {sorted(self._index)}")
+        return self._index[scenario_id]
+
+    def resolve(self, scenario_id: Optional[str] = None, key: Optional[str] = None) -> str:
+        """
+        The scenario to analyze: `scenario_id` if given (must exist), otherwise
+        one picked by a stable hash of `key`, identical in every worker process.
+        """
+        if scenario_id:
+            return self.get(scenario_id).scenario_id
+        scenario_ids = self.scenario_ids()
+        if not scenario_ids:
+            raise KeyError(f"No scenarios found in {self.logs_dir}")
+        digest = hashlib.sha256((key or "").encode("utf-8")).digest()
+        return scenario_ids[int.from_bytes(digest[:8], "big") % len(scenario_ids)]
+
+    def load(self, scenario_id: str, start: TimeBound = None, end: TimeBound = None) -> LogBundle:
+        """A scenario's (windowed) log digests, from cache while its files are unchanged"""
+        self.get(scenario_id)  # Only indexed scenario directories can be loaded
+        fingerprint = scenario_fingerprint(self.logs_dir / scenario_id)
+        start, end = parse_time_bound(start), parse_time_bound(end)
+        cache_key = (scenario_id, start, end)
+        with self._lock:
+            bundle = self._bundles.get(cache_key)
+            if bundle is not None and bundle.fingerprint == fingerprint:
+                self._bundles.move_to_end(cache_key)
+                self._counters["hits"] += 1
+                return bundle
+            if bundle is not None:
+                # Files changed on disk since this bundle was loaded
+                self._cached_bytes -= self._bundles.pop(cache_key).nbytes
+                self._counters["invalidations"] += 1
+            self._counters["misses"] += 1
+
+        # Load and parse outside the lock so other scenarios are not blocked;
+        # the loader sketches latencies while it streams the lines. The
+        # whole logs are dropped once digested.
+        latency_sketches = LatencySketches()
+        logs = self.loader(scenario_id, start, end, latency_sketches=latency_sketches)
+        bundle = LogBundle(
+            scenario_id=scenario_id,
+            fingerprint=fingerprint,
+            digest=digest_logs(logs, latency_sketches),
+            latency_sketches=latency_sketches,
+        )
+        del logs
+        with self._lock:
+            previous = self._bundles.pop(cache_key, None)
+            if previous is not None:
+                # Loaded concurrently by another request
+                self._cached_bytes -= previous.nbytes
+            self._bundles[cache_key] = bundle
+            self._cached_bytes += bundle.nbytes
+            # A bundle larger than the whole budget is served but not kept
+            while self._bundles and self._cached_bytes > self.max_bytes:
+                _, evicted = self._bundles.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+        return bundle
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "scenarios": len(self._index),
+                "cached_bundles": len(self._bundles),
+                "cached_bytes": self._cached_bytes,
+                "cache_max_bytes": self.max_bytes,
+                "hits": self._counters["hits"],
+                "misses": self._counters["misses"],
+                "invalidations": self._counters["invalidations"],
+                "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,161 @@
+"""
+Memory-mapped, time-windowed log reader.
+
+Tier logs can be hundreds of MB. Instead of reading a whole file into a
+Python string, the file is mapped read-only and a sparse timestamp -> byte
+offset index is built by sampling one line every `index_stride` bytes. A
+`[start, end)` window then seeks straight to the right region and yields
+lines lazily, so only the pages covering the window are touched.
+
+Assumes lines are (close to) time-ordered, as log files are. Lines without a
+timestamp (stack trace continuations) belong to the preceding entry.
+"""
+import bisect
+import mmap
+import os
+import re
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple, Union
+
+TimeBound = Optional[Union[str, datetime]]
+
+# Sample one line per this many bytes when building the offset index
+DEFAULT_INDEX_STRIDE = 64 * 1024
+
+_TIMESTAMP_BYTES = re.compile(rb"^(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)")
+# Text bounds may also be a bare date ("2024-01-15")
+_TIMESTAMP_TEXT = re.compile(r"^(\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)")
+
+
+def parse_log_timestamp(value: Union[str, bytes, datetime]) -> Optional[datetime]:
+    """Parse an ISO-8601 log timestamp into an aware UTC datetime"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, bytes):
+        match = _TIMESTAMP_BYTES.match(value)
+        if not match:
+            return None
+        value = match.group(1).decode("ascii")
+    else:
+        # Accept a bare timestamp or a whole log line starting with one
+        match = _TIMESTAMP_TEXT.match(value.strip())
+        if not match:
+            return None
+        value = match.group(1)
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_time_bound(value: TimeBound) -> Optional[datetime]:
+    """
+    Parse a requested window bound. None means unbounded; anything that is
+    not a full ISO-8601 timestamp or date raises ValueError rather than
+    silently widening the window to the whole log.
+    """
+    if value is None:
+        return None
+    parsed = None
+    if isinstance(value, datetime) or _TIMESTAMP_TEXT.fullmatch(value.strip()):
+        parsed = parse_log_timestamp(value)
+    if parsed is None:
+        raise ValueError(f"Invalid time bound {value!r}: expected ISO-8601, e.g. 2024-01-15T14:30:00Z")
+    return parsed
+
+
+class MappedLogReader:
+    """Read-only mmap view of a log file with a sparse time index"""
+
+    def __init__(self, path: Union[str, os.PathLike], index_stride: int = DEFAULT_INDEX_STRIDE):
+        self.path = str(path)
+        self.index_stride = index_stride
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._index: Optional[Tuple[List[datetime], List[int]]] = None
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "MappedLogReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _line_start_after(self, offset: int) -> int:
+        """Offset of the first line starting at or after `offset`"""
+        if offset == 0:
+            return 0
+        newline = self._map.find(b"\n", offset - 1)
+        return self.size if newline == -1 else newline + 1
+
+    def _build_index(self) -> Tuple[List[datetime], List[int]]:
+        times: List[datetime] = []
+        offsets: List[int] = []
+        for sample in range(0, self.size, self.index_stride):
+            line_start = self._line_start_after(sample)
+            # Skip forward past untimestamped continuation lines
+            while line_start < self.size:
+                timestamp = parse_log_timestamp(self._map[line_start:line_start + 40])
+                if timestamp is not None:
+                    if not offsets or line_start > offsets[-1]:
+                        times.append(timestamp)
+                        offsets.append(line_start)
+                    break
+                line_start = self._line_start_after(line_start + 1)
+        return times, offsets
+
+    @property
+    def index(self) -> Tuple[List[datetime], List[int]]:
+        """Sparse (timestamps, byte offsets) index, built on first use"""
+        if self._index is None:
+            self._index = self._build_index() if self._map is not None else ([], [])
+        return self._index
+
+    def _seek_offset(self, start: Optional[datetime]) -> int:
+        """Byte offset of the last indexed line strictly before `start`"""
+        if start is None:
+            return 0
+        times, offsets = self.index
+        position = bisect.bisect_left(times, start) - 1
+        return offsets[position] if position >= 0 else 0
+
+    def iter_lines(self, start: TimeBound = None, end: TimeBound = None) -> Iterator[str]:
+        """Lazily yield decoded lines whose timestamp falls in `[start, end)`"""
+        if self._map is None:
+            return
+        start_time = parse_time_bound(start)
+        end_time = parse_time_bound(end)
+
+        offset = self._seek_offset(start_time)
+        in_window = start_time is None
+        while offset < self.size:
+            newline = self._map.find(b"\n", offset)
+            line_end = self.size if newline == -1 else newline
+            raw = self._map[offset:line_end]
+            offset = line_end + 1
+
+            timestamp = parse_log_timestamp(raw[:40])
+            if timestamp is not None:
+                if end_time is not None and timestamp >= end_time:
+                    return
+                in_window = start_time is None or timestamp >= start_time
+            if in_window:
+                yield raw.decode("utf-8", errors="replace").rstrip("\r")
+
+    def read_window(self, start: TimeBound = None, end: TimeBound = None) -> str:
+        """The `[start, end)` window as one string"""
+        return "\n".join(self.iter_lines(start, end))
+
+
+def read_log_window(path: Union[str, os.PathLike], start: TimeBound = None, end: TimeBound = None) -> str:
+    """Read the `[start, end)` window of a log file without loading the rest"""
+    with MappedLogReader(path) as reader:
+        return reader.read_window(start, end)
@@ -0,0 +1,138 @@
+"""
+Rotated and compressed log segments.
+
+Production log directories keep rotations next to the live file:
+
+    web.log            live file
+    web.log.1          most recent rotation
+    web.log.2.gz       older, compressed (gzip, bzip2 or zstandard)
+    web.log-20240115.gz  date-suffixed rotation
+
+`iter_tier_lines` discovers a tier's segments, orders them by their first
+timestamp and streams their lines oldest first. Compressed segments are
+decompressed as chunked streams, so nothing is inflated into memory or onto
+disk. A `[start, end)` window skips whole segments outside it, seeks within
+the plain live file through the mmap reader and stops at `end`.
+"""
+import bz2
+import gzip
+import io
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+
+from .reader import MappedLogReader, TimeBound, parse_log_timestamp, parse_time_bound
+
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".zst")
+STREAM_BUFFER_BYTES = 1024 * 1024
+
+# web.log, web.log.1, web.log.2.gz, web.log-20240115, web.log-20240115.gz
+_SEGMENT_PATTERN = r"^{tier}\.log(?:[.-][0-9]+)?(?:\.gz|\.bz2|\.zst)?$"
+
+
+def discover_segments(logs_dir: Path, tier: str) -> List[Path]:
+    """All segments of a tier's log in a directory (unordered)"""
+    logs_dir = Path(logs_dir)
+    if not logs_dir.is_dir():
+        return []
+    pattern = re.compile(_SEGMENT_PATTERN.format(tier=re.escape(tier)))
+    return [path for path in logs_dir.iterdir() if path.is_file() and pattern.match(path.name)]
+
+
+def open_segment(path: Path) -> IO[str]:
+    """Open a segment as a text stream, decompressing on the fly"""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(f"Reading {path.name} requires the 'zstandard' package (pip install zstandard)") from e
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_size=STREAM_BUFFER_BYTES, closefd=True)
+        return io.TextIOWrapper(io.BufferedReader(reader, STREAM_BUFFER_BYTES), encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace", buffering=STREAM_BUFFER_BYTES)
+
+
+def first_timestamp(path: Path) -> Optional[datetime]:
+    """Timestamp of a segment's first timestamped line (reads only its head)"""
+    try:
+        with open_segment(path) as stream:
+            for _, line in zip(range(1000), stream):
+                timestamp = parse_log_timestamp(line[:40])
+                if timestamp is not None:
+                    return timestamp
+    except Exception as e:
+        # Missing codec, truncated or corrupt archive: report and skip the segment
+        print(f"Warning: skipping unreadable log segment {path}: {e}")
+    return None
+
+
+def _rotation_age(path: Path) -> Tuple[int, int]:
+    """Ordering without timestamps, oldest first: dated, then numbered (.2 before .1), then live"""
+    name = path.name
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    match = re.search(r"[.-]([0-9]+)$", name)
+    if not match:
+        return (2, 0)
+    digits = match.group(1)
+    return (0, int(digits)) if len(digits) >= 8 else (1, -int(digits))
+
+
+def ordered_segments(logs_dir: Path, tier: str) -> List[Tuple[Path, Optional[datetime]]]:
+    """A tier's readable segments oldest first, with their first timestamps"""
+    segments = [(path, first_timestamp(path)) for path in discover_segments(logs_dir, tier)]
+    # Unreadable compressed segments were reported by first_timestamp
+    segments = [(path, ts) for path, ts in segments if ts is not None or path.suffix not in COMPRESSED_SUFFIXES]
+    return sorted(
+        segments,
+        key=lambda item: (item[1] is None, item[1].timestamp() if item[1] else 0.0, _rotation_age(item[0])),
+    )
+
+
+def stream_segment_window(path: Path, start: Optional[datetime], end: Optional[datetime]) -> Iterator[str]:
+    """Stream a (compressed) segment's lines within [start, end)"""
+    in_window = start is None
+    with open_segment(path) as stream:
+        for line in stream:
+            line = line.rstrip("\n").rstrip("\r")
+            timestamp = parse_log_timestamp(line[:40])
+            if timestamp is not None:
+                if end is not None and timestamp >= end:
+                    return
+                in_window = start is None or timestamp >= start
+            if in_window:
+                yield line
+
+
+def iter_tier_lines(logs_dir: Path, tier: str, start: TimeBound = None, end: TimeBound = None) -> Iterator[str]:
+    """Lines of every segment of a tier, oldest first, within [start, end)"""
+    start_time = parse_time_bound(start)
+    end_time = parse_time_bound(end)
+    segments = ordered_segments(logs_dir, tier)
+
+    for position, (path, segment_start) in enumerate(segments):
+        # A segment ends where the next one starts
+        next_start = segments[position + 1][1] if position + 1 < len(segments) else None
+        if end_time is not None and segment_start is not None and segment_start >= end_time:
+            break
+        if start_time is not None and next_start is not None and next_start <= start_time:
+            continue
+
+        if path.suffix in COMPRESSED_SUFFIXES:
+            yield from stream_segment_window(path, start_time, end_time)
+        else:
+            with MappedLogReader(path) as reader:
+                yield from reader.iter_lines(start_time, end_time)
+
+
+def read_tier_window(logs_dir: Path, tier: str, start: TimeBound = None, end: TimeBound = None) -> str:
+    """A tier's [start, end) window across all its segments as one string"""
+    return "\n".join(iter_tier_lines(logs_dir, tier, start, end))
@@ -0,0 +1,198 @@
+"""
+Per-host log shards merged into one time-ordered tier stream.
+
+In production a tier is many hosts, each writing its own file
+(`web/i-0123456789abcdef0.log`, ...). `iter_shard_lines` takes a glob of
+shard files and performs a heap-based k-way merge by timestamp:
+
+- every shard is read by its own worker in a thread pool (at most
+  `max_workers` reading at once), so file reads and decompression overlap
+  across shards;
+- each worker hands entries over in small batches through a bounded queue,
+  so at most `PREFETCH_BATCHES * BATCH_ENTRIES` entries per shard are in
+  memory however large the shard is;
+- `heapq.merge` keeps one head entry per shard and emits the globally
+  earliest next.
+
+Continuation lines (stack traces) stay attached to the entry they follow.
+Shards may be plain (read through the mmap reader) or compressed. When
+latency sketches are requested, every worker sketches its own shard and the
+per-shard sketches are merged once the stream is exhausted.
+"""
+import glob as globlib
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from backend.analysis.sketch import LatencySketches
+
+from .reader import MappedLogReader, TimeBound, parse_log_timestamp, parse_time_bound
+from .rotation import COMPRESSED_SUFFIXES, stream_segment_window
+
+
+BATCH_ENTRIES = 1000
+PREFETCH_BATCHES = 4
+MAX_SHARD_WORKERS = 32
+
+_DONE = object()
+
+
+def discover_shards(pattern: str) -> List[Path]:
+    """Shard files matching a glob pattern"""
+    return sorted(Path(path) for path in globlib.glob(pattern) if Path(path).is_file())
+
+
+def _shard_lines(path: Path, start, end) -> Iterator[str]:
+    if path.suffix in COMPRESSED_SUFFIXES:
+        return stream_segment_window(path, start, end)
+    reader = MappedLogReader(path)
+
+    def lines():
+        with reader:
+            yield from reader.iter_lines(start, end)
+
+    return lines()
+
+
+def _shard_entries(path: Path, start, end) -> Iterator[Tuple[float, str]]:
+    """(timestamp, entry text) pairs; untimestamped lines join the previous entry"""
+    current_time: Optional[float] = None
+    current: List[str] = []
+    for line in _shard_lines(path, start, end):
+        timestamp = parse_log_timestamp(line[:40])
+        if timestamp is None and current:
+            current.append(line)
+            continue
+        if current:
+            yield current_time, "\n".join(current)
+        current_time = timestamp.timestamp() if timestamp else float("-inf")
+        current = [line]
+    if current:
+        yield current_time, "\n".join(current)
+
+
+class _ShardPrefetcher:
+    """Reads one shard on a worker thread into a bounded queue of batches"""
+
+    def __init__(
+        self,
+        path: Path,
+        start,
+        end,
+        cancelled: threading.Event,
+        read_slots: threading.Semaphore,
+        tier: str = "",
+        latency_sketches: Optional[LatencySketches] = None,
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.cancelled = cancelled
+        self.read_slots = read_slots
+        self.tier = tier
+        self.latency_sketches = latency_sketches
+        self.batches: queue.Queue = queue.Queue(maxsize=PREFETCH_BATCHES)
+
+    def _put(self, item) -> bool:
+        # Blocks while the queue is full (bounded memory) but wakes up to honour cancellation
+        while not self.cancelled.is_set():
+            try:
+                self.batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_batch(self, entries: Iterator[Tuple[float, str]]) -> List[Tuple[float, str]]:
+        # Only `max_workers` shards read at once; waiting on a full queue holds no slot
+        with self.read_slots:
+            batch = []
+            for entry in entries:
+                batch.append(entry)
+                if len(batch) >= BATCH_ENTRIES:
+                    break
+            if batch and self.latency_sketches is not None:
+                self.latency_sketches.add_text(self.tier, "\n".join(text for _, text in batch))
+            return batch
+
+    def run(self) -> None:
+        try:
+            entries = _shard_entries(self.path, self.start, self.end)
+            while True:
+                batch = self._next_batch(entries)
+                if not batch:
+                    break
+                if not self._put(batch):
+                    return
+        except Exception as e:
+            self._put(e)
+        self._put(_DONE)
+
+    def __iter__(self) -> Iterator[Tuple[float, str]]:
+        while True:
+            item = self.batches.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise RuntimeError(f"Failed reading log shard {self.path}: {item}") from item
+            yield from item
+
+
+def iter_shard_lines(
+    pattern: str,
+    start: TimeBound = None,
+    end: TimeBound = None,
+    max_workers: int = MAX_SHARD_WORKERS,
+    tier: str = "",
+    latency_sketches: Optional[LatencySketches] = None,
+) -> Iterator[str]:
+    """
+    Merge every shard matching `pattern` into one time-ordered stream of entries.
+
+    If `latency_sketches` is given, the shards' latencies are added to it
+    (per tier/service/AZ) when the stream has been fully consumed.
+    """
+    shards = discover_shards(pattern)
+    if not shards:
+        return
+    start_time = parse_time_bound(start)
+    end_time = parse_time_bound(end)
+
+    cancelled = threading.Event()
+    read_slots = threading.Semaphore(max_workers)
+    prefetchers = [
+        _ShardPrefetcher(
+            path, start_time, end_time, cancelled, read_slots, tier,
+            LatencySketches(latency_sketches.relative_accuracy) if latency_sketches is not None else None,
+        )
+        for path in shards
+    ]
+    # One worker per shard because the merge waits on every shard's head entry;
+    # the semaphore bounds how many of them actually read at the same time
+    executor = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="log-shard")
+    try:
+        for prefetcher in prefetchers:
+            executor.submit(prefetcher.run)
+        for _, entry in heapq.merge(*prefetchers, key=lambda item: item[0]):
+            yield entry
+        if latency_sketches is not None:
+            for prefetcher in prefetchers:
+                latency_sketches.merge(prefetcher.latency_sketches)
+    finally:
+        # Stop workers still blocked on a full queue if the consumer bailed out early
+        cancelled.set()
+        executor.shutdown(wait=True)
+
+
+def read_shards_window(
+    pattern: str,
+    start: TimeBound = None,
+    end: TimeBound = None,
+    tier: str = "",
+    latency_sketches: Optional[LatencySketches] = None,
+) -> str:
+    """All shards matching `pattern`, merged by time, within [start, end), as one string"""
+    return "\n".join(iter_shard_lines(pattern, start, end, tier=tier, latency_sketches=latency_sketches))
@@ -0,0 +1,191 @@
+"""
+Live tail mode: follow growing tier log files and track incremental state.
+
+Each tier file is polled from its last byte offset, so every poll costs
+work proportional to the new lines only. Per tier the tailer keeps:
+
+- template counts (the Drain-style miner from backend.analysis.templates),
+- error/warning signature counts,
+- mergeable latency sketches per (service, AZ), so percentiles over
+  everything ingested cost constant memory,
+- a bounded window of recent lines that is handed to the tier tool when
+  the tier is re-analyzed.
+
+After an analysis, `mark_analyzed` snapshots the signatures; later polls
+report a tier as changed only when its signature set has materially moved
+(new signature, error surge, latency shift), so unchanged tiers keep their
+cached results.
+"""
+import os
+from collections import Counter, deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from backend.analysis.sketch import LatencySketches
+from backend.analysis.templates import SEVERITY_RANK, TemplateMiner
+
+
+TAIL_TIERS = ["web", "app", "db", "cache"]
+
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_RECENT_LINES = 5000
+READ_CHUNK_BYTES = 1024 * 1024
+
+# An existing signature only counts as a material change once it has grown
+# by this many occurrences and by this fraction since the last analysis
+MIN_NEW_ERRORS = 10
+MATERIAL_GROWTH = 0.5
+# Relative move of the p95 latency that counts as material
+MATERIAL_LATENCY_SHIFT = 0.5
+
+
+class TierTail:
+    """Incremental state for one followed tier log file"""
+
+    def __init__(self, tier: str, path: Path, recent_lines: int = DEFAULT_RECENT_LINES):
+        self.tier = tier
+        self.path = Path(path)
+        self.offset = 0
+        self.inode: Optional[int] = None
+        self._partial = b""
+        self.miner = TemplateMiner()
+        self.signatures: Counter = Counter()
+        self.signature_text: Dict[int, str] = {}
+        self.latency_sketches = LatencySketches()
+        self.recent = deque(maxlen=recent_lines)
+        self.lines_read = 0
+        self._snapshot: Optional[Counter] = None
+        self._snapshot_p95: Optional[float] = None
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self._partial = b""
+
+    def poll(self) -> int:
+        """Read whatever was appended since the last poll; returns new line count"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+        # Truncated or replaced (rotated) file: start again from the beginning
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            if self.inode is not None:
+                print(f"{self.tier}.log was rotated or truncated; following the new file")
+            self.inode = stat.st_ino
+            self._reset()
+        if stat.st_size == self.offset:
+            return 0
+
+        new_lines = 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                data = self._partial + chunk
+                lines = data.split(b"\n")
+                # The last element is an incomplete line until its newline arrives
+                self._partial = lines.pop()
+                decoded = [line.decode("utf-8", errors="replace") for line in lines]
+                new_lines += self._ingest(decoded)
+                self.latency_sketches.add_text(self.tier, "\n".join(decoded))
+        return new_lines
+
+    def _ingest(self, lines: Iterable[str]) -> int:
+        added = 0
+        for line in lines:
+            template = self.miner.add_line(line)
+            if template is None:
+                continue
+            added += 1
+            self.recent.append(line.rstrip("\r"))
+            if template.level in SEVERITY_RANK:
+                self.signatures[template.first_seen] += 1
+                self.signature_text[template.first_seen] = template.text
+        self.lines_read += added
+        return added
+
+    def recent_text(self) -> str:
+        return "\n".join(self.recent)
+
+    def p95_latency(self) -> Optional[float]:
+        return self.latency_sketches.merged().quantile(0.95)
+
+    def mark_analyzed(self) -> None:
+        """Snapshot signatures and latency at analysis time"""
+        self._snapshot = Counter(self.signatures)
+        self._snapshot_p95 = self.p95_latency()
+
+    def change_reasons(self) -> List[str]:
+        """Why this tier needs re-analysis since the last snapshot (empty: it does not)"""
+        if not self.lines_read:
+            return []
+        if self._snapshot is None:
+            return ["not analyzed yet"]
+
+        reasons = []
+        for signature, count in self.signatures.items():
+            before = self._snapshot.get(signature, 0)
+            if before == 0:
+                reasons.append(f"new signature {self.signature_text[signature][:100]}")
+            elif count - before >= MIN_NEW_ERRORS and count - before >= MATERIAL_GROWTH * before:
+                reasons.append(f"surge x{count - before} {self.signature_text[signature][:100]}")
+
+        p95 = self.p95_latency()
+        if p95 is not None and self._snapshot_p95:
+            shift = abs(p95 - self._snapshot_p95) / self._snapshot_p95
+            if shift >= MATERIAL_LATENCY_SHIFT:
+                reasons.append(f"p95 latency {self._snapshot_p95:.0f}ms -> {p95:.0f}ms")
+        return reasons
+
+
+class LogTailer:
+    """Follows every tier log in a directory"""
+
+    def __init__(
+        self,
+        logs_dir: Path,
+        tiers: Optional[List[str]] = None,
+        recent_lines: int = DEFAULT_RECENT_LINES,
+        from_end: bool = False,
+    ):
+        self.logs_dir = Path(logs_dir)
+        self.tails = {
+            tier: TierTail(tier, self.logs_dir / f"{tier}.log", recent_lines)
+            for tier in (tiers or TAIL_TIERS)
+        }
+        if from_end:
+            # Only follow lines written from now on
+            for tail in self.tails.values():
+                if tail.path.exists():
+                    stat = os.stat(tail.path)
+                    tail.inode, tail.offset = stat.st_ino, stat.st_size
+
+    def poll(self) -> Dict[str, int]:
+        """New line counts per tier since the previous poll"""
+        return {tier: tail.poll() for tier, tail in self.tails.items()}
+
+    def changed_tiers(self) -> Dict[str, List[str]]:
+        """Tiers that need re-analysis, with the reasons"""
+        changed = {}
+        for tier, tail in self.tails.items():
+            reasons = tail.change_reasons()
+            if reasons:
+                changed[tier] = reasons
+        return changed
+
+    def recent_logs(self) -> Dict[str, str]:
+        return {tier: tail.recent_text() for tier, tail in self.tails.items()}
+
+    def latency_sketches(self) -> LatencySketches:
+        """Latency sketches of every tier since tailing started, merged"""
+        merged = LatencySketches()
+        for tail in self.tails.values():
+            merged.merge(tail.latency_sketches)
+        return merged
+
+    def mark_analyzed(self, tiers: Iterable[str]) -> None:
+        for tier in tiers:
+            self.tails[tier].mark_analyzed()
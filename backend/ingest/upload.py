@@ -0,0 +1,391 @@
+"""
+Incremental ingest of uploaded tier logs.
+
+`/api/analyze/upload` receives incident bundles that may be far larger than
+what is worth keeping in memory. The request body is consumed chunk by
+chunk: a streaming multipart parser (or, for a plain body, "=== WEB TIER
+LOGS ===" section headers) routes bytes to one `TierSampler` per tier, which
+splits them into lines and keeps only a bounded representative sample:
+
+- the first few lines of every warning/error signature (Drain templates),
+- a uniform reservoir sample of everything else,
+- DDSketch latency sketches over every line.
+
+Memory per tier is therefore constant however large the upload is, and the
+samples are ready for analysis as soon as the body ends. A tier is complete
+as soon as its part (or section) ends, so its deterministic pre-check runs
+while later tiers are still arriving. Gzip-compressed parts (`web.log.gz`)
+are inflated on the fly in bounded chunks, and a part that inflates past
+MAX_INFLATED_PART_BYTES is rejected. A plain body must name its tier (the
+caller's default tier or a section header before its first log line);
+otherwise it is rejected rather than silently dropped.
+"""
+import random
+import re
+import zlib
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Tuple
+
+from backend.analysis.sketch import LatencySketches
+from backend.analysis.templates import SEVERITY_RANK, TemplateMiner
+from backend.analysis.triage import classify_log_health
+
+from .tail import TAIL_TIERS
+
+
+UPLOAD_TIERS = TAIL_TIERS
+DEFAULT_RESERVOIR_LINES = 5000
+EXAMPLES_PER_SIGNATURE = 5
+MAX_SIGNATURES = 500
+# Longer lines are truncated; a line without newlines cannot grow the buffer forever
+MAX_LINE_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+# Gzip parts are inflated at most this much at a time...
+INFLATE_CHUNK_BYTES = 1024 * 1024
+# ...and rejected past this much in total (a decompression bomb)
+MAX_INFLATED_PART_BYTES = 4 * 1024 ** 3
+
+_SECTION_PATTERN = re.compile(r"^===\s*(\w+)\s+TIER LOGS\s*===\s*$", re.IGNORECASE)
+_DISPOSITION_PARAM = re.compile(r';\s*([\w-]+)\s*=\s*"?([^";]*)"?')
+
+
+def tier_for_name(name: Optional[str]) -> Optional[str]:
+    """Tier of an upload part or file name: "web", "web.log", "web_log", "web-01.log.gz" -> "web" """
+    if not name:
+        return None
+    name = PurePosixPath(name).name.lower()
+    for tier in UPLOAD_TIERS:
+        if name == tier or re.match(rf"^{tier}[._-]", name):
+            return tier
+    return None
+
+
+class LineSplitter:
+    """Turns arbitrary byte chunks into complete decoded lines"""
+
+    def __init__(self, max_line_bytes: int = MAX_LINE_BYTES):
+        self.max_line_bytes = max_line_bytes
+        self._partial = b""
+
+    def feed(self, data: bytes) -> List[str]:
+        lines = (self._partial + data).split(b"\n")
+        # The last element is incomplete until its newline arrives
+        self._partial = lines.pop()
+        if len(self._partial) > self.max_line_bytes:
+            lines.append(self._partial[: self.max_line_bytes])
+            self._partial = b""
+        return [line[: self.max_line_bytes].decode("utf-8", errors="replace").rstrip("\r") for line in lines]
+
+    def flush(self) -> List[str]:
+        rest, self._partial = self._partial, b""
+        return [rest.decode("utf-8", errors="replace").rstrip("\r")] if rest else []
+
+
+class TierSampler:
+    """Bounded, incrementally built sample of one tier's log"""
+
+    def __init__(
+        self,
+        tier: str,
+        reservoir_lines: int = DEFAULT_RESERVOIR_LINES,
+        examples_per_signature: int = EXAMPLES_PER_SIGNATURE,
+        latency_sketches: Optional[LatencySketches] = None,
+        seed: int = 0,
+    ):
+        self.tier = tier
+        self.reservoir_lines = reservoir_lines
+        self.examples_per_signature = examples_per_signature
+        self.latency_sketches = latency_sketches if latency_sketches is not None else LatencySketches()
+        self.miner = TemplateMiner()
+        self.examples: Dict[int, List[Tuple[int, str]]] = {}
+        self.reservoir: List[Tuple[int, str]] = []
+        self.lines = 0
+        self.error_lines = 0
+        self._reservoir_seen = 0
+        self._rng = random.Random(seed)
+
+    def add_lines(self, lines: List[str]) -> None:
+        for line in lines:
+            template = self.miner.add_line(line)
+            if template is None:
+                continue
+            position = self.lines
+            self.lines += 1
+            if template.level in SEVERITY_RANK:
+                self.error_lines += 1
+                examples = self.examples.get(template.first_seen)
+                if examples is None and len(self.examples) < MAX_SIGNATURES:
+                    examples = self.examples[template.first_seen] = []
+                if examples is not None and len(examples) < self.examples_per_signature:
+                    examples.append((position, line))
+                    continue
+            # Algorithm R: every remaining line is kept with equal probability
+            self._reservoir_seen += 1
+            if len(self.reservoir) < self.reservoir_lines:
+                self.reservoir.append((position, line))
+            else:
+                slot = self._rng.randrange(self._reservoir_seen)
+                if slot < self.reservoir_lines:
+                    self.reservoir[slot] = (position, line)
+        self.latency_sketches.add_text(self.tier, "\n".join(lines))
+
+    def text(self) -> str:
+        """The sample in original line order"""
+        kept = [entry for examples in self.examples.values() for entry in examples] + self.reservoir
+        return "\n".join(line for _, line in sorted(kept))
+
+    def describe(self) -> str:
+        kept = sum(len(examples) for examples in self.examples.values()) + len(self.reservoir)
+        return (
+            f"{self.tier}: {self.lines} lines, {self.error_lines} warnings/errors "
+            f"in {len(self.examples)} signatures, {kept} lines kept"
+        )
+
+    def triage(self) -> str:
+        """Deterministic pre-check of the sample (no LLM), for early feedback"""
+        result = classify_log_health(self.text())
+        if result.healthy:
+            verdict = "looks healthy"
+        elif result.reasons:
+            verdict = f"needs analysis ({result.reason_count} findings, e.g. {result.reasons[0]})"
+        else:
+            verdict = "needs analysis"
+        return f"{self.tier} tier received - {self.describe()} - pre-check: {verdict}"
+
+
+class MultipartStreamParser:
+    """
+    Incremental multipart/form-data parser.
+
+    `feed` accepts body chunks of any size and returns events:
+    ("part", headers), ("data", bytes), ("end", None). Only a delimiter's
+    length of bytes is ever held back between chunks.
+    """
+
+    def __init__(self, boundary: str):
+        self._delimiter = b"--" + boundary.encode("latin-1")
+        self._part_delimiter = b"\r\n" + self._delimiter
+        self._buffer = b""
+        self._state = "preamble"
+
+    @staticmethod
+    def _parse_headers(raw: bytes) -> Dict[str, str]:
+        headers = {}
+        for line in raw.decode("utf-8", errors="replace").split("\r\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        return headers
+
+    def feed(self, data: bytes) -> List[Tuple[str, object]]:
+        self._buffer += data
+        events: List[Tuple[str, object]] = []
+        while True:
+            if self._state == "preamble":
+                index = self._buffer.find(self._delimiter)
+                if index < 0:
+                    self._buffer = self._buffer[-len(self._delimiter):]
+                    break
+                self._buffer = self._buffer[index + len(self._delimiter):]
+                self._state = "boundary"
+            elif self._state == "boundary":
+                if len(self._buffer) < 2:
+                    break
+                if self._buffer.startswith(b"--"):
+                    self._state, self._buffer = "done", b""
+                    break
+                if not self._buffer.startswith(b"\r\n"):
+                    raise ValueError("Malformed multipart body: bad boundary line")
+                self._buffer = self._buffer[2:]
+                self._state = "headers"
+            elif self._state == "headers":
+                index = self._buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(self._buffer) > MAX_HEADER_BYTES:
+                        raise ValueError("Malformed multipart body: part headers too large")
+                    break
+                events.append(("part", self._parse_headers(self._buffer[:index])))
+                self._buffer = self._buffer[index + 4:]
+                self._state = "data"
+            elif self._state == "data":
+                index = self._buffer.find(self._part_delimiter)
+                if index < 0:
+                    # Keep just enough to recognise a delimiter split across chunks
+                    keep = len(self._part_delimiter) - 1
+                    if len(self._buffer) > keep:
+                        events.append(("data", self._buffer[:-keep]))
+                        self._buffer = self._buffer[-keep:]
+                    break
+                if index:
+                    events.append(("data", self._buffer[:index]))
+                events.append(("end", None))
+                self._buffer = self._buffer[index + len(self._part_delimiter):]
+                self._state = "boundary"
+            else:
+                self._buffer = b""
+                break
+        return events
+
+
+def multipart_boundary(content_type: str) -> Optional[str]:
+    """Boundary of a multipart/form-data content type, None for other types"""
+    if not content_type.lower().startswith("multipart/"):
+        return None
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    return match.group(1) if match else None
+
+
+class UploadIngest:
+    """
+    Routes an upload body to per-tier samplers as it arrives.
+
+    Multipart bodies carry one part per tier (field or file name "web",
+    "web.log", "app.log.gz", ...) plus an optional "query" text field. Other
+    bodies are plain text: either for `default_tier`, or split by
+    "=== WEB TIER LOGS ===" style section headers.
+    """
+
+    def __init__(self, content_type: str = "", default_tier: Optional[str] = None,
+                 reservoir_lines: int = DEFAULT_RESERVOIR_LINES):
+        self.reservoir_lines = reservoir_lines
+        self.latency_sketches = LatencySketches()
+        self.samplers: Dict[str, TierSampler] = {}
+        self.fields: Dict[str, str] = {}
+        self.skipped_parts: List[str] = []
+        self.bytes_received = 0
+        self.completed_tiers: List[str] = []
+        self._completed_pending: List[str] = []
+        boundary = multipart_boundary(content_type)
+        if content_type.lower().startswith("multipart/") and not boundary:
+            raise ValueError("multipart upload without a boundary")
+        self._multipart = MultipartStreamParser(boundary) if boundary else None
+        self._tier = default_tier
+        self._field: Optional[str] = None
+        self._field_value = b""
+        self._inflater = None
+        self._inflated_bytes = 0
+        self._splitter = LineSplitter()
+
+    def sampler(self, tier: str) -> TierSampler:
+        if tier not in self.samplers:
+            self.samplers[tier] = TierSampler(tier, self.reservoir_lines, latency_sketches=self.latency_sketches)
+        return self.samplers[tier]
+
+    def _route_lines(self, lines: List[str]) -> None:
+        if self._multipart is not None:
+            if self._tier:
+                self.sampler(self._tier).add_lines(lines)
+            return
+        # Plain body: section headers switch the current tier
+        batch: List[str] = []
+        for line in lines:
+            section = _SECTION_PATTERN.match(line)
+            if section and tier_for_name(section.group(1)):
+                if batch and self._tier:
+                    self.sampler(self._tier).add_lines(batch)
+                self._complete(self._tier)
+                batch, self._tier = [], tier_for_name(section.group(1))
+            elif self._tier is None and line.strip():
+                raise ValueError(
+                    "Plain upload body without a tier: pass ?tier=web or start it with a "
+                    "'=== WEB TIER LOGS ===' section header"
+                )
+            else:
+                batch.append(line)
+        if batch and self._tier:
+            self.sampler(self._tier).add_lines(batch)
+
+    def _part_data(self, data: bytes) -> None:
+        if self._field is not None:
+            if len(self._field_value) < MAX_FIELD_BYTES:
+                self._field_value += data[: MAX_FIELD_BYTES - len(self._field_value)]
+            return
+        if self._tier is None:
+            return
+        if self._inflater is not None:
+            self._inflate(data)
+            return
+        self._route_lines(self._splitter.feed(data))
+
+    def _inflate(self, data: bytes) -> None:
+        """Inflate a gzip part's bytes at most INFLATE_CHUNK_BYTES at a time"""
+        while True:
+            inflated = self._inflater.decompress(data, INFLATE_CHUNK_BYTES)
+            self._inflated_bytes += len(inflated)
+            if self._inflated_bytes > MAX_INFLATED_PART_BYTES:
+                raise ValueError(f"Compressed upload part inflates to more than {MAX_INFLATED_PART_BYTES} bytes")
+            self._route_lines(self._splitter.feed(inflated))
+            data = self._inflater.unconsumed_tail
+            # A full chunk may leave output pending inside the inflater
+            if not data and len(inflated) < INFLATE_CHUNK_BYTES:
+                return
+
+    def _start_part(self, headers: Dict[str, str]) -> None:
+        params = {key.lower(): value for key, value in _DISPOSITION_PARAM.findall(headers.get("content-disposition", ""))}
+        name, filename = params.get("name"), params.get("filename")
+        tier = tier_for_name(filename) or tier_for_name(name)
+        self._field = None
+        self._tier = tier
+        self._inflater = None
+        self._inflated_bytes = 0
+        if tier is None:
+            if filename is None and name:
+                # Plain form field such as "query"
+                self._field, self._field_value = name, b""
+            else:
+                self.skipped_parts.append(filename or name or "unnamed part")
+            return
+        if (filename or "").endswith(".gz") or "gzip" in headers.get("content-type", ""):
+            self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def _end_part(self) -> None:
+        if self._field is not None:
+            self.fields[self._field] = self._field_value.decode("utf-8", errors="replace")
+            self._field = None
+            return
+        if self._inflater is not None:
+            self._inflate(b"")
+            self._route_lines(self._splitter.feed(self._inflater.flush()))
+        self._route_lines(self._splitter.flush())
+        self._complete(self._tier)
+        self._tier, self._inflater = None, None
+
+    def _complete(self, tier: Optional[str]) -> None:
+        if tier in self.samplers and tier not in self.completed_tiers:
+            self.completed_tiers.append(tier)
+            self._completed_pending.append(tier)
+
+    def pop_completed(self) -> List[str]:
+        """Tiers whose part or section ended since the last call"""
+        completed, self._completed_pending = self._completed_pending, []
+        return completed
+
+    def feed(self, data: bytes) -> None:
+        """Consume the next chunk of the request body"""
+        self.bytes_received += len(data)
+        if self._multipart is None:
+            self._route_lines(self._splitter.feed(data))
+            return
+        for event, payload in self._multipart.feed(data):
+            if event == "part":
+                self._start_part(payload)
+            elif event == "data":
+                self._part_data(payload)
+            else:
+                self._end_part()
+
+    def finish(self) -> None:
+        """The body has ended; flush any trailing partial line"""
+        if self._multipart is None:
+            self._route_lines(self._splitter.flush())
+            self._complete(self._tier)
+
+    def logs(self) -> Dict[str, str]:
+        """Sampled log text per tier, every tier present (empty if not uploaded)"""
+        return {tier: self.samplers[tier].text() if tier in self.samplers else "" for tier in UPLOAD_TIERS}
+
+    def describe(self) -> str:
+        if not self.samplers:
+            return "No tier logs received"
+        return "; ".join(self.samplers[tier].describe() for tier in UPLOAD_TIERS if tier in self.samplers)
@@ -1,11 +1,13 @@
 """
 SREnity FastAPI Backend - Streaming Analysis API
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import AsyncIterator, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
 import json
 import re
 import sys
@@ -26,24 +28,11 @@ sys.path.insert(0, str(backend_dir))
 notebooks_dir = backend_dir / "notebooks"
 sys.path.insert(0, str(notebooks_dir))
 
-from run import analyze_scenario_stream
-
-# Scenario rotation counter
-_scenario_counter = 0
-SCENARIOS = [
-    "scenario1_web_issue",
-    "scenario2_app_issue",
-    "scenario3_db_issue",
-    "scenario4_cache_issue"
-]
-
-def get_next_scenario():
-    """Get next scenario in rotation (1-4)"""
-    global _scenario_counter
-    scenario = SCENARIOS[_scenario_counter % len(SCENARIOS)]
-    _scenario_counter += 1
-    return scenario
-
+from run import analyze_logs_stream, analyze_scenario_stream, get_compiled_graph, get_scenario_catalog
+from backend.analysis.tools import get_tool_registry
+from backend.ingest.reader import parse_time_bound
+from backend.ingest.upload import MAX_LINE_BYTES, UploadIngest, multipart_boundary, tier_for_name
+from src.utils.embedding_cache import get_embedding_store
 
 TARGET_SECTION_TITLES = {
     "root cause analysis": "Root Cause Analysis",
@@ -190,7 +179,106 @@ def _extract_tier_analysis(summary: str):
 
     return results
 
-app = FastAPI(title="SREnity API", version="1.0.0")
+# Upload bodies are handed to the samplers in batches of this size, and a
+# progress event is sent every UPLOAD_PROGRESS_BYTES
+UPLOAD_BATCH_BYTES = 1024 * 1024
+UPLOAD_PROGRESS_BYTES = 16 * 1024 * 1024
+
+
+async def _read_first_line(body: AsyncIterator[bytes]) -> Tuple[bytes, bool]:
+    """
+    Read a body up to its first non-blank complete line (or MAX_LINE_BYTES).
+    Returns the bytes read and whether the body ended; the caller keeps
+    reading the rest from the same iterator.
+    """
+    prefix = b""
+    while len(prefix) < MAX_LINE_BYTES and not any(line.strip() for line in prefix.split(b"\n")[:-1]):
+        try:
+            prefix += await body.__anext__()
+        except StopAsyncIteration:
+            return prefix, True
+    return prefix, False
+
+
+def _sse_event(update) -> str:
+    """Format one analysis update (status string or result dict) as an SSE event"""
+    # Yield status strings as-is
+    if isinstance(update, str):
+        return f"data: {json.dumps({'type': 'status', 'message': update})}\n\n"
+
+    # Pass through RCA results directly from run.py with complete output
+    if update.get('type') == 'rca_complete':
+        rca_data = update.get('rca')
+        if rca_data:
+            full_summary = (
+                rca_data.get('full_summary')
+                or rca_data.get('summary', '')
+                or rca_data.get('root_cause', '')
+            )
+            filtered_summary, structured_sections = _extract_summary_sections(full_summary)
+            if filtered_summary:
+                rca_data['summary'] = filtered_summary
+                rca_data['root_cause'] = filtered_summary
+                rca_data['summary_sections'] = structured_sections
+            if full_summary:
+                rca_data['full_summary'] = full_summary
+
+            tier_analysis = _extract_tier_analysis(full_summary)
+            if tier_analysis:
+                rca_data['tier_analysis'] = tier_analysis
+    return f"data: {json.dumps(update)}\n\n"
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+class UploadEventStream(StreamingResponse):
+    """
+    SSE response whose generator is still reading the request body.
+    
+    StreamingResponse normally watches for client disconnects by consuming
+    receive(), which would steal the upload's body chunks; here the body
+    reader (request.stream()) sees the disconnect instead.
+    """
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+async def _build_tool_registry():
+    """Build the shared tier RAG tools off the event loop"""
+    try:
+        await asyncio.to_thread(get_tool_registry().build)
+    except Exception as e:
+        # Failure is reported through /api/ready; requests retry the build on demand
+        print(f"Error building RAG tools: {e}")
+
+
+async def _index_scenarios():
+    """Index the scenario catalog off the event loop"""
+    try:
+        await asyncio.to_thread(get_scenario_catalog)
+    except Exception as e:
+        # Requests index the catalog on demand
+        print(f"Error indexing scenarios: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start building the tier RAG tools in the background so the server can
+    # answer readiness probes while the knowledge base is being embedded
+    build_task = asyncio.create_task(_build_tool_registry())
+    index_task = asyncio.create_task(_index_scenarios())
+    yield
+    for task in (build_task, index_task):
+        if not task.done():
+            task.cancel()
+
+
+app = FastAPI(title="SREnity API", version="1.0.0", lifespan=lifespan)
 
 # CORS for React frontend
 app.add_middleware(
@@ -204,6 +292,40 @@ class AnalyzeRequest(BaseModel):
     alert_id: Optional[str] = None
     service_id: Optional[str] = None
     query: str  # The incident description/query
+    scenario_id: Optional[str] = None  # Log scenario to analyze (see /api/scenarios); picked from alert_id if omitted
+    start_time: Optional[str] = None  # ISO-8601 log window start (inclusive)
+    end_time: Optional[str] = None  # ISO-8601 log window end (exclusive)
+
+def _time_window_error(request: AnalyzeRequest) -> Optional[str]:
+    """Why the requested log window is invalid, or None if it is valid"""
+    try:
+        start = parse_time_bound(request.start_time)
+        end = parse_time_bound(request.end_time)
+    except ValueError as e:
+        return str(e)
+    if start is not None and end is not None and end <= start:
+        return "end_time must be after start_time"
+    return None
+
+@app.get("/api/ready")
+async def ready():
+    """
+    Readiness probe - returns 200 once the tier RAG tools are built, 503 before
+    """
+    status = get_tool_registry().status()
+    status["embedding_cache"] = get_embedding_store().stats()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+@app.get("/api/scenarios")
+async def scenarios():
+    """
+    Scenario catalog: tiers, sizes, time ranges and top error signatures per scenario
+    """
+    catalog = await asyncio.to_thread(get_scenario_catalog)
+    return {
+        "scenarios": [info.to_dict() for info in catalog.scenarios()],
+        "cache": catalog.stats(),
+    }
 
 @app.post("/api/analyze")
 async def analyze(request: AnalyzeRequest):
@@ -224,46 +346,28 @@ async def analyze_stream(request: AnalyzeRequest):
     
     Directly calls run.py analyze_scenario_stream function and passes through output
     """
+    # A malformed bound must not silently widen the window to the whole log
+    window_error = _time_window_error(request)
+    if window_error:
+        return JSONResponse(content={"detail": window_error}, status_code=400)
+
+    # Same scenario for the same alert in every worker process
+    catalog = await asyncio.to_thread(get_scenario_catalog)
+    try:
+        scenario = catalog.resolve(request.scenario_id, key=request.alert_id or request.service_id or request.query)
+    except KeyError as e:
+        return JSONResponse(content={"detail": str(e).strip("'\"")}, status_code=404)
+
     async def event_generator():
         try:
-            # Rotate through scenarios 1-4
-            scenario = get_next_scenario()
-            
             # Stream from run.py and pass through output directly
-            async for update in analyze_scenario_stream(scenario=scenario, query=request.query):
-                # Yield status strings as-is
-                if isinstance(update, str):
-                    yield f"data: {json.dumps({'type': 'status', 'message': update})}\n\n"
- 
-                # Pass through RCA results directly from run.py with complete output
-                elif isinstance(update, dict):
-                    if update.get('type') == 'rca_complete':
-                        rca_data = update.get('rca')
-                        if rca_data:
-                            full_summary = (
-                                rca_data.get('full_summary')
-                                or rca_data.get('summary', '')
-                                or rca_data.get('root_cause', '')
-                            )
-                            filtered_summary, structured_sections = _extract_summary_sections(full_summary)
-                            if filtered_summary:
-                                rca_data['summary'] = filtered_summary
-                                rca_data['root_cause'] = filtered_summary
-                                rca_data['summary_sections'] = structured_sections
-                                update['rca']['summary'] = filtered_summary
-                                update['rca']['root_cause'] = filtered_summary
-                                update['rca']['summary_sections'] = structured_sections
-                            if full_summary:
-                                rca_data['full_summary'] = full_summary
-                                update['rca']['full_summary'] = full_summary
-
-                            tier_analysis = _extract_tier_analysis(full_summary)
-                            if tier_analysis:
-                                rca_data['tier_analysis'] = tier_analysis
-                                update['rca']['tier_analysis'] = tier_analysis
-                        yield f"data: {json.dumps(update)}\n\n"
-                    else:
-                        yield f"data: {json.dumps(update)}\n\n"
+            async for update in analyze_scenario_stream(
+                scenario=scenario,
+                query=request.query,
+                start=request.start_time,
+                end=request.end_time,
+            ):
+                yield _sse_event(update)
  
             # Signal completion
             yield "data: [DONE]\n\n"
@@ -271,15 +375,87 @@ async def analyze_stream(request: AnalyzeRequest):
         except Exception as e:
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
-    )
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/api/analyze/upload")
+async def analyze_upload(request: Request, query: Optional[str] = None, tier: Optional[str] = None):
+    """
+    Upload per-tier logs and stream their analysis via Server-Sent Events
+    
+    Accepts multipart/form-data with one part per tier (web, app, db, cache;
+    file names like web.log or app.log.gz work too, plus an optional "query"
+    field), or a plain/chunked body for `?tier=web` or split by
+    "=== WEB TIER LOGS ===" section headers (a plain body with neither is
+    rejected with 400). The body is sampled per tier
+    while it arrives, so memory stays bounded however large the upload is.
+    Each tier is pre-checked as soon as its part ends and the graph is built
+    during the upload; the LLM analysis needs every tier and starts when the
+    body ends.
+    """
+    default_tier = tier_for_name(tier) if tier else None
+    if tier and default_tier is None:
+        return JSONResponse(content={"detail": f"Unknown tier: {tier}"}, status_code=400)
+    content_type = request.headers.get("content-type", "")
+    try:
+        ingest = UploadIngest(content_type, default_tier)
+    except ValueError as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=400)
+    
+    body = request.stream()
+    if default_tier is None and multipart_boundary(content_type) is None:
+        # A plain body must name its tier before its first log line; check
+        # that before streaming so a body that would be dropped gets a 400
+        prefix, ended = await _read_first_line(body)
+        try:
+            ingest.feed(prefix)
+            if ended:
+                ingest.finish()
+        except ValueError as e:
+            return JSONResponse(content={"detail": str(e)}, status_code=400)
+
+    async def event_generator():
+        # Build (or fetch) the compiled graph while the body is still arriving
+        graph_task = asyncio.ensure_future(asyncio.to_thread(get_compiled_graph))
+        try:
+            yield _sse_event("Receiving logs...")
+            pending = bytearray()
+            next_progress = UPLOAD_PROGRESS_BYTES
+            async for chunk in body:
+                pending += chunk
+                if len(pending) < UPLOAD_BATCH_BYTES:
+                    continue
+                # Mining and sketching are CPU work; keep them off the event loop
+                await asyncio.to_thread(ingest.feed, bytes(pending))
+                pending.clear()
+                # Pre-check each tier as soon as its part ends, before later tiers arrive
+                for completed in ingest.pop_completed():
+                    yield _sse_event(await asyncio.to_thread(ingest.samplers[completed].triage))
+                if ingest.bytes_received >= next_progress:
+                    next_progress += UPLOAD_PROGRESS_BYTES
+                    yield _sse_event(f"Received {ingest.bytes_received / 1e6:.0f} MB - {ingest.describe()}")
+            await asyncio.to_thread(ingest.feed, bytes(pending))
+            await asyncio.to_thread(ingest.finish)
+            for completed in ingest.pop_completed():
+                yield _sse_event(await asyncio.to_thread(ingest.samplers[completed].triage))
+            
+            yield _sse_event(f"Upload complete ({ingest.bytes_received / 1e6:.1f} MB) - {ingest.describe()}")
+            if ingest.skipped_parts:
+                yield _sse_event(f"Skipped parts without a known tier: {', '.join(ingest.skipped_parts)}")
+            
+            async for update in analyze_logs_stream(
+                ingest.logs(),
+                query=query or ingest.fields.get("query"),
+                latency_sketches=ingest.latency_sketches,
+                compiled_graph=await graph_task,
+            ):
+                yield _sse_event(update)
+            
+            yield "data: [DONE]\n\n"
+            
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return UploadEventStream(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 if __name__ == "__main__":
     import uvicorn
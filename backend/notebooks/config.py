@@ -1,6 +1,7 @@
 """
 Simple configuration for notebook - just the backend path
 """
+import os
 from pathlib import Path
 
 # Get backend directory relative to this config file
@@ -10,6 +11,12 @@ BACKEND_DIR = Path(__file__).parent.parent
 # Logs directory relative to backend
 LOGS_DIR = BACKEND_DIR / "data" / "logs"
 
+# Run the web/app/db/cache tier tools concurrently (set to "false" for one at a time)
+PARALLEL_TIER_ANALYSIS = os.getenv("SRENITY_PARALLEL_TIERS", "true").strip().lower() not in ("0", "false", "no")
 
 
 
+
+
+# Memory for parsed scenario log digests kept per process (LRU, invalidated by file mtime)
+SCENARIO_CACHE_MAX_MB = int(os.getenv("SRENITY_SCENARIO_CACHE_MAX_MB", "256"))
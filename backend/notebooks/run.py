@@ -10,6 +10,7 @@ import os
 import sys
 import argparse
 import asyncio
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -26,7 +27,7 @@ if "OPENAI_API_KEY" not in os.environ:
     os.environ["OPENAI_API_KEY"] = getpass.getpass("OpenAI API Key: ")
 
 # Read path from config
-from config import BACKEND_DIR, LOGS_DIR
+from config import BACKEND_DIR, LOGS_DIR, PARALLEL_TIER_ANALYSIS, SCENARIO_CACHE_MAX_MB
 
 # Add backend parent to Python path
 backend_parent = BACKEND_DIR.parent
@@ -36,35 +37,45 @@ if str(backend_parent) not in sys.path:
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
-from backend.analysis.tools import (
-    create_web_rag_tool,
-    create_app_rag_tool,
-    create_db_rag_tool,
-    create_cache_rag_tool,
-)
-from backend.analysis.graph import (
-    create_incident_manager_node,
-    create_web_tool_node,
-    create_app_tool_node,
-    create_db_tool_node,
-    create_cache_tool_node,
-    create_aggregator_node,
-    create_summarizer_node,
-    create_runbook_node,
-    build_multi_layer_graph,
-    MultiLayerState
-)
+from backend.analysis.tools import get_tool_registry
+from backend.ingest import LogTailer, ScenarioCatalog, discover_segments, iter_tier_lines, read_shards_window
+from backend.ingest.tail import DEFAULT_POLL_INTERVAL
+from backend.analysis.digest import digest_logs
+from backend.analysis.sketch import LatencySketches
+from backend.analysis.graph import create_multi_layer_graph, astream_with_final_state, MultiLayerState
 from backend.runbook_service import search_runbooks_with_metadata
 
+# Cache for the compiled multi-layer graph (singleton pattern)
+_cached_graph = None
+_cached_graph_lock = threading.Lock()
+_scenario_catalog = None
+_scenario_catalog_lock = threading.Lock()
 
-def load_logs(scenario="scenario1_web_issue"):
+
+def load_logs(scenario="scenario1_web_issue", start=None, end=None, shard_globs=None, latency_sketches=None):
     """
     Load log files separately from logs directory.
     Returns a dictionary with separate log contents - NOT joined/combined.
     Each log file stays separate: web.log, app.log, db.log
     
+    Rotated and compressed segments (web.log.1, web.log.2.gz, .bz2, .zst)
+    are merged in time order with the live file. Only the [start, end) time
+    window is read: the live file is memory-mapped and compressed segments
+    are decompressed as streams, so large logs are never loaded whole.
+    
+    A tier written by many hosts can instead be a directory of per-host
+    shards (web/i-0abc.log, web/i-0def.log.gz, ...) or a glob given in
+    `shard_globs`; its shards are k-way merged by timestamp.
+    
+    If `latency_sketches` (a LatencySketches) is given, every streamed line's
+    latency is added to it per (tier, service, AZ) as the logs are read.
+    
     Args:
         scenario: Scenario directory name (default: "scenario1_web_issue")
+        start: Optional window start (ISO-8601 string or datetime), inclusive
+        end: Optional window end (ISO-8601 string or datetime), exclusive
+        shard_globs: Optional {tier: glob} of per-host shard files per tier
+        latency_sketches: Optional LatencySketches to fill while streaming
     
     Returns:
         dict: Dictionary with keys 'web', 'app', 'db' containing log file contents
@@ -80,9 +91,21 @@ def load_logs(scenario="scenario1_web_issue"):
     
     # Load each log file separately - keep them separate, don't combine
     logs = {}
+    shard_globs = shard_globs or {}
     for tier in ["web", "app", "db", "cache"]:
         path = logs_dir / f"{tier}.log"
-        if tier == "cache" and not path.exists():
+        # Per-host shards: an explicit glob, or a web/ directory next to web.log
+        shard_glob = shard_globs.get(tier)
+        if shard_glob is None and (logs_dir / tier).is_dir():
+            shard_glob = str(logs_dir / tier / "*.log*")
+        if shard_glob is not None:
+            logs[tier] = read_shards_window(shard_glob, start, end, tier, latency_sketches)
+            if not logs[tier]:
+                print(f"Warning: no {tier} log shards matched {shard_glob}")
+            continue
+        # The live file plus any rotated / compressed segments (web.log.1, web.log.2.gz, ...)
+        segments = discover_segments(logs_dir, tier)
+        if tier == "cache" and not segments:
             # Only add default cache errors for cache-specific scenarios
             if "cache" in scenario.lower():
                 print("Cache log missing, inserting default Redis error sample.")
@@ -96,12 +119,16 @@ def load_logs(scenario="scenario1_web_issue"):
 2024-01-17T09:00:02.712Z [ERROR] [trace_id:req-405-a5b6c7] [redis-node:cache-primary] [Redis] redis.exceptions.ConnectionError: Timeout connecting to Redis - connection pool exhausted
 2024-01-17T09:00:02.895Z [ERROR] [trace_id:req-406-a6b7c8] [redis-node:cache-primary] [Redis] ERR max number of clients reached - failed command: SET session:token:99431
 2024-01-17T09:00:03.015Z [WARN]  [redis-node:cache-primary] [Redis] Recommendation: review connection pooling configuration and consider increasing maxclients or scaling cache tier"""
+                if latency_sketches is not None:
+                    latency_sketches.add_text(tier, logs[tier])
             else:
                 logs[tier] = ""  # Skip cache for non-cache scenarios
                 print(f"Cache log missing for {scenario}, skipping cache tier analysis.")
-        elif path.exists():
-            with open(path, encoding="utf-8") as f:
-                logs[tier] = f.read()
+        elif segments:
+            lines = iter_tier_lines(logs_dir, tier, start, end)
+            if latency_sketches is not None:
+                lines = latency_sketches.feed(tier, lines)
+            logs[tier] = "\n".join(lines)
         else:
             logs[tier] = ""
             print(f"Warning: {path} not found")
@@ -109,125 +136,158 @@ def load_logs(scenario="scenario1_web_issue"):
     return logs
 
 
-async def analyze_scenario_stream(scenario="scenario1_web_issue", query=None):
+def get_compiled_graph():
+    """
+    Get the compiled multi-layer graph, building it once per process.
+
+    The graph topology never changes between analyses, so the nodes and the
+    compiled graph are shared; each run only supplies its initial state.
+    """
+    global _cached_graph
+    if _cached_graph is None:
+        with _cached_graph_lock:
+            if _cached_graph is None:
+                llm = ChatOpenAI(model="gpt-4o-mini")
+                rag_tools = get_tool_registry().get_tools()
+                _cached_graph = create_multi_layer_graph(
+                    rag_tools,
+                    llm,
+                    search_runbooks_with_metadata,
+                    parallel=PARALLEL_TIER_ANALYSIS,
+                )
+                print("✅ Multi-layer graph compiled and cached")
+    return _cached_graph
+
+
+def get_scenario_catalog() -> ScenarioCatalog:
+    """Get the process-wide scenario catalog (indexes LOGS_DIR on first use)"""
+    global _scenario_catalog
+    if _scenario_catalog is None:
+        with _scenario_catalog_lock:
+            if _scenario_catalog is None:
+                catalog = ScenarioCatalog(LOGS_DIR, loader=load_logs, max_bytes=SCENARIO_CACHE_MAX_MB * 1024 * 1024)
+                catalog.refresh()
+                _scenario_catalog = catalog
+    return _scenario_catalog
+
+
+def create_initial_state(logs, query=None, cached_results=None, latency_sketches=None, bundle=None) -> MultiLayerState:
+    """
+    Create the initial graph state for one analysis run from loaded logs.
+    
+    Tiers present in `cached_results` start with that result, so the incident
+    manager does not route them to their tool again (used by tail mode).
+    `latency_sketches` adds sketch percentiles for tiers whose sketches
+    cover more lines than are kept in `logs`. The logs are digested here
+    (one parse per tier for samples, triage, statistics and correlation), so
+    the tier tools never re-read the whole log, and the state carries each
+    tier's prompt sample rather than its whole log. A catalog `bundle`
+    supplies the digest already computed for its logs.
+    """
+    analysis_query = query if query else "Analyzing system logs from web, app, db, and cache tiers"
+    cached_results = cached_results or {}
+    digest = bundle.digest if bundle is not None else digest_logs(logs, latency_sketches)
+    samples = {tier: tier_digest.prompt_sample for tier, tier_digest in digest.tiers.items()}
+    return {
+        "messages": [HumanMessage(content=analysis_query)],
+        "web_log": samples.get("web", ""),
+        "app_log": samples.get("app", ""),
+        "db_log": samples.get("db", ""),
+        "cache_log": samples.get("cache", ""),
+        "trace_correlation": digest.trace_correlation,
+        "log_statistics": digest.log_statistics,
+        "tier_digests": digest.tiers,
+        "web_result": cached_results.get("web", ""),
+        "app_result": cached_results.get("app", ""),
+        "db_result": cached_results.get("db", ""),
+        "cache_result": cached_results.get("cache", ""),
+        "next": "",
+        "tool_results": {},
+        "rca_summary_markdown": "",
+        "rca_root_cause": "",
+        "rca_recommendations": [],
+        "rca_evidence": [],
+        "runbook_results": [],
+    }
+
+
+async def analyze_scenario_stream(scenario="scenario1_web_issue", query=None, start=None, end=None):
     """
     Stream multi-layer analysis with status updates.
     Yields status messages and final results.
+    Optional start/end restrict analysis to a [start, end) log time window.
     """
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4o-mini")
-    
     yield "Initializing multi-layer analysis..."
     
-    # Create RAG tools
-    yield "Creating RAG tools..."
-    web_rag_tool = create_web_rag_tool()
-    app_rag_tool = create_app_rag_tool()
-    db_rag_tool = create_db_rag_tool()
-    cache_rag_tool = create_cache_rag_tool()
-    
-    # Create nodes for each layer
-    yield "Creating graph nodes..."
-    incident_manager_node = create_incident_manager_node()
-    web_tool_node = create_web_tool_node(web_rag_tool)
-    app_tool_node = create_app_tool_node(app_rag_tool)
-    db_tool_node = create_db_tool_node(db_rag_tool)
-    cache_tool_node = create_cache_tool_node(cache_rag_tool)
-    aggregator_node = create_aggregator_node()
-    summarizer_node = create_summarizer_node(llm)
-    runbook_node = create_runbook_node(search_runbooks_with_metadata)
-    
-    # Build graph
-    yield "Building multi-layer graph..."
-    compiled_graph = build_multi_layer_graph(
-        incident_manager_node,
-        web_tool_node,
-        app_tool_node,
-        db_tool_node,
-        cache_tool_node,
-        aggregator_node,
-        summarizer_node,
-        runbook_node
-    )
+    # Get the shared compiled graph (tools and graph are built once per process)
+    if _cached_graph is None and not get_tool_registry().ready:
+        yield "Waiting for RAG tools to finish building..."
+    compiled_graph = await asyncio.to_thread(get_compiled_graph)
     
-    # Load logs
+    # Load logs (parsed bundles of hot scenarios come from the catalog cache)
     yield f"Loading logs for scenario: {scenario}..."
-    logs = load_logs(scenario)
+    bundle = await asyncio.to_thread(get_scenario_catalog().load, scenario, start, end)
+    
+    async for update in analyze_logs_stream(bundle.samples, query, compiled_graph=compiled_graph, bundle=bundle):
+        yield update
+
+
+async def analyze_logs_stream(logs, query=None, latency_sketches=None, compiled_graph=None, bundle=None):
+    """
+    Stream multi-layer analysis of already loaded tier logs (e.g. an upload).
+    Yields status messages and final results, like analyze_scenario_stream.
+    """
+    if compiled_graph is None:
+        if _cached_graph is None and not get_tool_registry().ready:
+            yield "Waiting for RAG tools to finish building..."
+        compiled_graph = await asyncio.to_thread(get_compiled_graph)
     
     # Keep logs separate - web.log to web_tool, app.log to app_tool, db.log to db_tool
-    web_log = logs.get("web", "")
-    app_log = logs.get("app", "")
-    db_log = logs.get("db", "")
+    # (a catalog bundle holds only samples, so its digest has the loaded sizes)
+    if bundle is not None:
+        log_chars = {tier: tier_digest.log_chars for tier, tier_digest in bundle.digest.tiers.items()}
+    else:
+        log_chars = {tier: len(text) for tier, text in logs.items()}
+    web_chars, app_chars, db_chars = (log_chars.get(tier, 0) for tier in ("web", "app", "db"))
     
-    if not any([web_log, app_log, db_log]):
+    if not any([web_chars, app_chars, db_chars]):
         yield "Warning: No log files found, proceeding with query-based analysis..."
     else:
-        yield f"Loaded logs: Web={len(web_log)} chars, App={len(app_log)} chars, DB={len(db_log)} chars"
+        yield f"Loaded logs: Web={web_chars} chars, App={app_chars} chars, DB={db_chars} chars"
     
-    # Create initial state
-    analysis_query = query if query else "Analyzing system logs from web, app, db, and cache tiers"
-    initial_state: MultiLayerState = {
-        "messages": [HumanMessage(content=analysis_query)],
-        "web_log": web_log,
-        "app_log": app_log,
-        "db_log": db_log,
-        "cache_log": logs.get("cache", ""),
-        "web_result": "",
-        "app_result": "",
-        "db_result": "",
-        "cache_result": "",
-        "next": "",
-        "tool_results": {},
-        "rca_summary_markdown": "",
-        "rca_root_cause": "",
-        "rca_recommendations": [],
-        "rca_evidence": [],
-        "runbook_results": [],
-    }
+    # Create initial state (parses logs for trace correlation, so off the event loop)
+    initial_state = await asyncio.to_thread(create_initial_state, logs, query, None, latency_sketches, bundle)
     
     yield "Running multi-layer analysis..."
     
-    # Stream graph execution
-    summary_result = None
-    runbook_result = None
-    async for step in compiled_graph.astream(initial_state, {"recursion_limit": 20}):
-        for node_name, node_output in step.items():
+    # Stream graph execution - a single run provides both the node updates
+    # and the final accumulated state
+    final_state = {}
+    async for event, payload in astream_with_final_state(compiled_graph, initial_state):
+        if event == "final":
+            final_state = payload
+            continue
+        for node_name, node_output in payload.items():
             if node_name != "__end__":
                 # Yield status updates based on node
                 if node_name == "incident_manager":
                     next_node = node_output.get("next", "")
                     if next_node:
-                        yield f"Routing to {next_node} analysis..."
+                        yield f"Routing to {next_node.replace(',', ', ')} analysis..."
                 elif node_name == "web_tool":
                     yield "Analyzing web tier logs..."
                 elif node_name == "app_tool":
                     yield "Analyzing application tier logs..."
                 elif node_name == "db_tool":
                     yield "Analyzing database tier logs..."
+                elif node_name == "cache_tool":
+                    yield "Analyzing cache tier logs..."
                 elif node_name == "aggregate":
                     yield "Aggregating analysis results..."
                 elif node_name == "summarizer":
                     yield "Generating root cause analysis summary..."
-                    summary_result = node_output
                 elif node_name == "runbook":
                     yield "Searching runbooks for remediation guidance..."
-                    runbook_result = node_output
-    
-    # If we didn't get final result from stream, invoke once more
-    final_state = runbook_result or summary_result
-    if summary_result is None or runbook_result is None:
-        yield "Finalizing analysis..."
-        final_state = await compiled_graph.ainvoke(initial_state, {"recursion_limit": 20})
-        if summary_result is None:
-            summary_result = final_state
-        if runbook_result is None:
-            runbook_result = final_state
-    else:
-        final_state = {}
-        if summary_result:
-            final_state.update(summary_result)
-        if runbook_result:
-            final_state.update(runbook_result)
  
     # Extract summary
     summary = ""
@@ -290,69 +350,18 @@ async def analyze_scenario_stream(scenario="scenario1_web_issue", query=None):
         }
 
 
-def analyze_scenario(scenario="scenario1_web_issue", query=None):
+def analyze_scenario(scenario="scenario1_web_issue", query=None, start=None, end=None):
     """
     Run multi-layer analysis and return results.
     Returns dict with summary, web_result, app_result, db_result
     """
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4o-mini")
-    
-    # Create RAG tools
-    web_rag_tool = create_web_rag_tool()
-    app_rag_tool = create_app_rag_tool()
-    db_rag_tool = create_db_rag_tool()
-    cache_rag_tool = create_cache_rag_tool()
-    
-    # Create nodes for each layer
-    incident_manager_node = create_incident_manager_node()
-    web_tool_node = create_web_tool_node(web_rag_tool)
-    app_tool_node = create_app_tool_node(app_rag_tool)
-    db_tool_node = create_db_tool_node(db_rag_tool)
-    cache_tool_node = create_cache_tool_node(cache_rag_tool)
-    aggregator_node = create_aggregator_node()
-    summarizer_node = create_summarizer_node(llm)
-    
-    # Build graph
-    compiled_graph = build_multi_layer_graph(
-        incident_manager_node,
-        web_tool_node,
-        app_tool_node,
-        db_tool_node,
-        cache_tool_node,
-        aggregator_node,
-        summarizer_node
-    )
+    compiled_graph = get_compiled_graph()
     
     # Load logs
-    logs = load_logs(scenario)
-    
-    # Keep logs separate - web.log to web_tool, app.log to app_tool, db.log to db_tool
-    web_log = logs.get("web", "")
-    app_log = logs.get("app", "")
-    db_log = logs.get("db", "")
-    cache_log = logs.get("cache", "")
+    bundle = get_scenario_catalog().load(scenario, start, end)
     
-    # Create initial state
-    analysis_query = query if query else "Analyzing system logs from web, app, db, and cache tiers"
-    initial_state: MultiLayerState = {
-        "messages": [HumanMessage(content=analysis_query)],
-        "web_log": web_log,
-        "app_log": app_log,
-        "db_log": db_log,
-        "cache_log": cache_log,
-        "web_result": "",
-        "app_result": "",
-        "db_result": "",
-        "cache_result": "",
-        "next": "",
-        "tool_results": {},
-        "rca_summary_markdown": "",
-        "rca_root_cause": "",
-        "rca_recommendations": [],
-        "rca_evidence": [],
-        "runbook_results": [],
-    }
+    # Create initial state - each tier log stays separate
+    initial_state = create_initial_state(bundle.samples, query, bundle=bundle)
     
     # Run the graph using async invoke to support async-only nodes (e.g., runbook)
     final_result = asyncio.run(compiled_graph.ainvoke(initial_state, {"recursion_limit": 20}))
@@ -380,7 +389,56 @@ def analyze_scenario(scenario="scenario1_web_issue", query=None):
     }
 
 
-def main(scenario="scenario1_web_issue", stream=False, show_graph=False):
+async def tail_logs(logs_dir, query=None, poll_interval=DEFAULT_POLL_INTERVAL, from_end=False, max_cycles=None):
+    """
+    Follow growing tier logs and re-analyze incrementally.
+    
+    Each poll reads only newly appended lines. Only tiers whose error
+    signatures, error volume or latency moved materially since their last
+    analysis are re-run; the other tiers reuse their cached results and the
+    summary is regenerated from the combination.
+    
+    Returns the final state of the last analysis (empty dict if none ran).
+    """
+    compiled_graph = await asyncio.to_thread(get_compiled_graph)
+    tailer = LogTailer(Path(logs_dir), from_end=from_end)
+    tier_results = {}
+    final_state = {}
+    cycles = 0
+    
+    print(f"Tailing logs in {logs_dir} (poll every {poll_interval}s, Ctrl+C to stop)")
+    while max_cycles is None or cycles < max_cycles:
+        cycles += 1
+        new_lines = await asyncio.to_thread(tailer.poll)
+        changed = tailer.changed_tiers()
+        if not changed:
+            await asyncio.sleep(poll_interval)
+            continue
+        
+        print("\n" + "=" * 80)
+        print(f"New lines: {', '.join(f'{tier}={count}' for tier, count in new_lines.items())}")
+        for tier, reasons in changed.items():
+            print(f"Re-analyzing {tier} tier: {'; '.join(reasons[:3])}")
+        
+        cached = {tier: result for tier, result in tier_results.items() if tier not in changed}
+        initial_state = await asyncio.to_thread(
+            create_initial_state, tailer.recent_logs(), query, cached, tailer.latency_sketches()
+        )
+        final_state = await compiled_graph.ainvoke(initial_state, {"recursion_limit": 20})
+        
+        for tier in tailer.tails:
+            if final_state.get(f"{tier}_result"):
+                tier_results[tier] = final_state[f"{tier}_result"]
+        tailer.mark_analyzed(changed)
+        
+        print("=" * 80)
+        print(final_state.get("rca_summary_markdown") or final_state.get("rca_root_cause", "No summary"))
+        await asyncio.sleep(poll_interval)
+    
+    return final_state
+
+
+def main(scenario="scenario1_web_issue", stream=False, show_graph=False, start=None, end=None, shard_globs=None):
     """Main function to run the multi-layer analysis"""
     
     print("\n" + "=" * 80)
@@ -388,63 +446,20 @@ def main(scenario="scenario1_web_issue", stream=False, show_graph=False):
     print("=" * 80)
     print("Layer 1: Incident Manager - Decides which tools to use")
     print("Layer 2: Tool Nodes - web_tool, app_tool, db_tool, cache_tool (separate nodes)")
+    print(f"         Tier execution: {'parallel' if PARALLEL_TIER_ANALYSIS else 'sequential'}")
     print("Layer 3: Aggregator - Collects all tool results")
     print("Layer 4: Summarizer - Creates final summary")
     print("=" * 80)
     
-    # Initialize LLM
-    print("\nInitializing LLM...")
-    llm = ChatOpenAI(model="gpt-4o-mini")
-    
-    # Create RAG tools
-    print("\nCreating RAG tools...")
-    web_rag_tool = create_web_rag_tool()
-    app_rag_tool = create_app_rag_tool()
-    db_rag_tool = create_db_rag_tool()
-    cache_rag_tool = create_cache_rag_tool()
-    print("All RAG tools created")
-    
-    # Create nodes for each layer
-    print("\nCreating graph nodes...")
-    
-    # Layer 1: Incident manager (no LLM needed - simple routing logic)
-    incident_manager_node = create_incident_manager_node()
-    print("  Incident manager node created")
-    
-    # Layer 2: Tool nodes
-    web_tool_node = create_web_tool_node(web_rag_tool)
-    app_tool_node = create_app_tool_node(app_rag_tool)
-    db_tool_node = create_db_tool_node(db_rag_tool)
-    cache_tool_node = create_cache_tool_node(cache_rag_tool)
-    print("  Tool nodes created (web, app, db, cache)")
-    
-    # Layer 3: Aggregator
-    aggregator_node = create_aggregator_node()
-    print("  Aggregator node created")
-    
-    # Layer 4: Summarizer
-    summarizer_node = create_summarizer_node(llm)
-    print("  Summarizer node created")
-    runbook_node = create_runbook_node(search_runbooks_with_metadata)
-    print("  Runbook node created")
- 
-    # Build graph
+    # Build (or reuse) the compiled graph
     print("\nBuilding multi-layer graph...")
-    compiled_graph = build_multi_layer_graph(
-        incident_manager_node,
-        web_tool_node,
-        app_tool_node,
-        db_tool_node,
-        cache_tool_node,
-        aggregator_node,
-        summarizer_node,
-        runbook_node
-    )
+    compiled_graph = get_compiled_graph()
     print("Graph built successfully")
     
     # Load logs
     print(f"\nLoading logs for scenario: {scenario}...")
-    logs = load_logs(scenario)
+    latency_sketches = LatencySketches()
+    logs = load_logs(scenario, start, end, shard_globs, latency_sketches)
     
     # Keep logs separate - web.log to web_tool, app.log to app_tool, db.log to db_tool
     web_log = logs.get("web", "")
@@ -460,24 +475,7 @@ def main(scenario="scenario1_web_issue", stream=False, show_graph=False):
         print(f"Loaded logs: Web={len(web_log)} chars, App={len(app_log)} chars, DB={len(db_log)} chars, Cache={len(cache_log)} chars")
     
     # Create initial state with separate log files
-    initial_state: MultiLayerState = {
-        "messages": [HumanMessage(content="Analyzing system logs from web, app, db, and cache tiers")],
-        "web_log": web_log,
-        "app_log": app_log,
-        "db_log": db_log,
-        "cache_log": logs.get("cache", ""),
-        "web_result": "",
-        "app_result": "",
-        "db_result": "",
-        "cache_result": "",
-        "next": "",
-        "tool_results": {},
-        "rca_summary_markdown": "",
-        "rca_root_cause": "",
-        "rca_recommendations": [],
-        "rca_evidence": [],
-        "runbook_results": [],
-    }
+    initial_state = create_initial_state(logs, latency_sketches=latency_sketches)
     
     print("Initial state created with separate log files")
     
@@ -486,34 +484,35 @@ def main(scenario="scenario1_web_issue", stream=False, show_graph=False):
     print("=" * 80)
     
     if stream:
-        # Stream results to see each layer using async stream API
+        # Stream results to see each layer; the same run also provides the
+        # final state, so the graph is not executed a second time
         async def _stream_graph():
-            try:
-                async for step in compiled_graph.astream(initial_state, {"recursion_limit": 20}):
-                    for node_name, node_output in step.items():
-                        if node_name != "__end__":
-                            print(f"\n[Layer: {node_name}]")
-                            if "messages" in node_output and node_output["messages"]:
-                                last_msg = node_output["messages"][-1]
-                                if hasattr(last_msg, "content"):
-                                    content = str(last_msg.content)
-                                    # Show first 300 chars
-                                    preview = content[:300] + "..." if len(content) > 300 else content
-                                    print(preview)
-                            if "next" in node_output:
-                                print(f"  Next: {node_output['next']}")
-                            print("-" * 80)
-            except Exception as e:
-                print(f"Error during streaming: {e}")
-                import traceback
-                traceback.print_exc()
-                return
-
-        asyncio.run(_stream_graph())
+            final_state = {}
+            async for event, payload in astream_with_final_state(compiled_graph, initial_state):
+                if event == "final":
+                    final_state = payload
+                    continue
+                for node_name, node_output in payload.items():
+                    if node_name != "__end__":
+                        print(f"\n[Layer: {node_name}]")
+                        if "messages" in node_output and node_output["messages"]:
+                            last_msg = node_output["messages"][-1]
+                            if hasattr(last_msg, "content"):
+                                content = str(last_msg.content)
+                                # Show first 300 chars
+                                preview = content[:300] + "..." if len(content) > 300 else content
+                                print(preview)
+                        if "next" in node_output:
+                            print(f"  Next: {node_output['next']}")
+                        print("-" * 80)
+            return final_state
     
     # Get final result
     try:
-        final_result = asyncio.run(compiled_graph.ainvoke(initial_state, {"recursion_limit": 20}))
+        if stream:
+            final_result = asyncio.run(_stream_graph())
+        else:
+            final_result = asyncio.run(compiled_graph.ainvoke(initial_state, {"recursion_limit": 20}))
         
         print("\nAnalysis Complete!")
         print("=" * 80)
@@ -579,9 +578,66 @@ if __name__ == "__main__":
         action="store_true",
         help="Show and save graph structure as Mermaid diagram"
     )
+    parser.add_argument(
+        "--start",
+        type=str,
+        default=None,
+        help="Only analyze log lines at or after this ISO-8601 time (e.g. 2024-01-15T14:30:00Z)"
+    )
+    parser.add_argument(
+        "--end",
+        type=str,
+        default=None,
+        help="Only analyze log lines before this ISO-8601 time"
+    )
+    parser.add_argument(
+        "--shard",
+        action="append",
+        default=[],
+        metavar="TIER=GLOB",
+        help="Per-host shard files for a tier, merged by timestamp (e.g. web='/var/log/web/*.log*'); repeatable"
+    )
+    parser.add_argument(
+        "--tail",
+        action="store_true",
+        help="Follow the scenario's log files and re-analyze tiers as new lines arrive"
+    )
+    parser.add_argument(
+        "--logs-dir",
+        type=str,
+        default=None,
+        help="Directory of web/app/db/cache.log to tail (default: the scenario directory)"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"Seconds between polls in tail mode (default: {DEFAULT_POLL_INTERVAL})"
+    )
     
     args = parser.parse_args()
     
-    main(scenario=args.scenario, stream=args.stream, show_graph=args.show_graph)
+    shard_globs = {}
+    for spec in args.shard:
+        tier, sep, pattern = spec.partition("=")
+        if not sep or not pattern:
+            parser.error(f"--shard expects TIER=GLOB, got {spec!r}")
+        shard_globs[tier] = pattern
+    
+    if args.tail:
+        try:
+            asyncio.run(tail_logs(args.logs_dir or LOGS_DIR / args.scenario, poll_interval=args.poll_interval))
+        except KeyboardInterrupt:
+            print("\nStopped tailing.")
+        sys.exit(0)
+    
+    main(
+        scenario=args.scenario,
+        stream=args.stream,
+        show_graph=args.show_graph,
+        start=args.start,
+        end=args.end,
+        shard_globs=shard_globs,
+    )
 
 
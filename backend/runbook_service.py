@@ -5,6 +5,7 @@ This service uses the existing ensemble retriever to search runbooks
 and extracts structured information (action titles, steps, source URLs) for display.
 """
 from typing import List, Dict, Optional
+import asyncio
 import json
 
 # Cache for database components (singleton pattern)
@@ -41,34 +42,41 @@ def _get_or_create_database_components():
     return _cached_vector_store, _cached_chunked_docs
 
 
-async def search_runbooks_with_metadata(
-    rca_recommendations: List[str],
-    root_cause: str,
-    max_results: int = 5
-) -> List[Dict]:
-    """
-    Search runbooks using RCA recommendations and return full content results.
-    """
-    recommendations_text = ", ".join(rca_recommendations)
-    search_query = f"{root_cause}. Recommended actions: {recommendations_text}"
-
-    vector_store, chunked_docs = _get_or_create_database_components()
-
+def _get_or_create_ensemble_retriever(rerank_k: int = 5):
+    """Get cached ensemble retriever or create it once"""
     global _cached_ensemble_retriever
+
     if _cached_ensemble_retriever is None:
+        vector_store, chunked_docs = _get_or_create_database_components()
         get_model_factory = _get_model_factory()
         create_ensemble_retriever = _get_ensemble_retriever()
         model_factory = get_model_factory()
 
         _cached_ensemble_retriever = create_ensemble_retriever(
             vector_store, chunked_docs, model_factory,
-            naive_k=3, bm25_k=12, rerank_k=max_results
+            naive_k=3, bm25_k=12, rerank_k=rerank_k
         )
         print("✅ Ensemble retriever initialized and cached")
 
-    ensemble_retriever = _cached_ensemble_retriever
+    return _cached_ensemble_retriever
+
+
+async def search_runbooks_with_metadata(
+    rca_recommendations: List[str],
+    root_cause: str,
+    max_results: int = 5
+) -> List[Dict]:
+    """
+    Search runbooks using RCA recommendations and return full content results.
+    """
+    recommendations_text = ", ".join(rca_recommendations)
+    search_query = f"{root_cause}. Recommended actions: {recommendations_text}"
+
+    # First call loads the vector store and builds the retriever; keep that
+    # blocking work off the event loop
+    ensemble_retriever = await asyncio.to_thread(_get_or_create_ensemble_retriever, max_results)
 
-    retrieved_docs = ensemble_retriever.invoke(search_query)
+    retrieved_docs = await ensemble_retriever.ainvoke(search_query)
 
     structured_results = []
     seen_urls = set()
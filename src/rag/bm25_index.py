@@ -0,0 +1,433 @@
+"""
+Persisted BM25 inverted index for SREnity
+Built once next to the Qdrant store, memory-mapped on load and updated in place
+
+Layout of the index directory:
+
+    manifest.json           segments in order, tombstoned documents per segment
+    seg-000001/             one immutable segment per build or batch of additions
+        vocab.json          term -> term id
+        offsets.npy         postings of term t are [offsets[t], offsets[t + 1])
+        doc_ids.npy         postings: segment-local document ids
+        freqs.npy           postings: term frequencies
+        doc_lengths.npy     tokens per document
+        keys.npy            content key of every document
+        documents.npy       JSON-encoded documents (bytes), decoded only when returned
+        document_offsets.npy
+
+Numpy arrays are opened with mmap, so loading costs a manifest and the
+vocabularies regardless of corpus size. Adding documents writes a small delta
+segment, removing them only records tombstones; `compact` folds everything
+back into one segment once deltas or tombstones pile up. IDF values are
+computed over live documents of all segments, once per term between updates.
+
+Every worker process may update the same directory: writers serialize on an
+exclusive lock file (fcntl) and reload the manifest under it before
+changing anything, and readers pick up a replaced manifest on their next
+search.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+# Okapi BM25 parameters (same defaults as rank_bm25 / BM25Retriever)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Compact when there are more delta segments, or more tombstoned documents, than this
+MAX_SEGMENTS = 8
+MAX_TOMBSTONE_RATIO = 0.2
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def document_key(doc: Document) -> str:
+    """Content key of a chunk: its source plus its text"""
+    return hashlib.sha1(f"{doc.metadata.get('source', '')}\x00{doc.page_content}".encode("utf-8")).hexdigest()
+
+
+def _unique_tmp(path: Path) -> Path:
+    return path.with_name(f"{path.name}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+
+
+def _write_json(path: Path, data) -> None:
+    tmp = _unique_tmp(path)
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def write_segment(directory: Path, documents: List[Document]) -> None:
+    """Write an immutable segment for `documents` (atomically, via a temp directory)"""
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    doc_lengths = []
+    for doc_id, doc in enumerate(documents):
+        counts = Counter(tokenize(doc.page_content))
+        doc_lengths.append(sum(counts.values()))
+        for term, freq in counts.items():
+            postings.setdefault(term, []).append((doc_id, freq))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+    flat = [posting for term in terms for posting in postings[term]]
+    doc_ids = np.array([doc_id for doc_id, _ in flat], dtype=np.int32)
+    freqs = np.array([freq for _, freq in flat], dtype=np.int32)
+
+    encoded = [
+        json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}).encode("utf-8")
+        for doc in documents
+    ]
+    document_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    document_offsets[1:] = np.cumsum([len(blob) for blob in encoded])
+
+    tmp = _unique_tmp(directory)
+    tmp.mkdir(parents=True)
+    (tmp / "vocab.json").write_text(json.dumps({term: i for i, term in enumerate(terms)}), encoding="utf-8")
+    np.save(tmp / "offsets.npy", offsets)
+    np.save(tmp / "doc_ids.npy", doc_ids)
+    np.save(tmp / "freqs.npy", freqs)
+    np.save(tmp / "doc_lengths.npy", np.array(doc_lengths, dtype=np.int32))
+    np.save(tmp / "keys.npy", np.array([document_key(doc) for doc in documents], dtype="S40"))
+    np.save(tmp / "documents.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(tmp / "document_offsets.npy", document_offsets)
+    if directory.exists():
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise FileExistsError(f"BM25 segment already exists: {directory}")
+    os.replace(tmp, directory)
+
+
+class IndexSegment:
+    """One memory-mapped segment plus its live-document mask"""
+
+    def __init__(self, directory: Path, tombstones: Iterable[int] = ()):
+        self.name = directory.name
+        self.vocab: Dict[str, int] = json.loads((directory / "vocab.json").read_text(encoding="utf-8"))
+        self.offsets = np.load(directory / "offsets.npy", mmap_mode="r")
+        self.doc_ids = np.load(directory / "doc_ids.npy", mmap_mode="r")
+        self.freqs = np.load(directory / "freqs.npy", mmap_mode="r")
+        self.doc_lengths = np.load(directory / "doc_lengths.npy", mmap_mode="r")
+        self.keys = np.load(directory / "keys.npy", mmap_mode="r")
+        self.documents = np.load(directory / "documents.npy", mmap_mode="r")
+        self.document_offsets = np.load(directory / "document_offsets.npy", mmap_mode="r")
+        self.live = np.ones(len(self.doc_lengths), dtype=bool)
+        self.live[list(tombstones)] = False
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            return self.doc_ids[:0], self.freqs[:0]
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.doc_ids[start:end], self.freqs[start:end]
+
+    def document(self, doc_id: int) -> Document:
+        start, end = self.document_offsets[doc_id], self.document_offsets[doc_id + 1]
+        return Document(**json.loads(self.documents[start:end].tobytes().decode("utf-8")))
+
+    def tombstones(self) -> List[int]:
+        return np.flatnonzero(~self.live).tolist()
+
+
+class BM25Index:
+    """
+    Segmented BM25 index on disk
+
+    Segments are immutable and the manifest is replaced atomically, so a
+    reader always sees a consistent index. Updates hold the directory's lock
+    file, so concurrent writers in several processes see each other's changes.
+    """
+
+    def __init__(self, path: str, k1: float = BM25_K1, b: float = BM25_B):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._segments: List[IndexSegment] = []
+        self._locations: Dict[bytes, Tuple[int, int]] = {}
+        self._idf: Dict[str, float] = {}
+        self._next_segment = 1
+        self._manifest_stamp = None
+        self._lock_file = None
+        self._load()
+
+    # Loading and persistence
+
+    def _stat_manifest(self):
+        try:
+            stat = (self.path / MANIFEST_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        """(Re)load the manifest if another process or instance replaced it"""
+        stamp = self._stat_manifest()
+        if stamp == self._manifest_stamp:
+            return
+        if stamp is None:
+            self._next_segment, self._segments = 1, []
+        else:
+            for attempt in range(3):
+                try:
+                    manifest = json.loads((self.path / MANIFEST_FILE).read_text(encoding="utf-8"))
+                    segments = [
+                        IndexSegment(self.path / name, manifest["tombstones"].get(name, ()))
+                        for name in manifest["segments"]
+                    ]
+                    break
+                except FileNotFoundError:
+                    # A writer compacted away the segments of the manifest just read
+                    if attempt == 2:
+                        raise
+                    stamp = self._stat_manifest()
+            self._next_segment, self._segments = manifest["next_segment"], segments
+        self._manifest_stamp = stamp
+        self._reindex()
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive write access across threads and processes, on the latest manifest"""
+        with self._lock:
+            if self._lock_file is not None:
+                # Nested update (sync -> delete/add -> compact) already holds the lock
+                yield
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._lock_file = open(self.path / LOCK_FILE, "a")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+                self._load()
+                yield
+            finally:
+                self._lock_file.close()  # Releases the flock
+                self._lock_file = None
+
+    def refresh(self) -> None:
+        """Pick up changes written by other processes"""
+        with self._lock:
+            self._load()
+
+    def _reindex(self) -> None:
+        self._locations = {}
+        for position, segment in enumerate(self._segments):
+            for doc_id in np.flatnonzero(segment.live).tolist():
+                self._locations[bytes(segment.keys[doc_id])] = (position, doc_id)
+        self._idf = {}
+        self.total_length = sum(int(segment.doc_lengths[segment.live].sum()) for segment in self._segments)
+
+    def _save_manifest(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        _write_json(self.path / MANIFEST_FILE, {
+            "next_segment": self._next_segment,
+            "segments": [segment.name for segment in self._segments],
+            "tombstones": {
+                segment.name: segment.tombstones() for segment in self._segments if not segment.live.all()
+            },
+        })
+        self._manifest_stamp = self._stat_manifest()
+
+    def _new_segment(self, documents: List[Document]) -> IndexSegment:
+        directory = self.path / f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        self.path.mkdir(parents=True, exist_ok=True)
+        write_segment(directory, documents)
+        return IndexSegment(directory)
+
+    def _remove_unlisted_segments(self) -> None:
+        listed = {segment.name for segment in self._segments}
+        # Leftover temp directories of crashed writers go too (writers hold the lock)
+        for directory in self.path.glob("seg-*"):
+            if directory.is_dir() and directory.name not in listed:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    # Updates
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._locations)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._load()
+            return key.encode("ascii") in self._locations
+
+    def add_documents(self, documents: List[Document]) -> int:
+        """Index documents not already present as a new delta segment; returns how many were added"""
+        with self._writing():
+            new, seen = [], set()
+            for doc in documents:
+                key = document_key(doc).encode("ascii")
+                if key not in self._locations and key not in seen:
+                    seen.add(key)
+                    new.append(doc)
+            if not new:
+                return 0
+            self._segments.append(self._new_segment(new))
+            self._save_manifest()
+            self._reindex()
+            self._maybe_compact()
+            return len(new)
+
+    def delete(self, keys: Iterable[str]) -> int:
+        """Tombstone documents by content key; returns how many were live"""
+        with self._writing():
+            deleted = 0
+            for key in keys:
+                location = self._locations.get(key.encode("ascii"))
+                if location is not None:
+                    position, doc_id = location
+                    self._segments[position].live[doc_id] = False
+                    deleted += 1
+            if deleted:
+                self._save_manifest()
+                self._reindex()
+                self._maybe_compact()
+            return deleted
+
+    def delete_documents(self, documents: List[Document]) -> int:
+        return self.delete(document_key(doc) for doc in documents)
+
+    def sync(self, documents: List[Document]) -> Dict[str, int]:
+        """Make the index hold exactly `documents`: index new chunks, tombstone removed ones"""
+        with self._writing():
+            wanted = {document_key(doc) for doc in documents}
+            stale = [key.decode("ascii") for key in self._locations if key.decode("ascii") not in wanted]
+            deleted = self.delete(stale)
+            added = self.add_documents(documents)
+            return {"added": added, "deleted": deleted, "documents": len(self)}
+
+    def rebuild(self, documents: List[Document]) -> None:
+        """Replace the whole index with a single segment over `documents`"""
+        with self._writing():
+            unique = list({document_key(doc): doc for doc in documents}.values())
+            self._segments = [self._new_segment(unique)] if unique else []
+            self._save_manifest()
+            self._remove_unlisted_segments()
+            self._reindex()
+
+    def compact(self) -> None:
+        """Merge all segments into one, dropping tombstoned documents"""
+        with self._writing():
+            documents = [
+                segment.document(doc_id)
+                for segment in self._segments
+                for doc_id in np.flatnonzero(segment.live).tolist()
+            ]
+            self.rebuild(documents)
+
+    def _maybe_compact(self) -> None:
+        documents = sum(len(segment) for segment in self._segments)
+        tombstoned = documents - len(self._locations)
+        if len(self._segments) > MAX_SEGMENTS or (documents and tombstoned / documents > MAX_TOMBSTONE_RATIO):
+            self.compact()
+
+    # Search
+
+    def idf(self, term: str) -> float:
+        """Okapi IDF over live documents, log(1 + (N - df + 0.5) / (df + 0.5))"""
+        idf = self._idf.get(term)
+        if idf is None:
+            df = 0
+            for segment in self._segments:
+                doc_ids, _ = segment.postings(term)
+                df += int(segment.live[doc_ids].sum())
+            idf = self._idf[term] = math.log(1 + (len(self._locations) - df + 0.5) / (df + 0.5))
+        return idf
+
+    def search_with_scores(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Top `k` live documents by BM25 score (documents sharing no term are not returned)"""
+        with self._lock:
+            self._load()
+            if not self._locations:
+                return []
+            query_terms = Counter(tokenize(query))
+            average_length = self.total_length / len(self._locations)
+            candidates: List[Tuple[float, int, int]] = []
+            for position, segment in enumerate(self._segments):
+                scores = np.zeros(len(segment), dtype=np.float64)
+                norm = self.k1 * (1 - self.b + self.b * segment.doc_lengths / average_length)
+                for term, count in query_terms.items():
+                    doc_ids, freqs = segment.postings(term)
+                    if len(doc_ids):
+                        scores[doc_ids] += count * self.idf(term) * freqs * (self.k1 + 1) / (freqs + norm[doc_ids])
+                scores[~segment.live] = 0.0
+                top = np.flatnonzero(scores)
+                if len(top) > k:
+                    top = top[np.argpartition(-scores[top], k - 1)[:k]]
+                candidates.extend((float(scores[doc_id]), position, int(doc_id)) for doc_id in top)
+            candidates.sort(key=lambda item: (-item[0], item[1], item[2]))
+            return [
+                (self._segments[position].document(doc_id), score)
+                for score, position, doc_id in candidates[:k]
+            ]
+
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query, k)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            documents = sum(len(segment) for segment in self._segments)
+            return {
+                "path": str(self.path),
+                "documents": len(self._locations),
+                "segments": len(self._segments),
+                "tombstones": documents - len(self._locations),
+                "terms": sum(len(segment.vocab) for segment in self._segments),
+            }
+
+
+class BM25IndexRetriever(BaseRetriever):
+    """Retriever over a persisted BM25Index (drop-in for BM25Retriever)"""
+    index: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.index.search(query, self.k)
+
+
+# Indexes are shared per directory so every retriever sees one set of mmaps
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(path: Optional[str] = None) -> BM25Index:
+    """Get the shared BM25 index for a directory (empty until built)"""
+    if path is None:
+        from src.utils.config import DEFAULT_BM25_INDEX_PATH
+        path = DEFAULT_BM25_INDEX_PATH
+    path = str(Path(path).resolve())
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = BM25Index(path)
+        return _indexes[path]
@@ -3,43 +3,36 @@ Advanced Retrieval Implementation - BM25 + Reranker
 For SREnity RAG Pipeline Evaluation
 """
 
-from langchain_community.retrievers import BM25Retriever
 from langchain.retrievers import ContextualCompressionRetriever
-from langchain.retrievers.document_compressors import CohereRerank
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from src.utils.config import get_config, get_model_factory
+from src.rag.bm25_index import BM25IndexRetriever
+from src.rag.rerankers import create_reranker
+from src.utils.config import get_model_factory
+from src.utils.database_utils import get_or_create_bm25_index
 from src.utils.prompts import get_rag_prompt
 
-print("Advanced retrieval module loaded with rerank-v3.5")
+print("Advanced retrieval module loaded")
 
 
 def create_bm25_reranker_retriever(chunked_docs, bm25_k=12, rerank_k=3):
     """Create BM25 + Reranker retriever"""
-    config = get_config()
-    
-    if not config.cohere_api_key:
-        print("COHERE_API_KEY not found in environment variables")
-        print("Please add COHERE_API_KEY to your .env file")
-        return None
-    
     print("Creating BM25 + Reranker retriever...")
     
-    # Step 1: Create BM25 retriever
-    print(f"Creating BM25 retriever from {len(chunked_docs)} documents...")
-    bm25_retriever = BM25Retriever.from_documents(
-        documents=chunked_docs,
+    # Step 1: Create BM25 retriever over the persisted index (no re-tokenizing the corpus)
+    print(f"Loading BM25 index for {len(chunked_docs)} documents...")
+    bm25_retriever = BM25IndexRetriever(
+        index=get_or_create_bm25_index(chunked_docs),
         k=bm25_k  # Retrieve 12 candidates with BM25
     )
     print(f"BM25 retriever created (k={bm25_k})")
     
-    # Step 2: Create Cohere reranker
-    compressor = CohereRerank(
-        cohere_api_key=config.cohere_api_key,
-        model="rerank-v3.5",  # Use the correct model name
+    # Step 2: Create reranker (Cohere by default, local CPU reranker with SRENITY_RERANKER=local)
+    compressor = create_reranker(
         top_n=rerank_k  # Return top 3 after reranking
     )
+    print(f"Reranker: {type(compressor).__name__}")
     
     # Step 3: Combine BM25 + Reranker
     reranked_retriever = ContextualCompressionRetriever(
@@ -2,10 +2,49 @@
 Ensemble retrieval implementation - Combines existing chains
 For SREnity RAG Pipeline Evaluation
 """
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda, RunnableParallel, RunnablePassthrough
 from operator import itemgetter
 from src.utils.prompts import get_rag_prompt, get_ensemble_combination_prompt
 
+def _timed_branch(chain):
+    """Wrap a sub-chain so its output carries its own wall-clock time"""
+    def run(inputs, config):
+        start = time.perf_counter()
+        result = chain.invoke(inputs, config)
+        return {"result": result, "seconds": time.perf_counter() - start}
+
+    async def arun(inputs, config):
+        start = time.perf_counter()
+        result = await chain.ainvoke(inputs, config)
+        return {"result": result, "seconds": time.perf_counter() - start}
+
+    return RunnableLambda(run, afunc=arun)
+
+def _concurrent_branches(naive_chain, bm25_reranker_chain):
+    """
+    Run both sub-chains on the same question at the same time.
+    
+    RunnableParallel uses a thread pool for invoke and asyncio.gather for
+    ainvoke, so the ensemble takes as long as the slower branch, not the sum.
+    """
+    return (
+        RunnableLambda(lambda inputs: {"question": inputs["question"]})
+        | RunnableParallel(naive=_timed_branch(naive_chain), bm25=_timed_branch(bm25_reranker_chain))
+    )
+
+def _branch_timings(branches):
+    """Per-branch seconds, e.g. {'naive': 1.8, 'bm25': 2.3}"""
+    return {name: round(branch["seconds"], 3) for name, branch in branches.items()}
+
 def create_ensemble_chain(naive_chain, bm25_reranker_chain, weights=[0.5, 0.5]):
     """
     Create ensemble chain that combines results from existing chains
@@ -16,16 +55,14 @@ def create_ensemble_chain(naive_chain, bm25_reranker_chain, weights=[0.5, 0.5]):
         weights: [naive_weight, bm25_weight] - default [0.5, 0.5]
     
     Returns:
-        Runnable chain that combines both approaches
+        Runnable chain that combines both approaches; its output includes
+        per-branch 'timings' in seconds
     """
     
-    def ensemble_invoke(inputs):
-        """Run both chains and combine their results"""
-        question = inputs["question"]
-        
-        # Run both chains in parallel
-        naive_result = naive_chain.invoke({"question": question})
-        bm25_result = bm25_reranker_chain.invoke({"question": question})
+    def combine_results(branches):
+        """Combine the results of both chains"""
+        naive_result = branches["naive"]["result"]
+        bm25_result = branches["bm25"]["result"]
         
         # Combine contexts based on weights
         naive_contexts = naive_result.get('contexts', [])
@@ -55,58 +92,235 @@ def create_ensemble_chain(naive_chain, bm25_reranker_chain, weights=[0.5, 0.5]):
             'naive_response': naive_result.get('response', ''),
             'bm25_response': bm25_result.get('response', ''),
             'naive_contexts': naive_contexts,
-            'bm25_contexts': bm25_contexts
+            'bm25_contexts': bm25_contexts,
+            'timings': _branch_timings(branches)
         }
     
-    # Create a RunnableLambda that can be invoked like other chains
-    return RunnableLambda(ensemble_invoke)
+    # Both chains run concurrently, then their results are combined
+    return _concurrent_branches(naive_chain, bm25_reranker_chain) | RunnableLambda(combine_results)
 
 def create_ensemble_chain_with_llm_combination(naive_chain, bm25_reranker_chain, model_factory, weights=[0.5, 0.5]):
     """
     Create ensemble chain that uses LLM to combine responses from both chains
     
-    This is more sophisticated - it runs both chains and uses an LLM to synthesize
-    the best answer from both responses and contexts.
+    This is more sophisticated - it runs both chains concurrently and uses an
+    LLM to synthesize the best answer from both responses and contexts.
     """
-    from langchain_core.prompts import ChatPromptTemplate
+    # Use centralized ensemble combination prompt
+    combination_prompt = get_ensemble_combination_prompt()
     
-    def ensemble_invoke_with_llm(inputs):
-        """Run both chains and use LLM to combine responses"""
-        question = inputs["question"]
-        
-        # Run both chains
-        naive_result = naive_chain.invoke({"question": question})
-        bm25_result = bm25_reranker_chain.invoke({"question": question})
-        
-        # Get LLM to combine the responses
-        chat_model = model_factory.get_llm()
-        
-        # Use centralized ensemble combination prompt
-        combination_prompt = get_ensemble_combination_prompt()
-        
-        # Combine contexts for the LLM
-        all_contexts = naive_result.get('contexts', []) + bm25_result.get('contexts', [])
-        
-        combined_response = chat_model.invoke(
-            combination_prompt.format(
-                question=question,
-                naive_response=naive_result.get('response', ''),
-                bm25_response=bm25_result.get('response', ''),
-                naive_contexts='\n\n'.join(naive_result.get('contexts', [])),
-                bm25_contexts='\n\n'.join(bm25_result.get('contexts', []))
-            )
-        ).content
-        
+    def build_combination(inputs, branches):
+        naive_result = branches["naive"]["result"]
+        bm25_result = branches["bm25"]["result"]
+        return combination_prompt.format(
+            question=inputs["question"],
+            naive_response=naive_result.get('response', ''),
+            bm25_response=bm25_result.get('response', ''),
+            naive_contexts='\n\n'.join(naive_result.get('contexts', [])),
+            bm25_contexts='\n\n'.join(bm25_result.get('contexts', []))
+        )
+    
+    def build_output(branches, combined_response, combination_seconds):
+        naive_result = branches["naive"]["result"]
+        bm25_result = branches["bm25"]["result"]
+        timings = _branch_timings(branches)
+        timings['combination'] = round(combination_seconds, 3)
         return {
             'response': combined_response,
-            'contexts': all_contexts,
+            # Combine contexts for the LLM
+            'contexts': naive_result.get('contexts', []) + bm25_result.get('contexts', []),
             'naive_response': naive_result.get('response', ''),
             'bm25_response': bm25_result.get('response', ''),
             'naive_contexts': naive_result.get('contexts', []),
-            'bm25_contexts': bm25_result.get('contexts', [])
+            'bm25_contexts': bm25_result.get('contexts', []),
+            'timings': timings
+        }
+    
+    def combine_with_llm(inputs):
+        """Get LLM to combine the responses"""
+        chat_model = model_factory.get_llm()
+        start = time.perf_counter()
+        combined_response = chat_model.invoke(build_combination(inputs, inputs["branches"])).content
+        return build_output(inputs["branches"], combined_response, time.perf_counter() - start)
+    
+    async def acombine_with_llm(inputs):
+        chat_model = model_factory.get_llm()
+        start = time.perf_counter()
+        combined_response = (await chat_model.ainvoke(build_combination(inputs, inputs["branches"]))).content
+        return build_output(inputs["branches"], combined_response, time.perf_counter() - start)
+    
+    # Run both chains concurrently, then a single combination call
+    return (
+        RunnablePassthrough.assign(branches=_concurrent_branches(naive_chain, bm25_reranker_chain))
+        | RunnableLambda(combine_with_llm, afunc=acombine_with_llm)
+    )
+
+# Standard RRF damping constant: score = sum(weight / (RRF_K + rank))
+RRF_K = 60
+# Chunks from the same source sharing this fraction of their word shingles are duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_WORDS = 5
+
+def _document_key(doc):
+    """Identity of a chunk: its source plus whitespace-normalized content"""
+    content = " ".join(doc.page_content.split())
+    return hashlib.sha1(f"{doc.metadata.get('source', '')}\x00{content}".encode("utf-8")).hexdigest()
+
+def _shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def _is_near_duplicate(shingles, kept_shingles):
+    """Mostly contained in an already kept chunk (overlapping or re-split chunks)"""
+    if not shingles or not kept_shingles:
+        return False
+    shared = len(shingles & kept_shingles)
+    return shared / min(len(shingles), len(kept_shingles)) >= NEAR_DUPLICATE_THRESHOLD
+
+def reciprocal_rank_fusion(ranked_lists, weights=None, rrf_k=RRF_K, top_n=None):
+    """
+    Fuse ranked document lists with weighted reciprocal-rank fusion
+    
+    Each document scores sum(weight / (rrf_k + rank)) over the lists it appears
+    in, so documents found by both retrievers rise to the top. Exact duplicates
+    are merged before scoring; near-duplicate chunks of the same source (chunk
+    overlap, re-split documents) are then dropped in favour of the better
+    ranked one.
+    
+    Returns:
+        Documents, best first, at most `top_n` if given
+    """
+    weights = weights or [1.0] * len(ranked_lists)
+    scores = {}
+    documents = {}
+    for docs, weight in zip(ranked_lists, weights):
+        for rank, doc in enumerate(docs, start=1):
+            key = _document_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    
+    fused = []
+    kept_by_source = {}
+    for key in sorted(scores, key=scores.get, reverse=True):
+        doc = documents[key]
+        shingles = _shingles(doc.page_content)
+        same_source = kept_by_source.setdefault(doc.metadata.get('source', ''), [])
+        if any(_is_near_duplicate(shingles, kept) for kept in same_source):
+            continue
+        same_source.append(shingles)
+        fused.append(doc)
+        if top_n is not None and len(fused) >= top_n:
+            break
+    return fused
+
+class ReciprocalRankFusionRetriever(BaseRetriever):
+    """
+    Queries several retrievers concurrently and fuses their rankings with RRF
+    
+    Thread pool for invoke, asyncio.gather for ainvoke, so retrieval takes as
+    long as the slowest retriever.
+    """
+    retrievers: List[BaseRetriever]
+    weights: Optional[List[float]] = None
+    rrf_k: int = RRF_K
+    top_n: Optional[int] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        with ThreadPoolExecutor(max_workers=len(self.retrievers)) as executor:
+            futures = [
+                executor.submit(
+                    retriever.invoke, query, {"callbacks": run_manager.get_child(tag=f"retriever_{i + 1}")}
+                )
+                for i, retriever in enumerate(self.retrievers)
+            ]
+            ranked_lists = [future.result() for future in futures]
+        return reciprocal_rank_fusion(ranked_lists, self.weights, self.rrf_k, self.top_n)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        ranked_lists = await asyncio.gather(*[
+            retriever.ainvoke(query, {"callbacks": run_manager.get_child(tag=f"retriever_{i + 1}")})
+            for i, retriever in enumerate(self.retrievers)
+        ])
+        return reciprocal_rank_fusion(ranked_lists, self.weights, self.rrf_k, self.top_n)
+
+def create_ensemble_fusion_chain(naive_retriever, bm25_reranker_retriever, model_factory, weights=[0.5, 0.5], top_n=6):
+    """
+    Create ensemble chain that fuses at retrieval level and generates once
+    
+    Both retrievers run concurrently, their candidates are merged with
+    reciprocal-rank fusion and deduplicated, and a single LLM call answers
+    from the fused contexts (the chain-level ensembles make 2-3 LLM calls).
+    
+    Args:
+        naive_retriever: Vector similarity retriever
+        bm25_reranker_retriever: BM25 + Reranker retriever
+        model_factory: Model factory instance
+        weights: [naive_weight, bm25_weight] - default [0.5, 0.5]
+        top_n: Maximum fused contexts passed to the LLM
+    
+    Returns:
+        Runnable chain with the same output keys as the other ensemble chains
+    """
+    rag_prompt = get_rag_prompt()
+    branches = RunnableParallel(naive=naive_retriever, bm25=bm25_reranker_retriever)
+    
+    def fuse(inputs):
+        start = time.perf_counter()
+        return {
+            "question": inputs["question"],
+            "branches": inputs["branches"],
+            "context": reciprocal_rank_fusion(
+                [inputs["branches"]["naive"], inputs["branches"]["bm25"]], weights, top_n=top_n
+            ),
+            "fusion_seconds": time.perf_counter() - start,
+        }
+    
+    def build_prompt(x):
+        return rag_prompt.format(
+            question=x["question"],
+            context="\n\n".join([doc.page_content for doc in x["context"]])
+        )
+    
+    def build_output(x, response, retrieval_seconds, generation_seconds):
+        return {
+            'response': response,
+            'contexts': [doc.page_content for doc in x["context"]],
+            'naive_contexts': [doc.page_content for doc in x["branches"]["naive"]],
+            'bm25_contexts': [doc.page_content for doc in x["branches"]["bm25"]],
+            'timings': {
+                'retrieval': round(retrieval_seconds, 3),
+                'fusion': round(x["fusion_seconds"], 3),
+                'generation': round(generation_seconds, 3),
+            }
         }
     
-    return RunnableLambda(ensemble_invoke_with_llm)
+    def retrieve(inputs, config):
+        start = time.perf_counter()
+        x = fuse({"question": inputs["question"], "branches": branches.invoke(inputs["question"], config)})
+        return x, time.perf_counter() - start
+    
+    async def aretrieve(inputs, config):
+        start = time.perf_counter()
+        x = fuse({"question": inputs["question"], "branches": await branches.ainvoke(inputs["question"], config)})
+        return x, time.perf_counter() - start
+    
+    def generate(inputs, config):
+        x, retrieval_seconds = retrieve(inputs, config)
+        start = time.perf_counter()
+        response = model_factory.get_llm().invoke(build_prompt(x), config).content
+        return build_output(x, response, retrieval_seconds, time.perf_counter() - start)
+    
+    async def agenerate(inputs, config):
+        x, retrieval_seconds = await aretrieve(inputs, config)
+        start = time.perf_counter()
+        response = (await model_factory.get_llm().ainvoke(build_prompt(x), config)).content
+        return build_output(x, response, retrieval_seconds, time.perf_counter() - start)
+    
+    return RunnableLambda(generate, afunc=agenerate)
 
 def create_ensemble_retriever(vector_store, chunked_docs, model_factory, naive_k=3, bm25_k=12, rerank_k=4):
     """
@@ -121,9 +335,8 @@ def create_ensemble_retriever(vector_store, chunked_docs, model_factory, naive_k
         rerank_k: Number of docs after reranking
     
     Returns:
-        EnsembleRetriever instance
+        ReciprocalRankFusionRetriever instance (retrievers queried concurrently)
     """
-    from langchain.retrievers import EnsembleRetriever
     from src.rag.naive_retriever import create_naive_retriever
     from src.rag.bm25_reranker_retriever import create_bm25_reranker_retriever
     
@@ -131,8 +344,8 @@ def create_ensemble_retriever(vector_store, chunked_docs, model_factory, naive_k
     naive_retriever = create_naive_retriever(vector_store, k=naive_k)
     bm25_reranker_retriever = create_bm25_reranker_retriever(chunked_docs, bm25_k, rerank_k)
     
-    # Create ensemble retriever
-    ensemble_retriever = EnsembleRetriever(
+    # Create ensemble retriever: reciprocal-rank fusion with deduplication
+    ensemble_retriever = ReciprocalRankFusionRetriever(
         retrievers=[naive_retriever, bm25_reranker_retriever],
         weights=[0.5, 0.5]  # Equal weights
     )
@@ -0,0 +1,196 @@
+"""
+Rerankers for SREnity retrieval
+Pluggable document compressors that reorder BM25 candidates, with an LRU result cache
+
+- LocalReranker: BM25 over the candidate set blended with embedding cosine
+  similarity. Vectors come through CachedEmbeddings, so indexed chunks and
+  repeated queries are not re-embedded and scoring runs on CPU.
+- CohereReranker: Cohere rerank-v3.5 (needs COHERE_API_KEY), the default.
+
+Both cache their ranking per (query, candidate chunks, top_n), so repeated
+queries (agent retries, ensemble branches, evaluation runs) skip scoring.
+A degraded ranking (embeddings unavailable) is returned but not cached.
+"""
+import math
+import threading
+from abc import abstractmethod
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+from pydantic import PrivateAttr
+
+from src.rag.bm25_index import BM25_B, BM25_K1, document_key, tokenize
+
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_LEXICAL_WEIGHT = 0.5
+RERANKER_BACKENDS = ("cohere", "local")
+
+
+class CachedReranker(BaseDocumentCompressor):
+    """
+    Base reranker: subclasses implement `rank`, this class keeps the top_n
+    and caches complete rankings in an LRU keyed by query and candidate
+    content keys.
+    """
+    top_n: int = 3
+    cache_size: int = DEFAULT_CACHE_SIZE
+
+    _cache: "OrderedDict[tuple, List[Tuple[int, float]]]" = PrivateAttr(default_factory=OrderedDict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    @abstractmethod
+    def rank(self, documents: Sequence[Document], query: str) -> Tuple[List[Tuple[int, float]], bool]:
+        """(candidate index, relevance score) pairs, best first, and whether the ranking may be cached"""
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Optional[Callbacks] = None,
+    ) -> Sequence[Document]:
+        if not documents:
+            return []
+        cache_key = (query, tuple(document_key(doc) for doc in documents), self.top_n)
+        with self._lock:
+            ranking = self._cache.get(cache_key)
+            if ranking is not None:
+                self._cache.move_to_end(cache_key)
+                self._hits += 1
+            else:
+                self._misses += 1
+
+        if ranking is None:
+            ranking, complete = self.rank(documents, query)
+            ranking = ranking[: self.top_n]
+            if complete:
+                with self._lock:
+                    self._cache[cache_key] = ranking
+                    self._cache.move_to_end(cache_key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+
+        return [
+            Document(
+                page_content=documents[index].page_content,
+                metadata={**documents[index].metadata, "relevance_score": score},
+            )
+            for index, score in ranking
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the ranking cache"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._cache),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            }
+
+
+class LocalReranker(CachedReranker):
+    """
+    CPU reranker: lexical BM25 over the candidates blended with embedding cosine
+
+    score = lexical_weight * bm25 + (1 - lexical_weight) * cosine, with the
+    BM25 part normalized to [0, 1) (IDF taken over the candidate set).
+    `embeddings` is a CachedEmbeddings: chunk vectors are usually cached
+    from indexing and the query vector from the vector branch, and anything
+    missing is embedded (and cached) here. If embedding fails, candidates
+    are ranked lexically for this call only.
+    """
+    embeddings: Any = None
+    lexical_weight: float = DEFAULT_LEXICAL_WEIGHT
+
+    def lexical_scores(self, documents: Sequence[Document], query: str) -> np.ndarray:
+        query_terms = set(tokenize(query))
+        counts = [Counter(tokenize(doc.page_content)) for doc in documents]
+        if not query_terms:
+            return np.zeros(len(documents))
+        lengths = np.array([sum(c.values()) for c in counts], dtype=np.float64)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+        scores = np.zeros(len(documents))
+        best = 0.0
+        for term in query_terms:
+            freqs = np.array([c.get(term, 0) for c in counts], dtype=np.float64)
+            df = int((freqs > 0).sum())
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            scores += idf * freqs * (BM25_K1 + 1) / (freqs + norm)
+            best += idf * (BM25_K1 + 1)
+        return scores / best
+
+    def cosine_scores(self, documents: Sequence[Document], query: str) -> Optional[np.ndarray]:
+        """Cosine similarity of each candidate to the query; None if embedding fails"""
+        try:
+            query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float64)
+            doc_vectors = np.asarray(
+                self.embeddings.embed_documents([doc.page_content for doc in documents]), dtype=np.float64
+            )
+        except Exception as e:
+            print(f"⚠️ Reranker embeddings unavailable ({type(e).__name__}); ranking lexically")
+            return None
+        norms = np.linalg.norm(doc_vectors, axis=1) * np.linalg.norm(query_vector)
+        return doc_vectors @ query_vector / np.where(norms > 0, norms, 1.0)
+
+    def rank(self, documents: Sequence[Document], query: str) -> Tuple[List[Tuple[int, float]], bool]:
+        scores = self.lexical_scores(documents, query)
+        # Without embeddings configured the lexical ranking is the intended one
+        complete = self.embeddings is None
+        if not complete:
+            cosine = self.cosine_scores(documents, query)
+            if cosine is not None:
+                scores = self.lexical_weight * scores + (1 - self.lexical_weight) * cosine
+                complete = True
+        order = np.argsort(-scores, kind="stable")
+        return [(int(index), float(scores[index])) for index in order], complete
+
+
+class CohereReranker(CachedReranker):
+    """Cohere rerank API behind the ranking cache"""
+    cohere_api_key: str
+    model: str = "rerank-v3.5"
+
+    _client: Any = PrivateAttr(default=None)
+
+    def rank(self, documents: Sequence[Document], query: str) -> Tuple[List[Tuple[int, float]], bool]:
+        if self._client is None:
+            from langchain.retrievers.document_compressors import CohereRerank
+            self._client = CohereRerank(cohere_api_key=self.cohere_api_key, model=self.model, top_n=self.top_n)
+        results = self._client.rerank(documents, query, top_n=self.top_n)
+        return [(result["index"], result["relevance_score"]) for result in results], True
+
+
+def create_reranker(top_n=3, backend=None, model_factory=None):
+    """
+    Create the configured reranker
+
+    Args:
+        top_n: Documents kept after reranking
+        backend: "cohere" or "local" - defaults to config.reranker_backend
+        model_factory: Source of embeddings for the local reranker
+
+    Returns:
+        CachedReranker usable as a ContextualCompressionRetriever compressor
+    """
+    from src.utils.config import get_config, get_model_factory
+
+    config = get_config()
+    backend = backend or config.reranker_backend
+    if backend not in RERANKER_BACKENDS:
+        raise ValueError(f"Unknown reranker backend '{backend}'. Available backends: {list(RERANKER_BACKENDS)}")
+
+    if backend == "cohere":
+        if config.cohere_api_key:
+            return CohereReranker(cohere_api_key=config.cohere_api_key, top_n=top_n)
+        print("⚠️ COHERE_API_KEY not found, using local reranker")
+
+    model_factory = model_factory or get_model_factory()
+    return LocalReranker(embeddings=model_factory.get_embeddings(), top_n=top_n)
@@ -10,6 +10,14 @@ from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 DEFAULT_QDRANT_PATH = str((PROJECT_ROOT / "qdrant_db").resolve())
+DEFAULT_EMBEDDING_CACHE_PATH = os.getenv(
+    "SRENITY_EMBEDDING_CACHE_DIR", str((PROJECT_ROOT / "embedding_cache").resolve())
+)
+DEFAULT_EMBEDDING_MEMORY_CACHE_SIZE = int(os.getenv("SRENITY_EMBEDDING_MEMORY_CACHE_SIZE", "2048"))
+DEFAULT_EMBEDDING_CACHE_MAX_MB = int(os.getenv("SRENITY_EMBEDDING_CACHE_MAX_MB", "1024"))
+DEFAULT_BM25_INDEX_PATH = os.getenv(
+    "SRENITY_BM25_INDEX_DIR", str((PROJECT_ROOT / "bm25_index").resolve())
+)
 
 @dataclass
 class Config:
@@ -25,10 +33,21 @@ class Config:
     qdrant_url: str = DEFAULT_QDRANT_PATH
     qdrant_collection_name: str = "srenity_runbooks"
     
+    # Persisted BM25 index (built next to the vector store, updated incrementally)
+    bm25_index_path: str = DEFAULT_BM25_INDEX_PATH
+    
+    # Persistent embedding cache (keyed by model name and content hash)
+    embedding_cache_path: str = DEFAULT_EMBEDDING_CACHE_PATH
+    embedding_memory_cache_size: int = DEFAULT_EMBEDDING_MEMORY_CACHE_SIZE  # vectors kept in process
+    embedding_cache_max_mb: int = DEFAULT_EMBEDDING_CACHE_MAX_MB  # on-disk limit, 0 for unbounded
+    
     # External APIs for enhanced retrieval
     tavily_api_key: str = None
     cohere_api_key: str = None
     
+    # Reranker for BM25 candidates: "cohere" (needs COHERE_API_KEY) or "local" (CPU)
+    reranker_backend: str = "cohere"
+    
     # Observability
     langsmith_api_key: str = None
     langsmith_project: str = "srenity"
@@ -55,6 +74,7 @@ class Config:
             # Only read sensitive data from env, use defaults for everything else
             tavily_api_key=os.getenv("TAVILY_API_KEY"),
             cohere_api_key=os.getenv("COHERE_API_KEY"),
+            reranker_backend=os.getenv("SRENITY_RERANKER", "cohere"),
             langsmith_api_key=os.getenv("LANGSMITH_API_KEY"),
             langsmith_project=os.getenv("LANGCHAIN_PROJECT", "srenity")
         )
@@ -67,11 +87,20 @@ class ModelFactory:
         self.config = config
     
     def get_embeddings(self):
-        """Get embeddings model instance"""
-        return OpenAIEmbeddings(
+        """Get embeddings model instance backed by the two-level embedding cache (documents and queries)"""
+        from src.utils.embedding_cache import CachedEmbeddings
+        
+        embeddings = OpenAIEmbeddings(
             model=self.config.openai_embedding_model,
             openai_api_key=self.config.openai_api_key
         )
+        return CachedEmbeddings(
+            embeddings,
+            model_name=self.config.openai_embedding_model,
+            cache_dir=self.config.embedding_cache_path,
+            memory_entries=self.config.embedding_memory_cache_size,
+            max_mb=self.config.embedding_cache_max_mb
+        )
     
     def get_llm(self):
         """Get LLM model instance"""
@@ -86,6 +86,28 @@ def get_or_create_vector_store(chunked_docs=None):
         return create_vector_store(chunked_docs)
 
 
+def get_or_create_bm25_index(chunked_docs=None):
+    """Load the persisted BM25 index, bringing it in line with chunked_docs if given"""
+    from src.rag.bm25_index import get_bm25_index
+    
+    config = get_config()
+    bm25_index = get_bm25_index(config.bm25_index_path)
+    
+    if chunked_docs is None:
+        if not len(bm25_index):
+            raise ValueError("chunked_docs required when creating new BM25 index")
+        print(f"Loaded BM25 index from {config.bm25_index_path}")
+        return bm25_index
+    
+    # sync holds the index lock, so concurrent workers build it only once
+    changes = bm25_index.sync(chunked_docs)
+    if changes["added"] or changes["deleted"]:
+        print(f"Updated BM25 index at {config.bm25_index_path}: +{changes['added']} / -{changes['deleted']} chunks")
+    stats = bm25_index.stats()
+    print(f"BM25 index ready: {stats['documents']} chunks in {stats['segments']} segment(s)")
+    return bm25_index
+
+
 def create_database_components():
     """Create database components (vector_store, chunked_docs)"""
     config = get_config()
@@ -112,4 +134,8 @@ def create_database_components():
     print("🔄 Creating/loading vector store...")
     vector_store = get_or_create_vector_store(chunked_docs)
     
+    # Create or update the BM25 index alongside it
+    print("🔄 Creating/loading BM25 index...")
+    get_or_create_bm25_index(chunked_docs)
+    
     return vector_store, chunked_docs
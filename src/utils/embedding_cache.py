@@ -0,0 +1,281 @@
+"""
+Two-level embedding cache for SREnity
+An in-process LRU in front of an on-disk store, keyed by embedding model and content hash
+"""
+import asyncio
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+DEFAULT_MEMORY_ENTRIES = 2048
+DEFAULT_MAX_MB = 1024
+# Eviction trims the on-disk store to this fraction of its limit
+EVICTION_TARGET = 0.9
+# Last-use times are written to disk in batches of this many entries
+TOUCH_FLUSH_BATCH = 256
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Content-addressed cache key for a text embedded with a given model"""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Key/vector cache shared by every cached embeddings object
+
+    Lookups try a bounded in-process LRU first, then SQLite. Disk entries
+    record when they were last used, and once the store outgrows `max_bytes`
+    the least recently used entries are evicted. Last-use times are kept in
+    memory and written in batches (with new vectors, before eviction, or
+    every TOUCH_FLUSH_BATCH entries), so a lookup never commits on its own.
+    """
+
+    def __init__(self, cache_dir: str, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_bytes: Optional[int] = DEFAULT_MAX_MB * 1024 * 1024):
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path = str(Path(cache_dir) / "embeddings.sqlite3")
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._touched: Dict[str, int] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, "
+            "last_used INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "last_used" not in columns:
+            # Stores created before size-based eviction
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._bytes = self._stored_bytes()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def _stored_bytes(self) -> int:
+        (size,) = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        return size
+
+    def _remember(self, key: str, vector: array) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the stored vectors for whichever keys are present"""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    disk_keys.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector.tolist()
+            self.memory_hits += len(found)
+            now = time.time_ns()
+
+            disk_found = 0
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(disk_keys), 500):
+                batch = disk_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("d", blob)
+                    self._remember(key, vector)
+                    found[key] = vector.tolist()
+                disk_found += len(rows)
+            for key in found:
+                self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+            self.disk_hits += disk_found
+            self.misses += len(set(disk_keys)) - disk_found
+        return found
+
+    def _flush_touched(self) -> None:
+        """Write pending last-use times (caller commits)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched = {}
+
+    def put_many(self, model_name: str, items: Dict[str, List[float]]) -> None:
+        """Store vectors, replacing any existing entry with the same key"""
+        if not items:
+            return
+        with self._lock:
+            now = time.time_ns()
+            rows = []
+            for key, vector in items.items():
+                vector = array("d", vector)
+                self._remember(key, vector)
+                rows.append((key, model_name, vector.tobytes(), now))
+                self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._bytes += sum(len(row[2]) for row in rows)
+            if self.max_bytes and self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Replaced entries were counted twice above; recount before deciding
+        self._bytes = self._stored_bytes()
+        (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if not entries or self._bytes <= self.max_bytes:
+            return
+        excess = self._bytes - self.max_bytes * EVICTION_TARGET
+        count = math.ceil(excess / (self._bytes / entries))
+        cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (count,)
+        )
+        self._conn.commit()
+        self.evictions += cursor.rowcount
+        self._bytes = self._stored_bytes()
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters and size of both cache levels"""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.memory_entries,
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Stores are shared per directory so every embeddings wrapper sees one cache
+_stores: Dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(cache_dir: Optional[str] = None, memory_entries: Optional[int] = None,
+                        max_mb: Optional[int] = None) -> EmbeddingStore:
+    """Get the shared embedding store for a cache directory (sizes apply when it is first opened)"""
+    from src.utils.config import (
+        DEFAULT_EMBEDDING_CACHE_MAX_MB,
+        DEFAULT_EMBEDDING_CACHE_PATH,
+        DEFAULT_EMBEDDING_MEMORY_CACHE_SIZE,
+    )
+    cache_dir = str(Path(cache_dir or DEFAULT_EMBEDDING_CACHE_PATH).resolve())
+    with _stores_lock:
+        if cache_dir not in _stores:
+            max_mb = DEFAULT_EMBEDDING_CACHE_MAX_MB if max_mb is None else max_mb
+            _stores[cache_dir] = EmbeddingStore(
+                cache_dir,
+                memory_entries=DEFAULT_EMBEDDING_MEMORY_CACHE_SIZE if memory_entries is None else memory_entries,
+                max_bytes=max_mb * 1024 * 1024 if max_mb else None,
+            )
+        return _stores[cache_dir]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends texts it has never seen to the model.
+
+    Document and query vectors are looked up by (model name, content hash),
+    in memory first and then in the persistent store; unchanged documents
+    and repeated queries are therefore never re-embedded, across requests
+    and across process restarts. Queries share keys with documents, as
+    OpenAI embeds both the same way.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache_dir: Optional[str] = None,
+                 memory_entries: Optional[int] = None, max_mb: Optional[int] = None):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.store = get_embedding_store(cache_dir, memory_entries, max_mb)
+
+    def _split_cached(self, texts: List[str]):
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        cached = self.store.get_many(list(dict.fromkeys(keys)))
+        # Embed each missing text once even if it appears several times
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        return keys, cached, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._split_cached(texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.store.put_many(self.model_name, computed)
+            cached.update(computed)
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # SQLite reads and writes stay off the event loop
+        keys, cached, missing = await asyncio.to_thread(self._split_cached, texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self.store.put_many, self.model_name, computed)
+            cached.update(computed)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_cache_key(self.model_name, text)
+        cached = self.store.get_many([key])
+        if key in cached:
+            return cached[key]
+        vector = self.underlying.embed_query(text)
+        self.store.put_many(self.model_name, {key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = embedding_cache_key(self.model_name, text)
+        cached = await asyncio.to_thread(self.store.get_many, [key])
+        if key in cached:
+            return cached[key]
+        vector = await self.underlying.aembed_query(text)
+        await asyncio.to_thread(self.store.put_many, self.model_name, {key: vector})
+        return vector
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters of both cache levels"""
+        return self.store.stats()
@@ -0,0 +1,132 @@
+"""
+Tests for the persisted BM25 index (src/rag/bm25_index.py)
+
+Run with: python -m pytest tests/test_bm25_index.py
+"""
+import multiprocessing
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.rag.bm25_index import MANIFEST_FILE, BM25Index, document_key
+
+
+def make_docs():
+    return [
+        Document(page_content="redis memory eviction policy allkeys-lru", metadata={"source": "redis.md"}),
+        Document(page_content="postgres connection pool exhausted too many clients", metadata={"source": "db.md"}),
+        Document(page_content="nginx 502 bad gateway upstream timeout", metadata={"source": "web.md"}),
+        Document(page_content="redis replication lag and failover", metadata={"source": "redis.md"}),
+    ]
+
+
+def sources(results):
+    return [doc.page_content for doc in results]
+
+
+def test_build_and_search(tmp_path):
+    index = BM25Index(tmp_path)
+    index.rebuild(make_docs())
+
+    results = index.search_with_scores("redis eviction", k=2)
+    assert results[0][0].page_content == "redis memory eviction policy allkeys-lru"
+    assert results[0][1] > results[1][1] > 0
+    assert results[0][0].metadata == {"source": "redis.md"}
+    # Documents sharing no query term are not returned
+    assert index.search("kubernetes", k=3) == []
+
+
+def test_reload_from_disk(tmp_path):
+    BM25Index(tmp_path).rebuild(make_docs())
+
+    reloaded = BM25Index(tmp_path)
+    assert len(reloaded) == 4
+    assert sources(reloaded.search("connection pool", k=1)) == [
+        "postgres connection pool exhausted too many clients"
+    ]
+
+
+def test_add_writes_delta_segment(tmp_path):
+    index = BM25Index(tmp_path)
+    index.rebuild(make_docs())
+
+    new = Document(page_content="kafka consumer lag rebalancing", metadata={"source": "kafka.md"})
+    assert index.add_documents([new, make_docs()[0]]) == 1  # existing chunk is skipped
+    assert index.stats()["segments"] == 2
+    assert sources(BM25Index(tmp_path).search("kafka", k=1)) == [new.page_content]
+
+
+def test_delete_tombstones_and_persists(tmp_path):
+    index = BM25Index(tmp_path)
+    index.rebuild(make_docs())
+
+    assert index.delete_documents([make_docs()[0]]) == 1
+    assert "allkeys" not in " ".join(sources(index.search("redis eviction", k=4)))
+    reloaded = BM25Index(tmp_path)
+    assert len(reloaded) == 3
+    assert document_key(make_docs()[0]) not in reloaded
+
+
+def test_sync_adds_and_removes(tmp_path):
+    index = BM25Index(tmp_path)
+    index.rebuild(make_docs())
+
+    docs = make_docs()[1:] + [Document(page_content="dns resolution failure", metadata={"source": "dns.md"})]
+    assert index.sync(docs) == {"added": 1, "deleted": 1, "documents": 4}
+    assert index.sync(docs) == {"added": 0, "deleted": 0, "documents": 4}
+
+
+def test_compact_merges_segments_and_drops_tombstones(tmp_path):
+    index = BM25Index(tmp_path)
+    index.rebuild(make_docs())
+    index.add_documents([Document(page_content="kafka consumer lag", metadata={"source": "kafka.md"})])
+    index.delete_documents([make_docs()[2]])
+    before = sources(index.search("redis lag", k=5))
+
+    index.compact()
+    stats = index.stats()
+    assert (stats["segments"], stats["tombstones"], stats["documents"]) == (1, 0, 4)
+    assert sources(index.search("redis lag", k=5)) == before
+    assert sorted(path.name for path in tmp_path.glob("seg-*")) == [index._segments[0].name]
+
+
+def test_stale_instance_sees_other_writers(tmp_path):
+    first, second = BM25Index(tmp_path), BM25Index(tmp_path)
+    first.rebuild(make_docs())
+    # second was created before the build and must not reuse segment names
+    second.add_documents([Document(page_content="kafka consumer lag", metadata={"source": "kafka.md"})])
+    first.compact()
+    second.add_documents([Document(page_content="dns resolution failure", metadata={"source": "dns.md"})])
+
+    assert len(BM25Index(tmp_path)) == 6
+    assert len(first) == 6
+    assert sources(first.search("dns", k=1)) == ["dns resolution failure"]
+
+
+def _sync_worker(path, queue):
+    try:
+        queue.put(BM25Index(path).sync(make_docs())["documents"])
+    except Exception as e:  # Reported to the parent process
+        queue.put(repr(e))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="cross-process locking needs fcntl")
+def test_concurrent_processes_build_once(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    workers = [context.Process(target=_sync_worker, args=(str(tmp_path), queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert [queue.get(timeout=5) for _ in workers] == [4, 4, 4, 4]
+    assert BM25Index(tmp_path).stats()["segments"] == 1
+    assert not [path for path in tmp_path.iterdir() if ".tmp-" in path.name]
+    assert (tmp_path / MANIFEST_FILE).exists()
@@ -0,0 +1,120 @@
+"""
+Tests for the scenario catalog and its bundle cache (backend/ingest/catalog.py)
+
+Run with: python -m pytest tests/test_catalog.py
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.ingest.catalog import ScenarioCatalog
+
+
+WEB_LOG = "\n".join([
+    "=== WEB TIER LOGS ===",
+    "2024-01-15T14:30:01Z [INFO] [trace_id:a] [AZ:us-east-1a] [Apache] GET /cart - 200 OK - 40ms",
+    "2024-01-15T14:30:02Z [ERROR] [trace_id:b] [AZ:us-east-1a] [Apache] GET /pay - 502 Bad Gateway - 5234ms",
+    "2024-01-15T14:30:03Z [ERROR] [trace_id:c] [AZ:us-east-1a] [Apache] GET /pay - 502 Bad Gateway - 5100ms",
+])
+
+
+def make_logs_dir(tmp_path, scenarios=("scenario1", "scenario2", "scenario3")):
+    for scenario_id in scenarios:
+        (tmp_path / scenario_id).mkdir()
+        (tmp_path / scenario_id / "web.log").write_text(WEB_LOG + "\n")
+    return tmp_path
+
+
+class CountingLoader:
+    """Reads each scenario's web.log and records every call"""
+
+    def __init__(self, logs_dir):
+        self.logs_dir = logs_dir
+        self.calls = []
+
+    def __call__(self, scenario_id, start, end, latency_sketches=None):
+        self.calls.append((scenario_id, start, end))
+        return {"web": (self.logs_dir / scenario_id / "web.log").read_text()}
+
+
+def test_index_lists_tiers_and_error_signatures(tmp_path):
+    catalog = ScenarioCatalog(make_logs_dir(tmp_path), CountingLoader(tmp_path))
+
+    assert catalog.scenario_ids() == ["scenario1", "scenario2", "scenario3"]
+    web = catalog.get("scenario1").tiers["web"]
+    assert (web.lines, web.error_lines) == (3, 2)
+    assert web.first_timestamp == "2024-01-15T14:30:01+00:00"
+    assert web.signatures[0].startswith("x2 [ERROR]")
+    with pytest.raises(KeyError, match="Unknown scenario"):
+        catalog.get("missing")
+
+
+def test_resolve_is_stable_per_key(tmp_path):
+    catalog = ScenarioCatalog(make_logs_dir(tmp_path), CountingLoader(tmp_path))
+
+    assert catalog.resolve("scenario2", key="anything") == "scenario2"
+    picks = {catalog.resolve(key=f"alert-{i}") for i in range(50)}
+    assert picks == {"scenario1", "scenario2", "scenario3"}
+    assert all(catalog.resolve(key="alert-7") == catalog.resolve(key="alert-7") for _ in range(5))
+
+
+def test_equivalent_windows_share_one_bundle(tmp_path):
+    loader = CountingLoader(make_logs_dir(tmp_path))
+    catalog = ScenarioCatalog(tmp_path, loader)
+
+    first = catalog.load("scenario1", "2024-01-15T14:30:00Z", "2024-01-15T15:00:00Z")
+    second = catalog.load("scenario1", "2024-01-15T16:30:00+02:00", "2024-01-15T15:00:00+00:00")
+
+    assert second is first
+    assert len(loader.calls) == 1
+    assert catalog.stats()["hits"] == 1
+    assert "502 Bad Gateway" in first.samples["web"]
+
+
+def test_changed_files_invalidate_the_bundle(tmp_path):
+    loader = CountingLoader(make_logs_dir(tmp_path))
+    catalog = ScenarioCatalog(tmp_path, loader)
+    catalog.load("scenario1")
+
+    log = tmp_path / "scenario1" / "web.log"
+    log.write_text(WEB_LOG + "\n2024-01-15T14:30:04Z [WARN] [Apache] upstream slow - 900ms\n")
+    os.utime(log, ns=(log.stat().st_atime_ns, log.stat().st_mtime_ns + 1_000_000_000))
+    bundle = catalog.load("scenario1")
+
+    assert len(loader.calls) == 2
+    assert "upstream slow" in bundle.samples["web"]
+    assert catalog.stats()["invalidations"] == 1
+
+
+def test_cache_is_bounded_by_bytes(tmp_path):
+    loader = CountingLoader(make_logs_dir(tmp_path))
+    one_bundle = ScenarioCatalog(tmp_path, loader).load("scenario1").nbytes
+    catalog = ScenarioCatalog(tmp_path, loader, max_bytes=2 * one_bundle + one_bundle // 2)
+
+    for scenario_id in ["scenario1", "scenario2", "scenario1", "scenario3"]:
+        catalog.load(scenario_id)
+
+    stats = catalog.stats()
+    assert stats["cached_bundles"] == 2
+    assert stats["cached_bytes"] <= stats["cache_max_bytes"]
+    # scenario2 was least recently used, so it was the one evicted
+    calls = len(loader.calls)
+    catalog.load("scenario1")
+    catalog.load("scenario3")
+    assert len(loader.calls) == calls
+    catalog.load("scenario2")
+    assert len(loader.calls) == calls + 1
+
+
+def test_oversized_bundle_is_served_but_not_kept(tmp_path):
+    catalog = ScenarioCatalog(make_logs_dir(tmp_path), CountingLoader(tmp_path), max_bytes=1)
+
+    assert "web" in catalog.load("scenario1").samples
+    assert catalog.stats()["cached_bundles"] == 0
+    assert catalog.stats()["cached_bytes"] == 0
@@ -0,0 +1,66 @@
+"""
+Tests for cross-tier trace correlation (backend/analysis/correlation.py)
+
+Run with: python -m pytest tests/test_correlation.py
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.correlation import build_trace_index, correlate_tier_logs, tier_spans
+from backend.analysis.parser import parse_log
+
+
+LOGS = {
+    "web": "\n".join([
+        "2024-01-15T14:30:00Z [INFO] [trace_id:ok-1] [ELB:alb] [Apache] GET /cart - 200 OK - 80ms",
+        "2024-01-15T14:30:01Z [WARN] [trace_id:bad-1] [ELB:alb] [Apache] GET /pay - retrying - 900ms",
+        "2024-01-15T14:30:02Z [ERROR] [trace_id:bad-1] [ELB:alb] [Apache] GET /pay - 502 Bad Gateway - 5234ms",
+        "2024-01-15T14:30:03Z [INFO] [trace_id:web-only] [ELB:alb] [Apache] GET / - 200 OK - 10ms",
+    ]),
+    "app": "\n".join([
+        "2024-01-15T14:30:00Z [INFO] [trace_id:ok-1] [Service:cart] loaded cart - 45ms",
+        "2024-01-15T14:30:01Z [ERROR] [trace_id:bad-1] [Service:payment] upstream timeout - 5000ms",
+    ]),
+    "db": "2024-01-15T14:30:01Z [INFO] [trace_id:bad-1] [DB:orders-1] [Service:postgres] query ok - 18ms",
+}
+
+
+def test_spans_keep_worst_level_and_max_latency():
+    spans = tier_spans(parse_log(LOGS["web"], "web"))
+    bad = spans["bad-1"]
+
+    assert bad.level == "ERROR"
+    assert bad.line_count == 2
+    assert bad.max_latency_ms == 5234.0
+    assert bad.outcome == "502"
+    assert spans["ok-1"].render() == "web 200 80ms"
+
+
+def test_index_joins_tiers_on_trace_id():
+    index = build_trace_index({tier: parse_log(text, tier) for tier, text in LOGS.items()})
+
+    assert set(index["bad-1"]) == {"web", "app", "db"}
+    assert set(index["ok-1"]) == {"web", "app"}
+    assert set(index["web-only"]) == {"web"}
+
+
+def test_table_lists_failing_traces_first():
+    table = correlate_tier_logs(LOGS)
+    lines = table.splitlines()
+
+    assert lines[0] == "2 traces span multiple tiers (1 with errors or warnings)."
+    assert "  1x web 502 <- app ERROR <- db OK" in lines
+    traces = [line for line in lines if line.startswith("  trace ")]
+    assert traces == [
+        "  trace bad-1: web 502 5234ms <- app ERROR 5000ms <- db OK 18ms",
+        "  trace ok-1: web 200 80ms <- app OK 45ms",
+    ]
+    assert "web-only" not in table
+
+
+def test_no_table_without_shared_traces():
+    assert correlate_tier_logs({"web": LOGS["web"], "app": ""}) == ""
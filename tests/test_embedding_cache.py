@@ -0,0 +1,93 @@
+"""
+Tests for the two-level embedding cache (src/utils/embedding_cache.py)
+
+Run with: python -m pytest tests/test_embedding_cache.py
+"""
+import sys
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.embedding_cache import CachedEmbeddings, EmbeddingStore, embedding_cache_key
+
+
+DIMENSIONS = 8
+VECTOR_BYTES = DIMENSIONS * 8
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake model that records every text it embeds"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text) + i) for i in range(DIMENSIONS)] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def vector(seed):
+    return [float(seed)] * DIMENSIONS
+
+
+def test_store_round_trip_and_persistence(tmp_path):
+    store = EmbeddingStore(str(tmp_path), memory_entries=2)
+    store.put_many("model", {"a": vector(1), "b": vector(2), "c": vector(3)})
+
+    # "a" fell out of the memory LRU but is still on disk
+    assert store.get_many(["a", "missing"]) == {"a": vector(1)}
+    assert (store.memory_hits, store.disk_hits, store.misses) == (0, 1, 1)
+
+    reopened = EmbeddingStore(str(tmp_path))
+    assert reopened.get_many(["b", "c"]) == {"b": vector(2), "c": vector(3)}
+
+
+def test_eviction_keeps_recently_used_entries(tmp_path):
+    store = EmbeddingStore(str(tmp_path), memory_entries=1, max_bytes=10 * VECTOR_BYTES)
+    for index in range(10):
+        store.put_many("model", {f"key-{index}": vector(index)})
+    assert store.evictions == 0
+
+    # Using the oldest entry makes it the most recently used one
+    store.get_many(["key-0"])
+    store.put_many("model", {"key-10": vector(10)})
+
+    stats = store.stats()
+    assert store.evictions > 0
+    assert stats["bytes"] <= 10 * VECTOR_BYTES
+    assert stats["bytes"] == stats["entries"] * VECTOR_BYTES
+    reopened = EmbeddingStore(str(tmp_path), max_bytes=None)
+    kept = reopened.get_many([f"key-{index}" for index in range(11)])
+    assert "key-0" in kept and "key-10" in kept
+    assert "key-1" not in kept
+
+
+def test_replacing_an_entry_does_not_evict(tmp_path):
+    store = EmbeddingStore(str(tmp_path), max_bytes=3 * VECTOR_BYTES)
+    store.put_many("model", {"a": vector(1), "b": vector(2), "c": vector(3)})
+    store.put_many("model", {"a": vector(4)})
+
+    assert store.evictions == 0
+    assert store.get_many(["a"]) == {"a": vector(4)}
+
+
+def test_cached_embeddings_only_embeds_unseen_texts(tmp_path):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, "fake-model", cache_dir=str(tmp_path))
+
+    first = embeddings.embed_documents(["redis timeout", "nginx 502", "redis timeout"])
+    second = embeddings.embed_documents(["nginx 502", "db deadlock"])
+    query = embeddings.embed_query("redis timeout")
+
+    assert model.embedded == ["redis timeout", "nginx 502", "db deadlock"]
+    assert first[0] == first[2] == query
+    assert second[0] == first[1]
+    key = embedding_cache_key("fake-model", "db deadlock")
+    assert embeddings.store.get_many([key]) == {key: second[1]}
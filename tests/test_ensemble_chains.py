@@ -0,0 +1,84 @@
+"""
+Tests for the concurrent chain-level ensembles (src/rag/ensemble_retriever.py)
+
+Run with: python -m pytest tests/test_ensemble_chains.py
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.rag.ensemble_retriever import create_ensemble_chain, create_ensemble_chain_with_llm_combination
+
+
+BRANCH_SECONDS = 0.3
+
+
+def slow_chain(name, barrier=None):
+    """A sub-chain that takes BRANCH_SECONDS; with a barrier it only finishes once both branches run"""
+    def run(inputs):
+        if barrier is not None:
+            barrier.wait()
+        time.sleep(BRANCH_SECONDS)
+        return {"response": f"{name} answer", "contexts": [f"{name} context 1", f"{name} context 2"]}
+
+    async def arun(inputs):
+        await asyncio.sleep(BRANCH_SECONDS)
+        return {"response": f"{name} answer", "contexts": [f"{name} context 1", f"{name} context 2"]}
+
+    return RunnableLambda(run, afunc=arun)
+
+
+class FakeModelFactory:
+    def get_llm(self):
+        return FakeListChatModel(responses=["combined answer"])
+
+
+def test_sync_branches_run_at_the_same_time():
+    # Each branch blocks until the other has started, so a sequential run would time out
+    barrier = threading.Barrier(2, timeout=5)
+    chain = create_ensemble_chain(slow_chain("naive", barrier), slow_chain("bm25", barrier))
+
+    result = chain.invoke({"question": "why is checkout slow?"})
+
+    assert result["response"] == "naive answer"
+    assert result["contexts"] == ["naive context 1", "bm25 context 1"]
+    assert set(result["timings"]) == {"naive", "bm25"}
+    assert all(seconds >= BRANCH_SECONDS for seconds in result["timings"].values())
+
+
+def test_async_ensemble_takes_the_slower_branch_not_the_sum():
+    chain = create_ensemble_chain(slow_chain("naive"), slow_chain("bm25"))
+
+    start = time.perf_counter()
+    result = asyncio.run(chain.ainvoke({"question": "why is checkout slow?"}))
+
+    assert time.perf_counter() - start < 2 * BRANCH_SECONDS
+    assert result["bm25_response"] == "bm25 answer"
+
+
+def test_llm_combination_reports_every_step():
+    barrier = threading.Barrier(2, timeout=5)
+    chain = create_ensemble_chain_with_llm_combination(
+        slow_chain("naive", barrier), slow_chain("bm25", barrier), FakeModelFactory()
+    )
+
+    result = chain.invoke({"question": "why is checkout slow?"})
+    async_result = asyncio.run(
+        create_ensemble_chain_with_llm_combination(
+            slow_chain("naive"), slow_chain("bm25"), FakeModelFactory()
+        ).ainvoke({"question": "why is checkout slow?"})
+    )
+
+    for output in (result, async_result):
+        assert output["response"] == "combined answer"
+        assert len(output["contexts"]) == 4
+        assert set(output["timings"]) == {"naive", "bm25", "combination"}
@@ -0,0 +1,122 @@
+"""
+Tests for sequential vs parallel tier analysis (backend/analysis/graph.py)
+
+Run with: python -m pytest tests/test_graph_parallel.py
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# ChatOpenAI is only referenced for typing; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from backend.analysis.digest import digest_logs
+from backend.analysis.graph import create_multi_layer_graph
+
+
+TIERS = ["web", "app", "db", "cache"]
+LOGS = {
+    "web": "2024-01-15T14:30:00Z [ERROR] [trace_id:t-1] [AZ:us-east-1a] [Apache] GET /cart - 502 Bad Gateway - 3000ms",
+    "app": "2024-01-15T14:30:00Z [ERROR] [trace_id:t-1] [AZ:us-east-1a] [Service:checkout] upstream timeout - 2900ms",
+    "db": "2024-01-15T14:30:00Z [WARN] [trace_id:t-1] [AZ:us-east-1a] [DB:orders-1] slow query - 2800ms",
+    "cache": "",
+}
+SUMMARY = {
+    "summary_markdown": "# FINAL INCIDENT SUMMARY\nCheckout outage",
+    "root_cause": "database slowdown",
+    "recommendations": ["add an index"],
+    "evidence": ["slow query"],
+}
+
+
+class StubTool:
+    """Tier tool double that records its calls and how many ran at once"""
+
+    def __init__(self, tier, tracker):
+        self.tier = tier
+        self.tracker = tracker
+
+    async def ainvoke(self, args):
+        self.tracker["calls"].append((self.tier, args["digest"]))
+        self.tracker["running"] += 1
+        self.tracker["max_running"] = max(self.tracker["max_running"], self.tracker["running"])
+        await asyncio.sleep(0.05)
+        self.tracker["running"] -= 1
+        return f"{self.tier} analysis of {len(args['query'])} chars"
+
+
+async def search_runbooks(**kwargs):
+    return [{"action_title": "Scale the database", "source_url": "https://runbooks/db", "source_document": "db.md"}]
+
+
+def initial_state():
+    digest = digest_logs(LOGS)
+    state = {
+        "messages": [HumanMessage(content="Checkout is failing")],
+        "trace_correlation": digest.trace_correlation,
+        "log_statistics": digest.log_statistics,
+        "tier_digests": digest.tiers,
+        "next": "",
+        "tool_results": {},
+        "rca_summary_markdown": "",
+        "rca_root_cause": "",
+        "rca_recommendations": [],
+        "rca_evidence": [],
+        "runbook_results": [],
+    }
+    for tier in TIERS:
+        state[f"{tier}_log"] = digest.tiers[tier].prompt_sample if tier in digest.tiers else ""
+        state[f"{tier}_result"] = ""
+    return state
+
+
+def run_graph(parallel):
+    tracker = {"calls": [], "running": 0, "max_running": 0}
+    llm = FakeListChatModel(responses=[json.dumps(SUMMARY)] * 4)
+    graph = create_multi_layer_graph(
+        {tier: StubTool(tier, tracker) for tier in TIERS}, llm, search_runbooks, parallel=parallel
+    )
+    state = initial_state()
+    final = asyncio.run(graph.ainvoke(state, {"recursion_limit": 20}))
+    return final, tracker, state
+
+
+@pytest.fixture(scope="module")
+def runs():
+    return {parallel: run_graph(parallel) for parallel in (False, True)}
+
+
+def test_parallel_matches_sequential(runs):
+    sequential, _, _ = runs[False]
+    parallel, _, _ = runs[True]
+
+    for key in [f"{tier}_result" for tier in TIERS] + [
+        "rca_summary_markdown", "rca_root_cause", "rca_recommendations", "rca_evidence", "runbook_results",
+    ]:
+        assert parallel[key] == sequential[key], key
+    assert sorted(m.content for m in parallel["messages"]) == sorted(m.content for m in sequential["messages"])
+
+
+def test_each_tier_with_logs_runs_once_with_its_digest(runs):
+    for parallel in (False, True):
+        final, tracker, state = runs[parallel]
+        assert sorted(tier for tier, _ in tracker["calls"]) == ["app", "db", "web"]
+        for tier, digest in tracker["calls"]:
+            assert digest is state["tier_digests"][tier]
+        assert final["cache_result"] == ""
+        assert final["rca_root_cause"] == "database slowdown"
+
+
+def test_only_parallel_mode_overlaps_tools(runs):
+    assert runs[False][1]["max_running"] == 1
+    assert runs[True][1]["max_running"] == 3
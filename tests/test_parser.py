@@ -0,0 +1,59 @@
+"""
+Tests for the structured tier log parser (backend/analysis/parser.py)
+
+Run with: python -m pytest tests/test_parser.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.parser import parse_log, parse_timestamps
+from backend.analysis.sampling import sample_logs
+
+
+WEB_LOG = "\n".join([
+    "2024-01-15T14:30:00.100Z [INFO] [trace_id:t-1] [ELB:web-alb] [AZ:us-east-1a] [EC2:i-01] [Apache] GET /cart - 200 OK - 120ms",
+    "2024-02-30T14:30:01.000Z [ERROR] [trace_id:t-2] [ELB:web-alb] [AZ:us-east-1b] [EC2:i-02] [Apache] GET /cart - 502 Bad Gateway - 30000ms",
+    "=== WEB TIER LOGS ===",
+    "2024-01-15T14:30:02.250Z [WARN] [trace_id:t-3] [ELB:web-alb] [AZ:us-east-1b] [EC2:i-02] [Apache] GET /pay - 504 Gateway Timeout - 5000ms",
+])
+
+
+def test_parse_columns():
+    parsed = parse_log(WEB_LOG, "web")
+
+    assert len(parsed) == 2
+    assert parsed.levels.values[parsed.level[0]] == "INFO"
+    assert parsed.azs.values[parsed.az[1]] == "us-east-1b"
+    assert parsed.instances.values[parsed.instance[1]] == "i-02"
+    assert parsed.latency_ms.tolist() == [120.0, 5000.0]
+    assert parsed.http_status.tolist() == [200, 504]
+    assert parsed.message(1).startswith("GET /pay")
+
+
+def test_invalid_timestamp_is_skipped_and_counted():
+    parsed = parse_log(WEB_LOG, "web")
+
+    assert parsed.invalid_timestamps == 1
+    assert [parsed.traces.values[code] for code in parsed.trace] == ["t-1", "t-3"]
+    # Every column is masked the same way
+    assert len(parsed.latency_ms) == len(parsed.message_start) == len(parsed.timestamp_ns) == 2
+    assert np.all(np.diff(parsed.timestamp_ns) > 0)
+
+
+def test_parse_timestamps_coerces_impossible_values():
+    parsed = parse_timestamps(["2024-01-15T14:30:00", "2024-13-01T00:00:00", "2024-01-15T25:00:00"])
+
+    assert not np.isnat(parsed[0])
+    assert np.isnat(parsed[1:]).all()
+
+
+def test_sampling_survives_invalid_timestamps():
+    sample = sample_logs(WEB_LOG, token_budget=10_000)
+
+    assert "t-1" in sample and "t-3" in sample
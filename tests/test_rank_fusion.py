@@ -0,0 +1,95 @@
+"""
+Tests for reciprocal-rank fusion (src/rag/ensemble_retriever.py)
+
+Run with: python -m pytest tests/test_rank_fusion.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+from typing import List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.rag.ensemble_retriever import RRF_K, ReciprocalRankFusionRetriever, reciprocal_rank_fusion
+
+
+def doc(text, source="runbook.md"):
+    return Document(page_content=text, metadata={"source": source})
+
+
+REDIS = doc("redis connection pool exhausted raise maxclients and recycle idle connections", "redis.md")
+NGINX = doc("nginx 502 bad gateway check upstream health and keepalive timeouts", "web.md")
+POSTGRES = doc("postgres deadlock detected retry the transaction and order lock acquisition", "db.md")
+DISK = doc("disk full on the database host rotate logs and expand the volume", "db.md")
+
+
+class StaticRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        return self.documents
+
+
+def contents(docs):
+    return [d.page_content for d in docs]
+
+
+def test_documents_in_both_lists_rank_first():
+    fused = reciprocal_rank_fusion([[NGINX, REDIS, POSTGRES], [DISK, REDIS, NGINX]])
+
+    # NGINX and REDIS are in both lists; ranks 1 + 3 narrowly beat 2 + 2
+    assert contents(fused[:2]) == contents([NGINX, REDIS])
+    assert set(contents(fused[2:])) == set(contents([POSTGRES, DISK]))
+
+
+def test_weights_break_ties_between_lists():
+    vector_first = reciprocal_rank_fusion([[NGINX], [DISK]], weights=[0.7, 0.3])
+    bm25_first = reciprocal_rank_fusion([[NGINX], [DISK]], weights=[0.3, 0.7])
+
+    assert contents(vector_first) == contents([NGINX, DISK])
+    assert contents(bm25_first) == contents([DISK, NGINX])
+
+
+def test_scores_follow_the_rrf_formula():
+    # Rank 1 in one list beats rank 2 + rank 40 across two lists only if
+    # 1/(k+1) > 1/(k+2) + 1/(k+40), which does not hold for the default k
+    filler = [doc(f"filler chunk {i} about something unrelated", f"f{i}.md") for i in range(38)]
+    fused = reciprocal_rank_fusion([[DISK, REDIS], [NGINX] + filler + [REDIS]])
+
+    assert 1 / (RRF_K + 1) < 1 / (RRF_K + 2) + 1 / (RRF_K + 40)
+    assert contents(fused[:1]) == contents([REDIS])
+
+
+def test_exact_and_near_duplicates_are_merged():
+    reformatted = doc("redis  connection pool exhausted\nraise maxclients and recycle idle connections", "redis.md")
+    overlapping = doc("redis connection pool exhausted raise maxclients and recycle idle connections now", "redis.md")
+    other_source = doc(REDIS.page_content, "cache-faq.md")
+
+    fused = reciprocal_rank_fusion([[REDIS, overlapping], [reformatted, other_source, NGINX]])
+
+    assert contents(fused).count(REDIS.page_content) == 2  # Once per source
+    assert overlapping.page_content not in contents(fused)
+    assert fused[0].metadata["source"] == "redis.md"
+
+
+def test_top_n_counts_kept_documents():
+    fused = reciprocal_rank_fusion([[REDIS, REDIS, NGINX, POSTGRES, DISK]], top_n=2)
+
+    assert contents(fused) == contents([REDIS, NGINX])
+
+
+def test_retriever_fuses_sync_and_async_identically():
+    retriever = ReciprocalRankFusionRetriever(
+        retrievers=[StaticRetriever(documents=[NGINX, REDIS]), StaticRetriever(documents=[REDIS, DISK])],
+        top_n=3,
+    )
+
+    sync_result = retriever.invoke("checkout errors")
+    async_result = asyncio.run(retriever.ainvoke("checkout errors"))
+
+    assert contents(sync_result) == contents(async_result) == contents([REDIS, NGINX, DISK])
@@ -0,0 +1,75 @@
+"""
+Tests for the memory-mapped, time-windowed log reader (backend/ingest/reader.py)
+
+Run with: python -m pytest tests/test_reader.py
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.ingest.reader import MappedLogReader, parse_log_timestamp, parse_time_bound, read_log_window
+
+
+BASE = datetime(2024, 1, 15, 14, 0, tzinfo=timezone.utc)
+
+
+def write_log(path, seconds=600):
+    lines = []
+    for i in range(seconds):
+        stamp = (BASE + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        lines.append(f"{stamp} [INFO] [trace_id:t-{i}] [Apache] GET /item/{i} - 200 OK - 30ms")
+        if i % 100 == 50:
+            lines.append("    at com.example.Handler.handle(Handler.java:42)")
+    path.write_text("\n".join(lines) + "\n")
+    return lines
+
+
+def test_parse_timestamps_and_bounds():
+    assert parse_log_timestamp("2024-01-15T14:00:00Z [INFO] x") == BASE
+    assert parse_log_timestamp(b"2024-01-15T16:00:00+02:00 ...") == BASE
+    assert parse_log_timestamp("    at com.example") is None
+    assert parse_time_bound("2024-01-15") == datetime(2024, 1, 15, tzinfo=timezone.utc)
+    assert parse_time_bound(None) is None
+    for bad in ["yesterday", "2024-01-15T14:00:00Z trailing", "2024-13-01"]:
+        with pytest.raises(ValueError):
+            parse_time_bound(bad)
+
+
+@pytest.mark.parametrize("stride", [256, 4096, 1 << 20])
+def test_window_matches_a_full_scan(tmp_path, stride):
+    path = tmp_path / "web.log"
+    lines = write_log(path)
+    start, end = BASE + timedelta(seconds=149), BASE + timedelta(seconds=353)
+
+    with MappedLogReader(path, index_stride=stride) as reader:
+        window = list(reader.iter_lines(start.isoformat(), end))
+
+    expected, in_window = [], False
+    for line in lines:
+        timestamp = parse_log_timestamp(line)
+        if timestamp is not None:
+            in_window = start <= timestamp < end
+        if in_window:
+            expected.append(line)
+    assert window == expected
+    # The continuation line after second 150 stays with its entry
+    assert "    at com.example.Handler.handle(Handler.java:42)" in window
+
+
+def test_unbounded_and_empty_windows(tmp_path):
+    path = tmp_path / "web.log"
+    lines = write_log(path, seconds=20)
+
+    assert read_log_window(path) == "\n".join(lines)
+    assert read_log_window(path, start="2024-01-16T00:00:00Z") == ""
+    assert read_log_window(path, end="2024-01-15T14:00:00Z") == ""
+
+    empty = tmp_path / "empty.log"
+    empty.write_text("")
+    assert read_log_window(empty) == ""
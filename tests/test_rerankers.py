@@ -0,0 +1,97 @@
+"""
+Tests for the cached rerankers (src/rag/rerankers.py)
+
+Run with: python -m pytest tests/test_rerankers.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.rag.rerankers import CachedReranker, LocalReranker
+
+
+CANDIDATES = [
+    Document(page_content="Restart the Apache web server after rotating certificates", metadata={"source": "a"}),
+    Document(page_content="Database connection pool exhausted: raise max connections", metadata={"source": "b"}),
+    Document(page_content="Apache returns 502 when the upstream app server is down", metadata={"source": "c"}),
+]
+
+
+class KeywordEmbeddings:
+    """Embeds text as counts of a few keywords; can be switched to fail"""
+
+    KEYWORDS = ("apache", "database", "502", "upstream")
+
+    def __init__(self):
+        self.fail = False
+        self.calls = 0
+
+    def _embed(self, text):
+        return [float(text.lower().count(keyword)) for keyword in self.KEYWORDS]
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("embedding service down")
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise ConnectionError("embedding service down")
+        return [self._embed(text) for text in texts]
+
+
+def test_base_reranker_is_abstract():
+    with pytest.raises(TypeError):
+        CachedReranker()
+
+
+def test_ranking_keeps_top_n_with_scores():
+    reranker = LocalReranker(embeddings=KeywordEmbeddings(), top_n=2)
+
+    ranked = reranker.compress_documents(CANDIDATES, "apache 502 upstream")
+
+    assert [doc.metadata["source"] for doc in ranked] == ["c", "a"]
+    assert ranked[0].metadata["relevance_score"] > ranked[1].metadata["relevance_score"]
+
+
+def test_repeated_queries_hit_the_cache():
+    embeddings = KeywordEmbeddings()
+    reranker = LocalReranker(embeddings=embeddings, top_n=2)
+
+    first = reranker.compress_documents(CANDIDATES, "apache 502 upstream")
+    second = reranker.compress_documents(CANDIDATES, "apache 502 upstream")
+
+    assert first == second
+    assert embeddings.calls == 1
+    assert reranker.stats()["hits"] == 1
+
+
+def test_degraded_ranking_is_not_cached():
+    embeddings = KeywordEmbeddings()
+    embeddings.fail = True
+    reranker = LocalReranker(embeddings=embeddings, top_n=2)
+
+    lexical = reranker.compress_documents(CANDIDATES, "database connections")
+    assert lexical[0].metadata["source"] == "b"
+    assert reranker.stats()["entries"] == 0
+
+    # Once embeddings recover, the blended ranking is computed and cached
+    embeddings.fail = False
+    reranker.compress_documents(CANDIDATES, "database connections")
+    assert embeddings.calls == 2
+    assert reranker.stats()["entries"] == 1
+
+
+def test_lexical_only_ranking_is_cached_without_embeddings():
+    reranker = LocalReranker(top_n=1)
+
+    assert reranker.compress_documents(CANDIDATES, "database pool")[0].metadata["source"] == "b"
+    assert reranker.stats()["entries"] == 1
+    assert reranker.compress_documents([], "database pool") == []
@@ -0,0 +1,79 @@
+"""
+Tests for rotated and compressed log segments (backend/ingest/rotation.py)
+
+Run with: python -m pytest tests/test_rotation.py
+"""
+import bz2
+import gzip
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.ingest.rotation import discover_segments, iter_tier_lines, ordered_segments, read_tier_window
+
+
+BASE = datetime(2024, 1, 15, 14, 0, tzinfo=timezone.utc)
+
+
+def lines_between(first, last):
+    return [
+        f"{(BASE + timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%SZ')} [INFO] [trace_id:t-{i}] [Apache] minute {i}"
+        for i in range(first, last)
+    ]
+
+
+def make_rotated_dir(tmp_path):
+    """web.log.3.bz2 < web.log.2.gz < web.log.1 < web.log, 30 minutes each"""
+    segments = {
+        "web.log.3.bz2": lines_between(0, 30),
+        "web.log.2.gz": lines_between(30, 60),
+        "web.log.1": lines_between(60, 90),
+        "web.log": lines_between(90, 120),
+    }
+    for name, lines in segments.items():
+        data = ("\n".join(lines) + "\n").encode()
+        if name.endswith(".gz"):
+            data = gzip.compress(data)
+        elif name.endswith(".bz2"):
+            data = bz2.compress(data)
+        (tmp_path / name).write_bytes(data)
+    (tmp_path / "app.log").write_text("\n".join(lines_between(0, 5)))
+    (tmp_path / "web.log.bak").write_text("not a segment")
+    return lines_between(0, 120)
+
+
+def test_discovery_and_ordering(tmp_path):
+    make_rotated_dir(tmp_path)
+
+    assert sorted(path.name for path in discover_segments(tmp_path, "web")) == [
+        "web.log", "web.log.1", "web.log.2.gz", "web.log.3.bz2",
+    ]
+    assert [path.name for path, _ in ordered_segments(tmp_path, "web")] == [
+        "web.log.3.bz2", "web.log.2.gz", "web.log.1", "web.log",
+    ]
+
+
+def test_streams_every_segment_oldest_first(tmp_path):
+    expected = make_rotated_dir(tmp_path)
+
+    assert list(iter_tier_lines(tmp_path, "web")) == expected
+
+
+def test_window_spans_segment_boundaries(tmp_path):
+    expected = make_rotated_dir(tmp_path)
+
+    window = read_tier_window(tmp_path, "web", "2024-01-15T14:25:00Z", "2024-01-15T15:35:00Z")
+
+    assert window.splitlines() == expected[25:95]
+
+
+def test_corrupt_archive_is_skipped(tmp_path, capsys):
+    expected = make_rotated_dir(tmp_path)
+    (tmp_path / "web.log.4.gz").write_bytes(b"not gzip at all")
+
+    assert list(iter_tier_lines(tmp_path, "web")) == expected
+    assert "skipping unreadable log segment" in capsys.readouterr().out
@@ -0,0 +1,57 @@
+"""
+Tests for token-budgeted log sampling (backend/analysis/sampling.py)
+
+Run with: python -m pytest tests/test_sampling.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.sampling import count_tokens, sample_logs
+
+
+def info_line(i):
+    return (
+        f"2024-01-15T{10 + i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z [INFO] [trace_id:t-{i}] "
+        f"[AZ:us-east-1a] [Apache] GET /catalog/{i} - 200 OK - {20 + i % 30}ms"
+    )
+
+
+def big_log(error_at=9_000, lines=10_000):
+    log = ["=== WEB TIER LOGS ==="] + [info_line(i) for i in range(lines)]
+    log[error_at] = "2024-01-15T12:30:00Z [ERROR] [trace_id:boom] [Apache] GET /pay - 502 Bad Gateway - 5234ms"
+    log.append("2024-01-15T12:59:00Z [WARN] [Apache] upstream slow - 900ms")
+    return "\n".join(log)
+
+
+def test_small_logs_are_returned_unchanged():
+    log = "\n".join(info_line(i) for i in range(5))
+
+    assert sample_logs(log, token_budget=1500) == log
+
+
+@pytest.mark.parametrize("budget", [200, 500, 1500])
+def test_sample_never_exceeds_budget(budget):
+    assert count_tokens(sample_logs(big_log(), token_budget=budget)) <= budget
+
+
+def test_errors_are_kept_ahead_of_context():
+    sample = sample_logs(big_log(), token_budget=500)
+
+    assert sample.splitlines()[0] == "=== WEB TIER LOGS ==="
+    assert "trace_id:boom" in sample
+    assert "upstream slow" in sample
+    assert sample.index("502 Bad Gateway") < sample.index("upstream slow")
+
+
+def test_context_is_spread_over_the_time_range():
+    sample = sample_logs(big_log(), token_budget=1500)
+    hours = {line[11:13] for line in sample.splitlines() if "[INFO]" in line}
+
+    # 10,000 seconds of INFO lines span 10:00 to 12:46
+    assert hours == {"10", "11", "12"}
@@ -0,0 +1,99 @@
+"""
+Tests for k-way merging of per-host log shards (backend/ingest/shards.py)
+
+Run with: python -m pytest tests/test_shards.py
+"""
+import gzip
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.sketch import LatencySketches
+from backend.ingest import shards
+from backend.ingest.shards import iter_shard_lines, read_shards_window
+
+
+BASE = datetime(2024, 1, 15, 14, 0, tzinfo=timezone.utc)
+
+
+def host_line(second, host):
+    stamp = (BASE + timedelta(seconds=second)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return f"{stamp} [INFO] [AZ:us-east-1a] [EC2:{host}] [Apache] GET /x from {host} - {second % 90 + 10}ms"
+
+
+def make_shards(tmp_path, hosts=5, seconds=3000):
+    """Host h logs every `hosts`-th second starting at h; one shard is gzipped"""
+    directory = tmp_path / "web"
+    directory.mkdir()
+    every = {}
+    for h in range(hosts):
+        host = f"i-{h:04d}"
+        lines = [host_line(second, host) for second in range(h, seconds, hosts)]
+        if h == 0:
+            lines.insert(3, "    Traceback continuation of the third entry")
+        data = ("\n".join(lines) + "\n").encode()
+        if h == 1:
+            (directory / f"{host}.log.gz").write_bytes(gzip.compress(data))
+        else:
+            (directory / f"{host}.log").write_bytes(data)
+        every[host] = lines
+    return str(directory / "*.log*"), every
+
+
+def test_merge_is_time_ordered_and_complete(tmp_path):
+    pattern, every = make_shards(tmp_path)
+    merged = "\n".join(iter_shard_lines(pattern, max_workers=2)).splitlines()
+
+    assert len(merged) == sum(len(lines) for lines in every.values())
+    stamps = [line[:20] for line in merged if not line.startswith(" ")]
+    assert stamps == sorted(stamps)
+    # The continuation line directly follows the entry it belongs to
+    position = merged.index("    Traceback continuation of the third entry")
+    assert merged[position - 1] == every["i-0000"][2]
+
+
+def test_window_and_sketches_cover_only_the_window(tmp_path):
+    pattern, _ = make_shards(tmp_path)
+    sketches = LatencySketches()
+
+    window = read_shards_window(
+        pattern, "2024-01-15T14:10:00Z", "2024-01-15T14:20:00Z", tier="web", latency_sketches=sketches
+    )
+
+    lines = window.splitlines()
+    assert len(lines) == 600
+    assert lines[0].startswith("2024-01-15T14:10:00Z") and lines[-1].startswith("2024-01-15T14:19:59Z")
+    assert sketches.merged(tier="web").count == 600
+    assert len({key[1:] for key in sketches.sketches}) == 1  # one (service, AZ) cell
+
+
+def test_early_exit_stops_the_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(shards, "BATCH_ENTRIES", 10)
+    pattern, _ = make_shards(tmp_path, hosts=3, seconds=30_000)
+    before = threading.active_count()
+
+    stream = iter_shard_lines(pattern)
+    first = [next(stream) for _ in range(5)]
+    stream.close()
+
+    assert len(first) == 5
+    assert threading.active_count() == before
+
+
+def test_no_shards(tmp_path):
+    assert read_shards_window(str(tmp_path / "missing" / "*.log")) == ""
+
+
+def test_unreadable_shard_fails_loudly(tmp_path):
+    pattern, _ = make_shards(tmp_path, hosts=2, seconds=10)
+    (tmp_path / "web" / "i-9999.log.bz2").write_bytes(b"not bzip2")
+
+    with pytest.raises(RuntimeError, match="i-9999"):
+        list(iter_shard_lines(pattern))
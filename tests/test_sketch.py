@@ -0,0 +1,97 @@
+"""
+Tests for the latency quantile sketches (backend/analysis/sketch.py)
+
+Run with: python -m pytest tests/test_sketch.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.sketch import DDSketch, LatencySketches
+
+
+QUANTILES = (0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+def latencies(seed=7, size=50_000):
+    return np.random.default_rng(seed).lognormal(mean=5.0, sigma=1.2, size=size)
+
+
+def assert_within_accuracy(sketch, values, accuracy):
+    for q in QUANTILES:
+        exact = np.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(exact, rel=accuracy * 1.0001), q
+
+
+@pytest.mark.parametrize("accuracy", [0.01, 0.05])
+def test_quantiles_within_relative_accuracy(accuracy):
+    values = latencies()
+    sketch = DDSketch(relative_accuracy=accuracy)
+    sketch.add_many(values)
+
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(values.mean())
+    assert_within_accuracy(sketch, values, accuracy)
+
+
+def test_add_and_add_many_agree():
+    values = latencies(size=2_000)
+    one_by_one, vectorized = DDSketch(), DDSketch()
+    for value in values:
+        one_by_one.add(float(value))
+    vectorized.add_many(np.r_[values, np.nan])
+
+    assert one_by_one.buckets == vectorized.buckets
+    assert one_by_one.count == vectorized.count == len(values)
+
+
+def test_merge_matches_single_sketch():
+    values = latencies()
+    whole = DDSketch()
+    whole.add_many(values)
+    merged = DDSketch()
+    for part in np.array_split(values, 7):
+        shard = DDSketch()
+        shard.add_many(part)
+        merged.merge(shard)
+
+    assert merged.buckets == whole.buckets
+    assert merged.count == whole.count
+    assert_within_accuracy(merged, values, 0.01)
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(0.01).merge(DDSketch(0.05))
+
+
+def test_collapse_bounds_memory_and_keeps_high_quantiles():
+    values = np.geomspace(1e-2, 1e6, 20_000)
+    sketch = DDSketch(max_buckets=100)
+    sketch.add_many(values)
+
+    assert len(sketch.buckets) <= 100
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(values, 0.99, method="lower"), rel=0.01)
+
+
+def test_latency_sketches_group_by_service_and_az():
+    log = "\n".join([
+        "2024-01-15T14:30:00Z [INFO] [AZ:us-east-1a] [Service:checkout] GET /cart - 100ms",
+        "2024-01-15T14:30:01Z [INFO] [AZ:us-east-1b] [Service:checkout] GET /cart - 300ms",
+        "2024-01-15T14:30:02Z [INFO] [AZ:us-east-1a] [Service:checkout] GET /cart - 200ms",
+        "2024-01-15T14:30:03Z [INFO] [AZ:us-east-1a] [Service:checkout] GET /health",
+    ])
+    sketches = LatencySketches()
+    sketches.add_text("app", log)
+
+    assert sketches.sketch("app", "checkout", "us-east-1a").count == 2
+    assert sketches.merged(tier="app").count == 3
+    assert sketches.merged(tier="web").count == 0
+    assert "us-east-1b" in sketches.format_table(tier="app")
+    assert sketches.format_table(tier="web") == ""
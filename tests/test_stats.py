@@ -0,0 +1,101 @@
+"""
+Tests for the latency / error-rate statistics and load-time digests
+(backend/analysis/stats.py, backend/analysis/digest.py)
+
+Run with: python -m pytest tests/test_stats.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.digest import digest_logs
+from backend.analysis.parser import parse_log
+from backend.analysis.sketch import LatencySketches
+from backend.analysis.stats import group_stats, grouped_quantiles, log_statistics, tier_statistics
+
+
+def app_log(count=200):
+    # order-service degrades in the second half of the hour; cart-service stays healthy
+    lines = []
+    for i in range(count):
+        minute = i * 60 // count
+        if i % 2:
+            level, latency = ("ERROR", 5000) if minute >= 30 else ("INFO", 50)
+            service = "order-service"
+        else:
+            level, latency, service = "INFO", 40 + i % 10, "cart-service"
+        az = "us-east-1a" if i % 4 < 2 else "us-east-1b"
+        lines.append(
+            f"2024-01-15T14:{minute:02d}:{i % 60:02d}Z [{level}] [trace_id:t-{i}] [AZ:{az}] "
+            f"[Service:{service}] handled request - {latency}ms"
+        )
+    return "\n".join(lines)
+
+
+def test_grouped_quantiles_match_numpy():
+    rng = np.random.default_rng(3)
+    codes = rng.integers(0, 5, size=1000)
+    values = rng.lognormal(4, 1, size=1000)
+    values[::17] = np.nan
+
+    result = grouped_quantiles(codes, values, groups=6)
+
+    for group in range(5):
+        group_values = values[(codes == group) & ~np.isnan(values)]
+        assert result[group] == pytest.approx(np.percentile(group_values, [50, 95, 99]))
+    assert np.isnan(result[5]).all()
+
+
+def test_group_stats_rank_worst_service_first():
+    stats = group_stats(parse_log(app_log(), "app"), "service", "services", windows=2)
+
+    assert [s.name for s in stats] == ["order-service", "cart-service"]
+    order, cart = stats
+    assert order.lines == cart.lines == 100
+    assert order.error_rate == pytest.approx(0.5)
+    assert order.window_error_rates == [0.0, 1.0]
+    assert (order.first_window_p95, order.last_window_p95) == (50.0, 5000.0)
+    assert cart.errors == 0
+
+
+def test_tier_statistics_table():
+    table = tier_statistics(app_log(), "app")
+
+    assert table.startswith("app: 200 lines")
+    assert "errors 50 (25.0%)" in table
+    assert "order-service" in table and "us-east-1b" in table
+    assert tier_statistics("   ", "app") == ""
+
+
+def test_digest_parses_once_for_every_table():
+    logs = {"web": "", "app": app_log(), "db": app_log(40).replace("[Service:", "[DB:orders-1] [Service:")}
+    digest = digest_logs(logs)
+
+    assert set(digest.tiers) == {"app", "db"}
+    assert digest.tiers["app"].statistics == tier_statistics(logs["app"], "app")
+    assert digest.log_statistics == log_statistics(logs)
+    assert digest.tiers["app"].log_chars == len(logs["app"])
+    assert digest.tiers["app"].healthy_result == ""
+    assert "t-1" in digest.trace_correlation
+
+
+def test_digest_adds_sketches_only_beyond_the_kept_lines():
+    kept = app_log(100)
+    sketches = LatencySketches()
+    sketches.add_text("app", kept)
+    assert "sketch" not in digest_logs({"app": kept}, sketches).log_statistics
+
+    # The sketches also saw lines that were not kept (e.g. an upload's reservoir)
+    sketches.add_text("app", app_log(400))
+    sketches.add_text("cache", "2024-01-15T14:00:00Z [INFO] [redis-node:cache-1] [Redis] GET - 2ms")
+    digest = digest_logs({"app": kept}, sketches)
+
+    assert "over all 500 ingested app lines" in digest.tiers["app"].statistics
+    assert "ingested cache lines" in digest.log_statistics
+    assert "cache" not in digest.tiers
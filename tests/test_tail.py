@@ -0,0 +1,113 @@
+"""
+Tests for live tail mode (backend/ingest/tail.py)
+
+Run with: python -m pytest tests/test_tail.py
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.ingest.tail import LogTailer, TierTail
+
+
+def web_line(i, level="INFO", message="GET /cart - 200 OK", latency=40):
+    return f"2024-01-15T14:30:{i % 60:02d}Z [{level}] [trace_id:t-{i}] [AZ:us-east-1a] [Apache] {message} - {latency}ms\n"
+
+
+def append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_polls_read_only_new_complete_lines(tmp_path):
+    path = tmp_path / "web.log"
+    path.write_text(web_line(0) + web_line(1))
+    tail = TierTail("web", path)
+
+    assert tail.poll() == 2
+    assert tail.poll() == 0
+    # A line without its newline yet is held back until it completes
+    append(path, web_line(2)[:30])
+    assert tail.poll() == 0
+    append(path, web_line(2)[30:])
+    assert tail.poll() == 1
+    assert tail.recent_text().splitlines()[-1] == web_line(2).rstrip("\n")
+    assert tail.latency_sketches.merged(tier="web").count == 3
+
+
+def test_truncation_restarts_from_the_beginning(tmp_path):
+    path = tmp_path / "web.log"
+    path.write_text(web_line(0) + web_line(1) + web_line(2))
+    tail = TierTail("web", path)
+    tail.poll()
+
+    path.write_text(web_line(3))
+    assert tail.poll() == 1
+    assert tail.lines_read == 4
+
+
+def test_recent_window_is_bounded(tmp_path):
+    path = tmp_path / "web.log"
+    path.write_text("".join(web_line(i) for i in range(50)))
+    tail = TierTail("web", path, recent_lines=10)
+    tail.poll()
+
+    assert len(tail.recent) == 10
+    assert tail.recent[0] == web_line(40).rstrip("\n")
+
+
+def test_only_material_changes_mark_a_tier(tmp_path):
+    path = tmp_path / "web.log"
+    path.write_text("".join(web_line(i) for i in range(20)) + web_line(20, "ERROR", "GET /pay - 502 Bad Gateway"))
+    tail = TierTail("web", path)
+    tail.poll()
+    assert tail.change_reasons() == ["not analyzed yet"]
+    tail.mark_analyzed()
+
+    # A few more of the same error and ordinary traffic: no re-analysis
+    append(path, "".join(web_line(i, "ERROR", "GET /pay - 502 Bad Gateway") for i in range(3)) + web_line(30))
+    tail.poll()
+    assert tail.change_reasons() == []
+
+    # A brand-new error signature is material
+    append(path, web_line(31, "ERROR", "worker process exited on signal 11"))
+    tail.poll()
+    (reason,) = tail.change_reasons()
+    assert reason.startswith("new signature") and "signal" in reason
+
+
+def test_latency_shift_is_material(tmp_path):
+    path = tmp_path / "web.log"
+    path.write_text("".join(web_line(i) for i in range(50)))
+    tail = TierTail("web", path)
+    tail.poll()
+    tail.mark_analyzed()
+
+    append(path, "".join(web_line(i, latency=900) for i in range(100)))
+    tail.poll()
+    (reason,) = tail.change_reasons()
+    assert reason.startswith("p95 latency")
+
+
+def test_tailer_follows_each_tier(tmp_path):
+    (tmp_path / "web.log").write_text(web_line(0))
+    (tmp_path / "app.log").write_text(web_line(1) + web_line(2))
+    tailer = LogTailer(tmp_path, tiers=["web", "app", "db"])
+
+    assert tailer.poll() == {"web": 1, "app": 2, "db": 0}
+    assert set(tailer.changed_tiers()) == {"web", "app"}
+    tailer.mark_analyzed(["web", "app"])
+    assert tailer.changed_tiers() == {}
+    assert tailer.latency_sketches().merged().count == 3
+
+
+def test_from_end_skips_existing_lines(tmp_path):
+    (tmp_path / "web.log").write_text(web_line(0) + web_line(1))
+    tailer = LogTailer(tmp_path, tiers=["web"], from_end=True)
+
+    assert tailer.poll() == {"web": 0}
+    append(tmp_path / "web.log", web_line(2))
+    assert tailer.poll() == {"web": 1}
@@ -0,0 +1,69 @@
+"""
+Tests for Drain-style template mining (backend/analysis/templates.py)
+
+Run with: python -m pytest tests/test_templates.py
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.templates import WILDCARD, TemplateMiner, mask_line
+
+
+def test_mask_line_hides_request_and_host_fields():
+    line = "[ERROR] [trace_id:req-101] [EC2:i-0abc12345678] [Apache] upstream i-0def987654321 slow - 5234ms"
+
+    assert mask_line(line) == "[ERROR] [trace_id:<*>] [EC2:<*>] [Apache] upstream <*> slow - <*>ms"
+
+
+def test_lines_differing_in_variables_share_a_template():
+    miner = TemplateMiner().add_text("\n".join([
+        "=== APP TIER LOGS ===",
+        "2024-01-15T14:30:01Z [ERROR] [trace_id:a] [Service:order] payment 1001 declined - 120ms",
+        "2024-01-15T14:30:05Z [ERROR] [trace_id:b] [Service:order] payment 1002 declined - 480ms",
+        "",
+        "2024-01-15T14:30:09Z [ERROR] [trace_id:c] [Service:order] payment 1003 declined - 95ms",
+    ]))
+
+    assert miner.line_count == 3
+    (template,) = miner.templates
+    assert template.count == 3
+    assert template.text == f"[ERROR] [trace_id:{WILDCARD}] [Service:order] payment {WILDCARD} declined - {WILDCARD}ms"
+    assert (template.first_timestamp, template.last_timestamp) == ("2024-01-15T14:30:01Z", "2024-01-15T14:30:09Z")
+    assert (template.min_latency_ms, template.max_latency_ms) == (95.0, 480.0)
+    assert template.summary() == "2024-01-15T14:30:01Z -> 2024-01-15T14:30:09Z, latency 95-480ms"
+    assert "trace_id:a" in template.example
+
+
+def test_different_messages_and_levels_stay_apart():
+    miner = TemplateMiner().add_text("\n".join([
+        "2024-01-15T14:30:01Z [ERROR] [Service:order] connection refused by inventory",
+        "2024-01-15T14:30:02Z [WARN] [Service:order] connection refused by inventory",
+        "2024-01-15T14:30:03Z [ERROR] [Service:order] disk quota exceeded on volume",
+    ]))
+
+    assert len(miner.templates) == 3
+
+
+def test_ranked_templates_most_severe_then_most_frequent():
+    lines = (
+        ["2024-01-15T14:30:00Z [WARN] [Service:web] slow response from cart"] * 5
+        + ["2024-01-15T14:30:00Z [INFO] [Service:web] request served"] * 9
+        + ["2024-01-15T14:30:00Z [ERROR] [Service:web] cart unavailable"] * 2
+        + ["2024-01-15T14:30:00Z [FATAL] [Service:web] process crashed"]
+    )
+    ranked = TemplateMiner().add_text("\n".join(lines)).ranked_templates()
+
+    assert [(t.level, t.count) for t in ranked] == [("FATAL", 1), ("ERROR", 2), ("WARN", 5), ("INFO", 9)]
+
+
+def test_template_budget_folds_new_lines():
+    miner = TemplateMiner(max_templates=2)
+    for i in range(10):
+        miner.add_line(f"2024-01-15T14:30:00Z [ERROR] [Service:s] failure kind{i} alpha{i} beta{i} gamma{i}")
+
+    assert len(miner.templates) == 2
+    assert sum(t.count for t in miner.templates) == 10
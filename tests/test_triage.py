@@ -0,0 +1,89 @@
+"""
+Tests for the deterministic log pre-check (backend/analysis/triage.py)
+
+Run with: python -m pytest tests/test_triage.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.analysis.triage import (
+    MAX_REASONS,
+    classify_log_health,
+    create_triage_node,
+    format_healthy_result,
+)
+
+
+def info_line(i, message="GET /health - 200 OK - 35ms"):
+    return f"2024-01-15T14:30:{i % 60:02d}Z [INFO] [trace_id:t-{i}] [AZ:us-east-1a] [Apache] {message}"
+
+
+HEALTHY_LOG = "\n".join(["=== WEB TIER LOGS ===", ""] + [info_line(i) for i in range(50)])
+
+
+def test_healthy_log():
+    result = classify_log_health(HEALTHY_LOG)
+
+    assert result.healthy
+    assert result.line_count == 50
+    assert result.levels == {"INFO": 50}
+    assert result.status_codes == {"200": 50}
+    assert result.max_latency_ms == result.min_latency_ms == 35.0
+    assert "Status: Healthy" in format_healthy_result("web", result)
+
+
+def test_each_finding_makes_the_log_unhealthy():
+    findings = [
+        "2024-01-15T14:30:00Z [WARN] [Apache] upstream slow",
+        info_line(0, "GET /cart - 503 Service Unavailable - 20ms"),
+        info_line(0, "request failed with ConnectionResetError"),
+        info_line(0, "Traceback (most recent call last):"),
+        info_line(0, "connection timed out to db"),
+        info_line(0, "GET /cart - 200 OK - 1500ms"),
+        "a line without any level",
+    ]
+    for finding in findings:
+        result = classify_log_health(HEALTHY_LOG + "\n" + finding)
+        assert not result.healthy, finding
+        assert result.reason_count >= 1, finding
+
+
+def test_no_false_positives_on_failure_substrings():
+    log = "\n".join([
+        info_line(0, "GET /terms-of-service - 200 OK - 20ms"),
+        info_line(1, "user preferences saved - 12ms"),
+        info_line(2, "interrupt handler registered"),
+    ])
+
+    assert classify_log_health(log).healthy
+
+
+def test_reasons_are_capped_but_counted():
+    errors = "\n".join(f"2024-01-15T14:30:00Z [ERROR] [Apache] failure {i}" for i in range(40))
+    result = classify_log_health(errors)
+
+    assert not result.healthy
+    assert result.reason_count == 40
+    assert len(result.reasons) == MAX_REASONS
+
+
+def test_empty_log_is_not_healthy():
+    assert not classify_log_health("\n\n").healthy
+
+
+def test_triage_node_uses_given_digest_or_digests_input():
+    node = create_triage_node("web")
+
+    update = asyncio.run(node.ainvoke({"log_input": HEALTHY_LOG, "digest": None}))
+    assert update["digest"].tier == "web"
+    assert update["analysis_result"].startswith("Status: Healthy")
+
+    unhealthy = HEALTHY_LOG + "\n2024-01-15T14:31:00Z [ERROR] [Apache] upstream reset"
+    given = node.invoke({"log_input": HEALTHY_LOG, "digest": None})["digest"]
+    assert node.invoke({"log_input": unhealthy, "digest": given})["digest"] is given
+    assert node.invoke({"log_input": unhealthy, "digest": None})["analysis_result"] == ""
@@ -0,0 +1,121 @@
+"""
+Tests for incremental upload ingest (backend/ingest/upload.py)
+
+Run with: python -m pytest tests/test_upload.py
+"""
+import gzip
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.ingest import upload
+from backend.ingest.upload import UploadIngest, tier_for_name
+
+
+BOUNDARY = "srenity-test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def tier_lines(tier, count, level="INFO"):
+    return "".join(
+        f"2024-01-15T14:{i // 60 % 60:02d}:{i % 60:02d}Z [{level}] [trace_id:{tier}-{i}] [AZ:us-east-1a] "
+        f"[Service:{tier}-svc] request {i} done - {100 + i % 50}ms\n"
+        for i in range(count)
+    )
+
+
+def part(name, payload, filename=None, content_type="text/plain"):
+    disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\nContent-Type: {content_type}\r\n\r\n".encode()
+        + payload + b"\r\n"
+    )
+
+
+def multipart_body(*parts):
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def ingest_body(body, chunk_size, content_type=CONTENT_TYPE, default_tier=None):
+    ingest = UploadIngest(content_type, default_tier, reservoir_lines=100_000)
+    for start in range(0, len(body), chunk_size):
+        ingest.feed(body[start:start + chunk_size])
+    ingest.finish()
+    return ingest
+
+
+def test_tier_for_name():
+    assert tier_for_name("web") == "web"
+    assert tier_for_name("uploads/app.log.gz") == "app"
+    assert tier_for_name("db-01.log") == "db"
+    assert tier_for_name("webserver.log") is None
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 4096, 10 ** 9])
+def test_chunked_multipart_with_gzip_parts(chunk_size):
+    web, app = tier_lines("web", 300), tier_lines("app", 200, level="ERROR")
+    body = multipart_body(
+        part("query", b"502s on checkout"),
+        part("web", web.encode(), filename="web.log"),
+        part("app", gzip.compress(app.encode()), filename="app.log.gz", content_type="application/gzip"),
+        part("notes", b"ignored", filename="notes.txt"),
+    )
+    ingest = ingest_body(body, chunk_size)
+    logs = ingest.logs()
+
+    assert ingest.fields == {"query": "502s on checkout"}
+    assert ingest.skipped_parts == ["notes.txt"]
+    assert ingest.completed_tiers == ["web", "app"]
+    assert sorted(logs["web"].splitlines()) == sorted(web.splitlines())
+    assert sorted(logs["app"].splitlines()) == sorted(app.splitlines())
+    assert ingest.latency_sketches.merged(tier="web").count == 300
+    assert ingest.bytes_received == len(body)
+
+
+def test_gzip_part_inflated_past_one_chunk(monkeypatch):
+    monkeypatch.setattr(upload, "INFLATE_CHUNK_BYTES", 1024)
+    web = tier_lines("web", 2000)
+    body = multipart_body(part("web", gzip.compress(web.encode()), filename="web.log.gz"))
+
+    ingest = ingest_body(body, 8192)
+
+    assert ingest.samplers["web"].lines == 2000
+
+
+def test_inflate_cap_rejects_bomb(monkeypatch):
+    monkeypatch.setattr(upload, "MAX_INFLATED_PART_BYTES", 64 * 1024)
+    bomb = gzip.compress(b"\n" * (1024 * 1024))
+    body = multipart_body(part("web", bomb, filename="web.log.gz"))
+
+    with pytest.raises(ValueError, match="inflates"):
+        ingest_body(body, 4096)
+
+
+def test_plain_body_split_by_sections():
+    body = ("\n=== WEB TIER LOGS ===\n" + tier_lines("web", 5) + "=== DB TIER LOGS ===\n" + tier_lines("db", 3)).encode()
+
+    ingest = ingest_body(body, 7, content_type="text/plain")
+
+    assert ingest.completed_tiers == ["web", "db"]
+    assert len(ingest.logs()["db"].splitlines()) == 3
+
+
+def test_plain_body_for_default_tier():
+    ingest = ingest_body(tier_lines("cache", 4).encode(), 5, content_type="text/plain", default_tier="cache")
+
+    assert len(ingest.logs()["cache"].splitlines()) == 4
+
+
+def test_plain_body_without_tier_is_rejected():
+    with pytest.raises(ValueError, match="without a tier"):
+        ingest_body(("\n\n" + tier_lines("web", 2)).encode(), 1024, content_type="text/plain")
+
+
+def test_multipart_without_boundary_is_rejected():
+    with pytest.raises(ValueError):
+        UploadIngest("multipart/form-data")